@@ -1,8 +1,7 @@
 
 
 import streamlit as st
-import json
-from modules import auth
+from modules import auth, sesion, repositorio, catalogo_formularios, trazas
 from views import instructivo, formularios, evaluaciones, rrhh, capacitacion, configuracion
 import bcrypt
 
@@ -10,6 +9,10 @@ st.set_page_config(page_title="Evaluación de Desempeño", layout="wide", initia
 
 st.sidebar.image("logo-cap.png", use_container_width=True)
 
+# Cada rerun arranca con el memo de consultas vacío y su propia traza de llamadas
+repositorio.iniciar_ejecucion()
+trazas.iniciar_rerun()
+
 # ---- AUTENTICACIÓN ----
 name, authentication_status, username, authenticator, supabase, cambiar_password = auth.cargar_usuarios_y_autenticar()
 
@@ -36,6 +39,9 @@ elif cambiar_password:
                 "password": hashed,
                 "cambiar_password": False
             }).eq("usuario", username).execute()
+            repositorio.invalidar("usuarios")
+            auth.invalidar_directorio_usuarios()
+            sesion.invalidar_perfil(username)
 
             st.success("✅ Contraseña actualizada correctamente.")
             st.rerun()  # vuelve a autenticar ahora sin cambiar_password
@@ -46,45 +52,17 @@ elif cambiar_password:
     st.stop()
 
 elif authentication_status:
-    # Usuario autenticado, cargar datos y mostrar interfaz
-    try:
-        usuario_data = supabase.table("usuarios")\
-            .select("apellido_nombre, rol")\
-            .eq("usuario", username)\
-            .execute()\
-            .data
-
-        if usuario_data:
-            rol_data = usuario_data[0].get("rol", {})
-            if isinstance(rol_data, str):
-                try:
-                    rol_data = json.loads(rol_data)
-                except json.JSONDecodeError:
-                    rol_data = {}
-            if not isinstance(rol_data, dict):
-                rol_data = {}
-
-            st.session_state.update({
-                "usuario": username,
-                "nombre_completo": usuario_data[0]['apellido_nombre'],
-                "rol": rol_data
-            })
-        else:
-            st.error("❌ No se pudieron cargar los datos del usuario.")
-            st.stop()
-
-    except Exception as e:
-        st.error(f"❌ Error al cargar datos del usuario: {str(e)}")
-        st.stop()
+    # Usuario autenticado: el perfil ya se cargó una vez para esta sesión
+    perfil = sesion.perfil_actual()
 
-    if not st.session_state.get("usuario") or not st.session_state.get("rol"):
+    if not perfil or not perfil.rol:
         st.warning("⚠️ La sesión ha expirado o es inválida. Por favor, vuelva a iniciar sesión.")
         authenticator.logout("Cerrar sesión", "sidebar")
         st.stop()
 
     # ---- INTERFAZ DE USUARIO ----
     # ---- INTERFAZ DE USUARIO ----
-    st.sidebar.success(f"{st.session_state['nombre_completo']}")
+    st.sidebar.success(f"{perfil.nombre_completo}")
     authenticator.logout("Cerrar sesión", "sidebar")
 
     # ---- NAVEGACIÓN (con opción predeterminada según rol) ----
@@ -97,7 +75,7 @@ elif authentication_status:
         "⚙️ Configuración"
     ]
 
-    rol = st.session_state.get("rol", {})
+    rol = perfil.rol
 
     if rol.get("evaluador") or rol.get("evaluador_general"):
         indice_default = opciones_menu.index("📄 Formularios")
@@ -107,14 +85,14 @@ elif authentication_status:
         indice_default = opciones_menu.index("📝 Instructivo")
 
     opcion = st.sidebar.radio("📂 Navegación", opciones_menu, index=indice_default)
+    trazas.vista(trazas.VISTAS[opciones_menu.index(opcion)])  # mismo orden que el menú
 
     if opcion == "📝 Instructivo":
         instructivo.mostrar(supabase)
 
     elif opcion == "📄 Formularios":
         if rol.get("evaluador") or rol.get("evaluador_general"):
-            formularios_data, clasificaciones_data = formularios.cargar_formularios()
-            formularios.mostrar(supabase, formularios_data, clasificaciones_data)
+            formularios.mostrar(supabase, catalogo_formularios.cargar_catalogo())
         else:
             st.warning("⚠️ Esta sección está habilitada para otro rol.")
 
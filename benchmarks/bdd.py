@@ -0,0 +1,146 @@
+"""Benchmark del motor de residuales/BDD contra el recorrido por dependencia,
+y del recálculo incremental (alta o anulación) contra el recálculo completo.
+
+Uso: python benchmarks/bdd.py [filas ...]   (por defecto 10000 50000 200000)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules.capacitacion_bdd import calcular_bdd, recalcular_grupos  # noqa: E402
+
+CALIFICACIONES = ["DESTACADO", "BUENO", "REGULAR", "DEFICIENTE"]
+
+
+def generar_evaluaciones(filas: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    dependencias = [f"DG {i:03d}" for i in range(max(5, filas // 80))]
+    df = pd.DataFrame({
+        "id_evaluacion": np.arange(filas),
+        "dependencia_general": rng.choice(dependencias, filas),
+        "nivel": rng.choice([1, 2, 3, 4, 5, 6], filas, p=[0.03, 0.1, 0.2, 0.27, 0.25, 0.15]),
+        "calificacion": rng.choice(CALIFICACIONES, filas, p=[0.3, 0.5, 0.15, 0.05]),
+        "puntaje_relativo": np.round(rng.uniform(5, 10, filas), 1),
+        "anulada": False,
+    })
+    df.loc[rng.random(filas) < 0.01, "dependencia_general"] = None
+    return df
+
+
+def referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Algoritmo anterior: un recorrido con máscaras por dependencia."""
+    df = df.copy()
+    df["residual"] = False
+    df["bonificacion_elegible"] = False
+    dependencias = df["dependencia_general"].dropna().unique()
+    for dep in dependencias:
+        df_dep = df[df["dependencia_general"] == dep]
+        df.loc[df_dep[df_dep["nivel"] == 1].index, "residual"] = True
+        for niveles in ([2, 3, 4], [5, 6]):
+            grupo = df_dep[df_dep["nivel"].isin(niveles)]
+            if not grupo.empty and len(grupo) < 6:
+                df.loc[grupo.index, "residual"] = True
+    for dep in dependencias:
+        df_dep = df[df["dependencia_general"] == dep]
+        elegibles = df_dep[(df_dep["calificacion"] == "DESTACADO") & (~df_dep["residual"]) & (df_dep["anulada"] != True)]
+        if not elegibles.empty:
+            cupo = max(1, int(len(df_dep[df_dep["anulada"] != True]) * 0.1))
+            elegibles = elegibles.sort_values("puntaje_relativo", ascending=False, kind="stable")
+            df.loc[elegibles.index[:cupo], "bonificacion_elegible"] = True
+    residuales = df[df["residual"] & (df["calificacion"] == "DESTACADO") & (df["anulada"] != True)]
+    if not residuales.empty:
+        residuales = residuales.sort_values("puntaje_relativo", ascending=False, kind="stable")
+        df.loc[residuales.index[:max(1, len(residuales) // 5)], "bonificacion_elegible"] = True
+    return df[["residual", "bonificacion_elegible"]]
+
+
+def medir(funcion, *args, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def analisis_completo(df: pd.DataFrame) -> pd.DataFrame:
+    """Marcas como las guarda el análisis completo: sin dependencia general se
+    conserva la bonificación anterior."""
+    marcas = calcular_bdd(df).marcas
+    marcas["bonificacion_elegible"] = marcas["bonificacion_elegible"].where(
+        df["dependencia_general"].notna(), df["bonificacion_elegible"]
+    )
+    return marcas
+
+
+def incremental(df: pd.DataFrame, dependencia) -> pd.DataFrame:
+    """Aplica recalcular_grupos sobre lo que se leería de la base y devuelve
+    las marcas resultantes de todo `df`."""
+    leidas = df[(df["dependencia_general"] == dependencia) | (df["residual"] == True)]
+    cambios = recalcular_grupos(leidas, [dependencia]).set_index("id_evaluacion")
+    marcas = df.set_index("id_evaluacion")[["residual", "bonificacion_elegible"]].astype(bool)
+    for columna in marcas.columns:
+        marcas.loc[cambios.index, columna] = cambios[columna].to_numpy(dtype=bool)
+    return marcas.set_index(df.index)
+
+
+def verificar_incremental(filas: int, operaciones: int = 30, semilla: int = 1):
+    """Altas y anulaciones al azar: tras cada una, incremental == completo."""
+    rng = np.random.default_rng(semilla)
+    df = generar_evaluaciones(filas, semilla)
+    df = df.assign(residual=False, bonificacion_elegible=False)
+    df[["residual", "bonificacion_elegible"]] = analisis_completo(df)
+    proximo_id = filas
+    t_completo = t_incremental = 0.0
+    for _ in range(operaciones):
+        if rng.random() < 0.5:
+            nueva = generar_evaluaciones(1, int(rng.integers(1 << 30))).assign(
+                id_evaluacion=proximo_id, residual=False, bonificacion_elegible=False
+            )
+            nueva["dependencia_general"] = rng.choice(df["dependencia_general"].dropna().unique())
+            proximo_id += 1
+            df = pd.concat([df, nueva], ignore_index=True)
+            dependencia = nueva["dependencia_general"].iloc[0]
+        else:
+            fila = int(rng.integers(len(df)))
+            dependencia = df["dependencia_general"].iloc[fila]
+            df = df.drop(df.index[fila]).reset_index(drop=True)
+
+        inicio = time.perf_counter()
+        esperado = analisis_completo(df)
+        t_completo += time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        obtenido = incremental(df, dependencia)
+        t_incremental += time.perf_counter() - inicio
+
+        if not obtenido.equals(esperado.astype(bool)):
+            return False, t_completo, t_incremental
+        df[["residual", "bonificacion_elegible"]] = obtenido
+    return True, t_completo / operaciones, t_incremental / operaciones
+
+
+def main(tamanios):
+    print(f"{'filas':>8} {'recorrido (s)':>14} {'motor (s)':>10} {'x':>6}  iguales")
+    for filas in tamanios:
+        df = generar_evaluaciones(filas)
+        t_ref, esperado = medir(referencia, df, repeticiones=1)
+        t_motor, resultado = medir(calcular_bdd, df)
+        iguales = resultado.marcas.equals(esperado)
+        print(f"{filas:>8} {t_ref:>14.3f} {t_motor:>10.3f} {t_ref / t_motor:>6.1f}  {iguales}")
+        if not iguales:
+            sys.exit(1)
+
+    print(f"\n{'filas':>8} {'completo (s)':>13} {'incremental (s)':>16}  iguales")
+    for filas in tamanios:
+        iguales, t_completo, t_incremental = verificar_incremental(filas)
+        print(f"{filas:>8} {t_completo:>13.4f} {t_incremental:>16.4f}  {iguales}")
+        if not iguales:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10_000, 50_000, 200_000])
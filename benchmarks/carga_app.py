@@ -0,0 +1,310 @@
+"""Carga de la aplicación con evaluadores simulados, sin navegador: cada sesión
+es un streamlit.testing.v1.AppTest que recorre app-evaluaciones.py igual que
+un usuario (login -> Formularios -> agente -> form_eval -> envío, o los
+tableros de Evaluaciones y Capacitación).
+
+AppTest cambia estado global de Streamlit en cada rerun, así que la
+concurrencia se arma con procesos: cada proceso es como una réplica del
+servidor (sus sesiones comparten st.cache_*) y corre sus sesiones de a una
+contra el mismo backend. Reporta, por paso del recorrido, la latencia p50/p95
+de los reruns y las llamadas al backend por rerun; en una pasada aparte, con
+tracemalloc, la memoria que retiene cada sesión.
+
+Solo contra una base local o de prueba: el flujo "formulario" registra
+evaluaciones. Usuarios en un CSV con columnas usuario,password,flujo (flujo:
+formulario, evaluaciones o capacitacion). Con --local no hace falta ni base ni
+CSV: se siembra una base SQLite temporal (modules/supabase_local.py) y cada
+usuario sembrado recorre el flujo de su rol.
+
+Uso: SUPABASE_URL=... SUPABASE_SERVICE_KEY=... \\
+     python benchmarks/carga_app.py usuarios.csv [--sesiones 300] [--concurrencia 8]
+     python benchmarks/carga_app.py --local [--agentes 2000] [--latencia-ms 20]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP = os.path.join(RAIZ, "app-evaluaciones.py")
+TIEMPO_MAX_RERUN_SEG = 120
+
+FLUJOS = ("formulario", "evaluaciones", "capacitacion")
+FLUJO_POR_ROL = {"evaluador": "formulario", "evaluador_general": "evaluaciones", "coordinador": "capacitacion"}
+
+
+# ---- Llamadas al backend ----
+# Cada consulta o RPC de supabase-py es un request HTTP de httpx: se cuentan
+# ahí, sin tocar el cliente de la aplicación.
+
+_llamadas = [0]
+_lock_llamadas = threading.Lock()
+
+
+def contar_llamadas():
+    import httpx
+
+    enviar = httpx.Client.send
+
+    def send(self, request, *args, **kwargs):
+        with _lock_llamadas:
+            _llamadas[0] += 1
+        return enviar(self, request, *args, **kwargs)
+
+    httpx.Client.send = send
+
+
+def llamadas() -> int:
+    with _lock_llamadas:
+        return _llamadas[0]
+
+
+# ---- Recorridos ----
+
+class Sesion:
+    """Un AppTest y la medición de cada rerun: (paso, segundos, llamadas)."""
+
+    def __init__(self, secretos: dict):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP, default_timeout=TIEMPO_MAX_RERUN_SEG)
+        self.app.secrets.update(secretos)
+        self.reruns = []
+        self.resultado = None  # del envío, en el flujo "formulario"
+
+    def rerun(self, paso: str, accion=None):
+        """Aplica `accion` (una interacción que devuelve el elemento) y corre el
+        script; sin acción, hace un run simple."""
+        llamadas_previas = llamadas()
+        inicio = time.perf_counter()
+        (accion() if accion else self.app).run()
+        self.reruns.append((paso, time.perf_counter() - inicio, llamadas() - llamadas_previas))
+        if self.app.exception:
+            raise RuntimeError(f"{paso}: {self.app.exception[0].message}")
+
+    def widget(self, tipo: str, **atributos):
+        for w in getattr(self.app, tipo):
+            if all(getattr(w, k) == v for k, v in atributos.items()):
+                return w
+        raise RuntimeError(f"No se encontró {tipo} {atributos}")
+
+    def login(self, usuario: str, password: str):
+        self.rerun("inicio")
+        self.widget("text_input", label="Username").input(usuario)
+        self.widget("text_input", label="Password").input(password)
+        self.rerun("login", self.widget("button", label="Login").click)
+
+    def navegar(self, paso: str, opcion: str):
+        self.rerun(paso, lambda: self.app.sidebar.radio[0].set_value(opcion))
+
+
+def flujo_formulario(sesion: Sesion, azar: random.Random):
+    sesion.rerun("formularios")  # opción por defecto de los evaluadores
+    agentes = sesion.widget("selectbox", key="select_agente")
+    if len(agentes.options) < 2:
+        return  # sin agentes pendientes
+    sesion.rerun("agente", lambda: agentes.select_index(azar.randrange(1, len(agentes.options))))
+    tipos = sesion.widget("selectbox", key="select_tipo")
+    sesion.rerun("tipo", lambda: tipos.select_index(azar.randrange(1, len(tipos.options))))
+
+    for radio in sesion.app.radio:
+        if radio.key and radio.key.startswith("factor_"):
+            radio.set_value(azar.choice(radio.options))
+    sesion.rerun("previsualizar", sesion.widget("button", label="🔍 Previsualizar calificación").click)
+    sesion.rerun("enviar", sesion.widget("button", label="✅ Sí, enviar evaluación").click)
+    if any("enviada correctamente" in e.value for e in sesion.app.success):
+        sesion.resultado = "enviada"
+    elif any("DESTACADO" in e.value for e in sesion.app.error):
+        sesion.resultado = "sin_cupo"  # rechazo esperable: el cupo se agotó
+    else:
+        raise RuntimeError("enviar: no se confirmó el envío")
+
+
+def flujo_evaluaciones(sesion: Sesion, azar: random.Random):
+    sesion.navegar("evaluaciones", "📋 Evaluaciones")
+
+
+def flujo_capacitacion(sesion: Sesion, azar: random.Random):
+    sesion.rerun("capacitacion")  # opción por defecto de los coordinadores
+
+
+RECORRIDOS = {
+    "formulario": flujo_formulario,
+    "evaluaciones": flujo_evaluaciones,
+    "capacitacion": flujo_capacitacion,
+}
+
+
+def correr_sesion(usuario: dict, secretos: dict, semilla: int) -> Sesion:
+    sesion = Sesion(secretos)
+    sesion.login(usuario["usuario"], usuario["password"])
+    RECORRIDOS[usuario["flujo"]](sesion, random.Random(semilla))
+    return sesion
+
+
+def preparar_proceso():
+    os.chdir(RAIZ)  # la app abre logo-cap.png y formularios.yaml con rutas relativas
+    warnings.filterwarnings("ignore")
+    contar_llamadas()
+
+
+def trabajador(usuarios: list, secretos: dict, semilla: int) -> tuple:
+    """Corre las sesiones de a una; devuelve (reruns, resultados de envío, errores)."""
+    preparar_proceso()
+    reruns, resultados, errores = [], Counter(), []
+    for i, usuario in enumerate(usuarios):
+        try:
+            sesion = correr_sesion(usuario, secretos, semilla + i)
+        except Exception as e:
+            errores.append(f"{usuario['usuario']}: {type(e).__name__}: {e}")
+            continue
+        reruns += sesion.reruns
+        if sesion.resultado:
+            resultados[sesion.resultado] += 1
+    return reruns, resultados, errores
+
+
+# ---- Memoria ----
+
+def memoria_por_sesion(usuarios: list, secretos: dict, semilla: int) -> tuple:
+    """(KiB retenidos por sesión, pico de KiB en un rerun), en el proceso actual.
+    Una primera sesión sin medir llena las cachés compartidas."""
+    preparar_proceso()
+    correr_sesion(usuarios[0], secretos, semilla)
+
+    vivas = []
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    pico = 0
+    for i, usuario in enumerate(usuarios):
+        tracemalloc.reset_peak()
+        vivas.append(correr_sesion(usuario, secretos, semilla + i).app)
+        pico = max(pico, tracemalloc.get_traced_memory()[1] - base)
+    retenida = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return retenida / len(vivas) / 1024, pico / 1024
+
+
+# ---- Reporte ----
+
+def percentil(valores, p):
+    return statistics.quantiles(valores, n=100)[p - 1] if len(valores) > 1 else valores[0]
+
+
+def reporte(reruns: list):
+    por_paso = defaultdict(list)
+    for paso, segundos, n in reruns:
+        por_paso[paso].append((segundos, n))
+    print(f"{'paso':<14} {'reruns':>6} {'p50 (s)':>8} {'p95 (s)':>8} {'llamadas/rerun':>15} {'máx':>5}")
+    for paso, valores in list(por_paso.items()) + [("TOTAL", [(s, n) for _, s, n in reruns])]:
+        tiempos = [s for s, _ in valores]
+        cantidades = [n for _, n in valores]
+        print(
+            f"{paso:<14} {len(valores):>6} {percentil(tiempos, 50):>8.3f} {percentil(tiempos, 95):>8.3f} "
+            f"{statistics.mean(cantidades):>15.1f} {max(cantidades):>5}"
+        )
+
+
+def leer_usuarios(ruta: str) -> list:
+    with open(ruta, newline="", encoding="utf-8") as f:
+        usuarios = [u for u in csv.DictReader(f) if u["flujo"] in FLUJOS]
+    if not usuarios:
+        sys.exit(f"{ruta}: no hay usuarios con flujo {', '.join(FLUJOS)}")
+    return usuarios
+
+
+def base_local(directorio: str, agentes: int, latencia_ms: float) -> tuple:
+    """Siembra una base SQLite en `directorio`; devuelve (secretos, usuarios)."""
+    sys.path.insert(0, RAIZ)
+    from modules import supabase_local
+
+    ruta = os.path.join(directorio, "carga.sqlite3")
+    cliente = supabase_local.crear_cliente(ruta, agentes=agentes)
+    usuarios = []
+    for fila in cliente.base_local.leer("select usuario, rol from usuarios order by usuario"):
+        roles = [rol for rol, activo in json.loads(fila["rol"]).items() if activo and rol in FLUJO_POR_ROL]
+        if roles:
+            usuarios.append({
+                "usuario": fila["usuario"],
+                "password": supabase_local.CONTRASENIA_SEMBRADA,
+                "flujo": FLUJO_POR_ROL[roles[0]],
+            })
+    random.Random(0).shuffle(usuarios)  # que las primeras sesiones mezclen los flujos
+    secretos = {"supabase_local": {"ruta": ruta, "latencia_ms": latencia_ms, "sembrar_si_vacia": False}}
+    return secretos, usuarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("usuarios", nargs="?", help="CSV con columnas usuario,password,flujo")
+    parser.add_argument("--sesiones", type=int, default=300)
+    parser.add_argument("--concurrencia", type=int, default=8, help="procesos en paralelo")
+    parser.add_argument("--sesiones-memoria", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="base SQLite sembrada en vez de Supabase")
+    parser.add_argument("--agentes", type=int, default=2000, help="con --local: agentes sembrados")
+    parser.add_argument("--latencia-ms", type=float, default=0, help="con --local: demora por llamada")
+    args = parser.parse_args()
+
+    if args.local:
+        directorio = tempfile.mkdtemp(prefix="carga_app-")
+        try:
+            secretos, usuarios = base_local(directorio, args.agentes, args.latencia_ms)
+            from modules import supabase_local
+            print(f"backend: {supabase_local.DESCRIPCION_BACKEND}, latencia {args.latencia_ms:g} ms")
+            correr(args, secretos, usuarios)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    elif args.usuarios:
+        secretos = {
+            "SUPABASE_URL": os.environ["SUPABASE_URL"],
+            "SUPABASE_SERVICE_KEY": os.environ["SUPABASE_SERVICE_KEY"],
+        }
+        print(f"backend: {secretos['SUPABASE_URL']}")
+        correr(args, secretos, leer_usuarios(args.usuarios))
+    else:
+        parser.error("falta el CSV de usuarios (o --local)")
+
+
+def correr(args, secretos: dict, usuarios: list):
+    sesiones = [usuarios[i % len(usuarios)] for i in range(args.sesiones)]
+    repartos = [sesiones[i::args.concurrencia] for i in range(args.concurrencia)]
+
+    print(f"{args.sesiones} sesiones en {args.concurrencia} procesos")
+    inicio = time.perf_counter()
+    reruns, resultados, errores = [], Counter(), []
+    with ProcessPoolExecutor(max_workers=args.concurrencia, mp_context=get_context("spawn")) as pool:
+        futuros = [
+            pool.submit(trabajador, reparto, secretos, args.semilla + 10_000 * i)
+            for i, reparto in enumerate(repartos) if reparto
+        ]
+        for futuro in futuros:
+            r, envios, e = futuro.result()
+            reruns += r
+            resultados += envios
+            errores += e
+    print(f"{time.perf_counter() - inicio:.1f} s en total, {len(errores)} sesión/es con error")
+    print(f"envíos: {resultados['enviada']} registrados, {resultados['sin_cupo']} rechazados por cupo\n")
+    if reruns:
+        reporte(reruns)
+    for error in errores[:10]:
+        print(f"  ERROR {error}")
+
+    retenida, pico = memoria_por_sesion(sesiones[:args.sesiones_memoria], secretos, args.semilla)
+    print(f"\nmemoria por sesión: {retenida:,.0f} KiB retenidos, pico de {pico:,.0f} KiB por recorrido")
+
+
+if __name__ == "__main__":
+    main()
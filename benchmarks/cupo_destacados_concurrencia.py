@@ -0,0 +1,165 @@
+"""Prueba de concurrencia del cupo DESTACADO: N evaluadores envían a la vez
+una calificación DESTACADO en la misma dependencia general y registrar_evaluacion
+debe aceptar exactamente el cupo y rechazar el resto con SQLSTATE EV001.
+
+Solo contra una base local o de prueba con sql/cupo_destacados.sql y
+sql/registrar_evaluacion.sql aplicados (p. ej. `supabase start`, que levanta
+Postgres + PostgREST en http://127.0.0.1:54321). Crea una unidad, agentes y
+evaluaciones "BENCH-..." y los borra al terminar. Sin SUPABASE_URL corre
+contra modules/supabase_local.py, que ejecuta las RPC de a una: ahí solo mide
+el camino HTTP, no el bloqueo. El bloqueo con conexiones simultáneas a un
+PostgreSQL real lo verifica test_envios_simultaneos_no_superan_el_cupo en
+tests/test_rpcs_sql.py.
+
+Uso: [SUPABASE_URL=... SUPABASE_SERVICE_KEY=...] \\
+     python benchmarks/cupo_destacados_concurrencia.py [agentes] [envios] [rondas]
+"""
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules import supabase_local  # noqa: E402
+from modules.repositorio_evaluaciones import SIN_CUPO_DESTACADOS  # noqa: E402
+
+PREFIJO = "BENCH-"
+
+ACEPTADA = "aceptada"
+DUPLICADA = "duplicada"
+SIN_CUPO = "sin_cupo"
+
+
+def cupo_esperado(agentes: int) -> int:
+    # Misma regla que cupo_destacados_de(): 30 % con las mitades hacia arriba
+    return (3 * agentes + 5) // 10
+
+
+def preparar(supabase, agentes: int) -> dict:
+    sufijo = uuid.uuid4().hex[:8]
+    unidad = {
+        "dependencia": f"{PREFIJO}DEP-{sufijo}",
+        "dependencia_general": f"{PREFIJO}DG-{sufijo}",
+        "unidad_evaluadora": f"{PREFIJO}UE-{sufijo}",
+        "unidad_analisis": f"{PREFIJO}UA-{sufijo}",
+    }
+    supabase.table("unidades_evaluacion").insert(unidad).execute()
+    supabase.table("agentes").insert([
+        {
+            "cuil": f"{PREFIJO}{sufijo}-{i:04d}",
+            "apellido_nombre": f"BENCHMARK {i:04d}",
+            "dependencia": unidad["dependencia"],
+            "dependencia_general": unidad["dependencia_general"],
+            "activo": True,
+        }
+        for i in range(agentes)
+    ]).execute()
+    return unidad
+
+
+def limpiar(supabase, unidad: dict):
+    dependencia_general = unidad["dependencia_general"]
+    supabase.table("evaluaciones").delete().eq("dependencia_general", dependencia_general).execute()
+    supabase.table("agentes").delete().eq("dependencia_general", dependencia_general).execute()
+    supabase.table("unidades_evaluacion").delete().eq("dependencia", unidad["dependencia"]).execute()
+    supabase.table("cupo_destacados").delete().eq("dependencia_general", dependencia_general).execute()
+
+
+def envio(supabase, unidad: dict, i: int, clave: str, barrera: threading.Barrier) -> str:
+    datos = {
+        "cuil": f"{PREFIJO}ENVIO-{i:04d}",
+        "apellido_nombre": f"BENCHMARK ENVIO {i:04d}",
+        "dependencia": unidad["dependencia"],
+        "anio_evaluacion": 2024,
+        "evaluador": f"benchmark-{i}",
+        "formulario": 5,
+        "factor_puntaje": {"Factor 1": 4},
+        "factor_posicion": {"Factor 1": 1},
+        "puntaje_total": 32,
+        "puntaje_maximo": 32,
+        "puntaje_relativo": 10,
+        "calificacion": "DESTACADO",
+        "fecha_notificacion": date.today().isoformat(),
+        "residual": False,
+    }
+    barrera.wait()  # todos los envíos salen juntos
+    try:
+        respuesta = supabase.rpc("registrar_evaluacion", {
+            "p_evaluacion": datos,
+            "p_clave_idempotencia": clave,
+        }).execute()
+    except APIError as e:
+        if e.code == SIN_CUPO_DESTACADOS:
+            return SIN_CUPO
+        raise
+    return DUPLICADA if respuesta.data[0]["duplicada"] else ACEPTADA
+
+
+def ronda(supabase, agentes: int, envios: int) -> list:
+    """Una ronda sobre una dependencia general nueva; devuelve los errores."""
+    unidad = preparar(supabase, agentes)
+    try:
+        # Los dos últimos envíos repiten la clave del primero: un reintento
+        # simultáneo nunca debe contarse dos veces ni rechazarse por cupo
+        claves = [str(uuid.uuid4()) for _ in range(envios)]
+        claves[-2:] = [claves[0], claves[0]]
+        barrera = threading.Barrier(envios)
+        with ThreadPoolExecutor(max_workers=envios) as pool:
+            resultados = list(pool.map(
+                lambda i: envio(supabase, unidad, i, claves[i], barrera), range(envios)
+            ))
+
+        cupo = cupo_esperado(agentes)
+        aceptadas = resultados.count(ACEPTADA)
+        fila = supabase.table("cupo_destacados").select("*") \
+            .eq("dependencia_general", unidad["dependencia_general"]).execute().data
+        insertadas = supabase.table("evaluaciones").select("id_evaluacion", count="exact") \
+            .eq("dependencia_general", unidad["dependencia_general"]).execute().count
+
+        errores = []
+        if aceptadas != cupo:
+            errores.append(f"aceptadas {aceptadas}, cupo {cupo}")
+        if insertadas != aceptadas:
+            errores.append(f"insertadas {insertadas}, aceptadas {aceptadas}")
+        if not fila or fila[0]["destacados"] != aceptadas or fila[0]["cupo"] != cupo:
+            errores.append(f"contador {fila}, esperado destacados={aceptadas} cupo={cupo}")
+        misma_clave = [resultados[0]] + resultados[-2:]
+        if ACEPTADA in misma_clave and SIN_CUPO in misma_clave:
+            errores.append(f"reintento rechazado por cupo: {misma_clave}")
+        print(f"  aceptadas={aceptadas} duplicadas={resultados.count(DUPLICADA)} sin_cupo={resultados.count(SIN_CUPO)}")
+        return errores
+    finally:
+        limpiar(supabase, unidad)
+
+
+def main(agentes: int, envios: int, rondas: int):
+    if "SUPABASE_URL" in os.environ:
+        supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+        print(f"backend: {os.environ['SUPABASE_URL']} (sql/*.sql en PostgreSQL)")
+    else:
+        supabase = supabase_local.crear_cliente(sembrar_si_vacia=False)
+        print(f"backend: {supabase_local.DESCRIPCION_BACKEND}")
+    print(f"{agentes} agentes activos (cupo {cupo_esperado(agentes)}), {envios} envíos DESTACADO simultáneos")
+    fallidas = 0
+    for n in range(1, rondas + 1):
+        print(f"ronda {n}:")
+        errores = ronda(supabase, agentes, envios)
+        for error in errores:
+            print(f"  ERROR: {error}")
+        fallidas += bool(errores)
+    print("OK" if not fallidas else f"{fallidas} ronda/s con errores")
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(
+        int(argumentos[0]) if len(argumentos) > 0 else 10,
+        int(argumentos[1]) if len(argumentos) > 1 else 20,
+        int(argumentos[2]) if len(argumentos) > 2 else 5,
+    )
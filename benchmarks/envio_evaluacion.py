@@ -0,0 +1,101 @@
+"""Latencia del envío de una evaluación bajo carga: camino anterior (búsqueda de
+unidad + insert + update del agente, con la espera fija de 2 s) contra la
+función registrar_evaluacion.
+
+Solo contra una base de prueba. Crea evaluaciones con CUIL "BENCH-..." y las
+borra al terminar.
+
+Uso: SUPABASE_URL=... SUPABASE_SERVICE_KEY=... \\
+     python benchmarks/envio_evaluacion.py [envios] [concurrencia] [dependencia]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from supabase import create_client
+
+PREFIJO_CUIL = "BENCH-"
+ESPERA_ANTERIOR_SEG = 2
+
+
+def datos_evaluacion(cuil: str, dependencia: str) -> dict:
+    return {
+        "cuil": cuil,
+        "apellido_nombre": f"BENCHMARK {cuil}",
+        "nivel": "C",
+        "grado": 1,
+        "dependencia": dependencia,
+        "anio_evaluacion": 2024,
+        "evaluador": "benchmark",
+        "formulario": 5,
+        "factor_puntaje": {"Factor 1": 4},
+        "factor_posicion": {"Factor 1": 1},
+        "puntaje_total": 20,
+        "puntaje_maximo": 32,
+        "puntaje_relativo": 6.25,
+        "calificacion": "BUENO",
+        "fecha_notificacion": date.today().isoformat(),
+        "residual": False,
+    }
+
+
+def envio_anterior(supabase, cuil: str, dependencia: str, esperar: bool):
+    unidad = supabase.table("unidades_evaluacion").select("*").eq("dependencia", dependencia).execute().data
+    unidad = unidad[0] if unidad else {}
+    datos = datos_evaluacion(cuil, dependencia)
+    datos.update({k: unidad.get(k) for k in ("dependencia_general", "unidad_evaluadora", "unidad_analisis")})
+    supabase.table("evaluaciones").insert(datos).execute()
+    supabase.table("agentes").update({"evaluado_2024": True}).eq("cuil", cuil).execute()
+    if esperar:
+        time.sleep(ESPERA_ANTERIOR_SEG)
+
+
+def envio_rpc(supabase, cuil: str, dependencia: str, esperar: bool):
+    supabase.rpc("registrar_evaluacion", {
+        "p_evaluacion": datos_evaluacion(cuil, dependencia),
+        "p_clave_idempotencia": str(uuid.uuid4()),
+    }).execute()
+
+
+def medir(supabase, envio, envios: int, concurrencia: int, dependencia: str, esperar: bool) -> list:
+    def uno(i):
+        inicio = time.perf_counter()
+        envio(supabase, f"{PREFIJO_CUIL}{uuid.uuid4().hex[:12]}", dependencia, esperar)
+        return time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        return list(pool.map(uno, range(envios)))
+
+
+def percentil(valores, p):
+    return statistics.quantiles(valores, n=100)[p - 1] if len(valores) > 1 else valores[0]
+
+
+def main(envios: int, concurrencia: int, dependencia: str):
+    supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+    casos = [
+        ("anterior (con espera)", envio_anterior, True),
+        ("anterior (sin espera)", envio_anterior, False),
+        ("registrar_evaluacion", envio_rpc, False),
+    ]
+    try:
+        print(f"{envios} envíos, {concurrencia} en paralelo")
+        print(f"{'camino':<24} {'p50 (s)':>8} {'p95 (s)':>8}")
+        for nombre, envio, esperar in casos:
+            tiempos = medir(supabase, envio, envios, concurrencia, dependencia, esperar)
+            print(f"{nombre:<24} {percentil(tiempos, 50):>8.3f} {percentil(tiempos, 95):>8.3f}")
+    finally:
+        supabase.table("evaluaciones").delete().like("cuil", f"{PREFIJO_CUIL}%").execute()
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(
+        int(argumentos[0]) if len(argumentos) > 0 else 50,
+        int(argumentos[1]) if len(argumentos) > 1 else 10,
+        argumentos[2] if len(argumentos) > 2 else "",
+    )
@@ -0,0 +1,77 @@
+"""Memoria pico y tiempo de exportar un listado: pd.ExcelWriter + BytesIO
+(camino anterior) contra modules/exportacion.py (Excel en constant_memory,
+CSV y Parquet).
+
+La memoria pico se mide con tracemalloc (asignaciones de Python y NumPy,
+incluido el archivo resultante), sin contar el DataFrame de entrada.
+
+Uso: python benchmarks/exportacion.py [filas]   (por defecto 200000)
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules import exportacion  # noqa: E402
+
+
+def generar(filas: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "CUIL": [f"20{i:09d}" for i in range(filas)],
+        "AGENTE": [f"APELLIDO {i}, NOMBRE" for i in rng.integers(0, filas, filas)],
+        "FORMULARIO": rng.choice(["1", "2", "3", "4", "5", "6"], filas),
+        "FACTOR/PUNTAJE": "Factor 1. (4), Factor 2. (3), Factor 3. (2), Factor 4. (4)",
+        "CALIFICACIÓN": rng.choice(["DESTACADO", "BUENO", "REGULAR"], filas),
+        "PUNTAJE TOTAL": rng.integers(10, 56, filas),
+        "PUNTAJE RELATIVO": np.round(rng.uniform(2, 10, filas), 2),
+        "DEPENDENCIA GENERAL": rng.choice([f"DG {i}" for i in range(40)], filas),
+    })
+
+
+def anterior(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Resumen")
+    return buffer.getvalue()
+
+
+def medir(funcion, *args):
+    """Tiempo (sin tracemalloc, que lo distorsiona) y memoria pico en otra pasada."""
+    inicio = time.perf_counter()
+    datos = funcion(*args)
+    duracion = time.perf_counter() - inicio
+    tamanio = datos.getbuffer().nbytes if isinstance(datos, io.BytesIO) else len(datos)
+    del datos
+
+    tracemalloc.start()
+    funcion(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, pico, tamanio
+
+
+def main(filas: int):
+    df = generar(filas)
+    casos = [
+        ("ExcelWriter (anterior)", anterior, df),
+        ("xlsx constant_memory", exportacion.exportar, df, "xlsx"),
+        ("csv", exportacion.exportar, df, "csv"),
+    ]
+    if exportacion.PARQUET_DISPONIBLE:
+        casos.append(("parquet", exportacion.exportar, df, "parquet"))
+
+    print(f"{filas} filas")
+    print(f"{'camino':<24} {'tiempo (s)':>10} {'pico (MB)':>10} {'archivo (MB)':>13}")
+    for nombre, funcion, *args in casos:
+        duracion, pico, tamanio = medir(funcion, *args)
+        print(f"{nombre:<24} {duracion:>10.2f} {pico / 2**20:>10.1f} {tamanio / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,131 @@
+"""Benchmark de generación de informes DOCX: armado celda por celda con
+python-docx y guardado en archivo temporal (camino anterior) contra el motor
+de modules/informes_docx.py.
+
+Uso: python benchmarks/informes_docx.py [filas ...]   (por defecto 50 500 5000)
+"""
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Cm, Pt, RGBColor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules import informes_docx  # noqa: E402
+from modules.capacitacion_utils import generar_informe_evaluaciones_docx  # noqa: E402
+
+
+def generar_agentes(filas: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "cuil": [f"20{i:09d}" for i in range(filas)],
+        "apellido_nombre": [f"APELLIDO {i:05d}, NOMBRE" for i in rng.permutation(filas)],
+        "nivel": rng.choice(list("ABCDE"), filas),
+        "grado": rng.integers(0, 10, filas),
+        "agrupamiento": rng.choice(["GRAL", "PROF"], filas),
+        "tramo": rng.choice(["GENERAL", "INTERMEDIO", "AVANZADO"], filas),
+        "ingresante": rng.random(filas) < 0.1,
+    })
+
+
+def generar_evaluaciones(agentes: pd.DataFrame, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    filas = len(agentes)
+    puntaje = rng.integers(10, 40, filas)
+    return agentes[["cuil", "apellido_nombre"]].assign(
+        formulario=rng.choice(["1", "2", "3", "4", "5", "6"], filas).astype(str),
+        calificacion=rng.choice(["DESTACADO", "BUENO", "REGULAR", "DEFICIENTE"], filas),
+        puntaje_total=puntaje,
+        puntaje_relativo=np.round(puntaje / 4, 2),
+        nivel=rng.choice([2, 3, 4, 5, 6], filas),
+        residual=False,
+        bonificacion_elegible=rng.random(filas) < 0.1,
+    )
+
+
+# ---- Camino anterior ----
+
+def _estilo_celda(cell, bold=True, bg_color=None, font_color="000000"):
+    para = cell.paragraphs[0]
+    run = para.runs[0] if para.runs else para.add_run(" ")
+    run.text = run.text if run.text.strip() else " "
+    run.font.name = "Calibri"
+    run.font.size = Pt(10)
+    run.font.bold = bold
+    run.font.color.rgb = RGBColor.from_string(font_color.upper())
+    if bg_color:
+        shd = OxmlElement("w:shd")
+        shd.set(qn("w:fill"), bg_color)
+        cell._tc.get_or_add_tcPr().append(shd)
+    para.alignment = 1
+
+
+def agentes_anterior(df_agentes: pd.DataFrame) -> bytes:
+    doc = Document()
+    for lado in ("top_margin", "bottom_margin", "left_margin", "right_margin"):
+        setattr(doc.sections[0], lado, Cm(2))
+    tabla = doc.add_table(rows=1, cols=5)
+    tabla.style = "Table Grid"
+    for i, texto in enumerate(["APELLIDO Y NOMBRE", "NIVEL/GRADO", "AGRUPAMIENTO", "TRAMO", "INGRESANTE"]):
+        tabla.cell(0, i).text = texto
+        _estilo_celda(tabla.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
+    for _, row in df_agentes.sort_values("apellido_nombre").iterrows():
+        fila = tabla.add_row().cells
+        fila[0].text = row.get("apellido_nombre", "")
+        fila[1].text = f"{row.get('nivel', '')}-{row.get('grado', '')}"
+        fila[2].text = "Profesional" if row.get("agrupamiento") == "PROF" else "General"
+        fila[3].text = row.get("tramo", "")
+        fila[4].text = "Sí" if row.get("ingresante") is True else ""
+        for celda in fila:
+            _estilo_celda(celda, bold=False)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
+        doc.save(tmp.name)
+    with open(tmp.name, "rb") as f:
+        datos = f.read()
+    os.unlink(tmp.name)
+    return datos
+
+
+# ---- Medición ----
+
+def medir(funcion, *args, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def verificar(datos: bytes, filas_esperadas: int):
+    """El documento abre y la tabla tiene encabezado + una fila por agente."""
+    doc = Document(BytesIO(datos))
+    filas = len(doc.tables[-1].rows)
+    assert filas == filas_esperadas + 1, (filas, filas_esperadas)
+
+
+def main(tamanios):
+    print(f"{'filas':>6} {'agentes anterior':>17} {'agentes motor':>14} {'unidad motor':>13} {'capacitación':>13}")
+    for filas in tamanios:
+        agentes = generar_agentes(filas)
+        evaluaciones = generar_evaluaciones(agentes)
+        t_anterior, anterior = medir(agentes_anterior, agentes)
+        t_motor, motor = medir(informes_docx.informe_agentes_docx, agentes, "BENCHMARK")
+        verificar(anterior, filas)
+        verificar(motor, filas)
+        t_unidad, _ = medir(informes_docx.informe_unidad_docx, agentes, evaluaciones, "BENCHMARK")
+        t_capacitacion, _ = medir(
+            lambda: generar_informe_evaluaciones_docx(evaluaciones.copy(), "BENCHMARK", filas, None, BytesIO())
+        )
+        print(f"{filas:>6} {t_anterior:>16.3f}s {t_motor:>13.3f}s {t_unidad:>12.3f}s {t_capacitacion:>12.3f}s")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50, 500, 5000])
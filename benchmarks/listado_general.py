@@ -0,0 +1,108 @@
+"""Benchmark del armado del Listado General (tabla de pantalla y planilla
+Excel): recorrido fila por fila anterior contra construir_listados.
+
+Uso: python benchmarks/listado_general.py [filas ...]   (por defecto 1000 10000 100000)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules.capacitacion_listados import construir_listados  # noqa: E402
+
+# Factores por formulario, en el orden en que jsonb devuelve las claves
+FACTORES = {
+    1: ["Factor 1", "Factor 2", "Factor 3", "Factor 4", "Factor 5", "Factor 6", "Factor 7"],
+    5: ["Factor 1", "Factor 2", "Factor 3", "Factor 4", "Factor 4.1", "Factor 4.2"],
+    6: ["Factor 1", "Factor 2", "Factor 3"],
+}
+
+
+def generar(filas: int, semilla: int = 0):
+    rng = np.random.default_rng(semilla)
+    formularios = rng.choice(list(FACTORES), filas)
+    segundos = rng.integers(0, 90 * 24 * 3600, filas)
+    fechas = (pd.Timestamp("2025-03-01", tz="UTC") + pd.to_timedelta(segundos, unit="s"))
+    df = pd.DataFrame({
+        "cuil": [f"20{i:09d}" for i in rng.integers(0, filas, filas)],
+        "formulario": formularios.astype(str),
+        "calificacion": rng.choice(["DESTACADO", "BUENO", "REGULAR"], filas),
+        "puntaje_total": rng.integers(10, 50, filas),
+        "puntaje_maximo": 56,
+        "puntaje_relativo": np.round(rng.uniform(2, 10, filas), 2),
+        "dependencia": rng.choice([f"DEP {i}" for i in range(300)], filas),
+        "dependencia_general": rng.choice([f"DG {i}" for i in range(40)], filas),
+        "fecha_evaluacion": fechas.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00"),
+        "factor_puntaje": [{f: int(rng.integers(1, 9)) for f in FACTORES[t]} for t in formularios],
+        "factor_posicion": [{f: int(rng.integers(1, 5)) for f in FACTORES[t]} for t in formularios],
+        "anulada": False,
+    })
+    agentes = [{"cuil": f"20{i:09d}", "apellido_nombre": f"AGENTE {i}"} for i in range(int(filas * 0.95))]
+    return df, agentes
+
+
+def anterior(df_filtrada, agentes):
+    """Recorrido anterior: una conversión de fecha y dos joins de texto por fila."""
+    mapa_agentes = {a["cuil"]: a["apellido_nombre"] for a in agentes}
+    filas_tabla, filas_excel = [], []
+    for e in df_filtrada.to_dict(orient="records"):
+        agente = mapa_agentes.get(e.get("cuil", ""), "Desconocido")
+        fecha_eval = e.get("fecha_evaluacion")
+        try:
+            fecha_str = pd.to_datetime(fecha_eval, utc=True).tz_convert(
+                "America/Argentina/Buenos_Aires").strftime("%d/%m/%Y %H:%M") if fecha_eval else ""
+        except Exception:
+            fecha_str = ""
+        filas_tabla.append({
+            "DEPENDENCIA GENERAL": e.get("dependencia_general", ""), "AGENTE": agente,
+            "FORMULARIO": e.get("formulario", ""), "CALIFICACIÓN": e.get("calificacion", ""), "FECHA": fecha_str,
+        })
+        filas_excel.append({
+            "CUIL": e.get("cuil", ""), "AGENTE": agente, "FORMULARIO": e.get("formulario", ""),
+            "FACTOR/PUNTAJE": ", ".join(f"{k} ({v})" for k, v in e.get("factor_puntaje", {}).items()),
+            "FACTOR/POSICION": ", ".join(f"{k} ({v})" for k, v in e.get("factor_posicion", {}).items()),
+            "CALIFICACIÓN": e.get("calificacion", ""), "PUNTAJE TOTAL": e.get("puntaje_total", ""),
+            "PUNTAJE MÁXIMO": e.get("puntaje_maximo", ""), "PUNTAJE RELATIVO": e.get("puntaje_relativo", ""),
+            "DEPENDENCIA": e.get("dependencia", ""), "DEPENDENCIA GENERAL": e.get("dependencia_general", ""),
+        })
+    df_tabla = pd.DataFrame(filas_tabla)
+    df_excel = pd.DataFrame(filas_excel).sort_values(["DEPENDENCIA GENERAL", "FORMULARIO", "AGENTE"])
+    return df_tabla, df_excel
+
+
+def medir(funcion, *args, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def verificar(resultado_anterior, resultado_nuevo):
+    tabla_a, excel_a = resultado_anterior
+    tabla_n, excel_n = resultado_nuevo
+    pd.testing.assert_frame_equal(excel_a.reset_index(drop=True), excel_n.reset_index(drop=True), check_dtype=False)
+    # La tabla anterior se ordenaba por el texto "dd/mm/aaaa"; se comparan los mismos registros
+    clave = list(tabla_a.columns)
+    pd.testing.assert_frame_equal(
+        tabla_a.sort_values(clave).reset_index(drop=True), tabla_n.sort_values(clave).reset_index(drop=True)
+    )
+
+
+def main(tamanios):
+    print(f"{'filas':>7} {'anterior (s)':>13} {'columnar (s)':>13} {'x':>6}")
+    for filas in tamanios:
+        df, agentes = generar(filas)
+        repeticiones = 1 if filas >= 50000 else 3
+        t_anterior, r_anterior = medir(anterior, df, agentes, repeticiones=repeticiones)
+        t_nuevo, r_nuevo = medir(construir_listados, df, agentes, repeticiones=repeticiones)
+        verificar(r_anterior, r_nuevo)
+        print(f"{filas:>7} {t_anterior:>13.3f} {t_nuevo:>13.3f} {t_anterior / t_nuevo:>6.1f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
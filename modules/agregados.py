@@ -0,0 +1,34 @@
+from modules import repositorio
+
+# Cliente de los agregados calculados en la base (ver sql/agregados.sql).
+# Los resultados se cachean como cualquier lectura y se invalidan cuando se
+# escriben las tablas de origen.
+
+TAGS_AGREGADOS = ("agentes", "evaluaciones")
+
+
+def _rpc(supabase, funcion: str, parametros: dict) -> list:
+    clave = ("rpc", funcion, tuple(sorted(parametros.items())))
+
+    def cargar():
+        return supabase.rpc(funcion, parametros).execute().data or []
+
+    return repositorio.consultar(clave, TAGS_AGREGADOS, cargar)
+
+
+def resumen_avance(supabase, anio: int = 2024) -> dict:
+    """Total de agentes, evaluados y evaluaciones por calificación del año."""
+    filas = _rpc(supabase, "resumen_avance_evaluacion", {"p_anio": anio})
+    if not filas:
+        return {"total_agentes": 0, "evaluados": 0, "destacado": 0, "bueno": 0, "regular": 0, "deficiente": 0}
+    return filas[0]
+
+
+def avance_por_dependencia_general(supabase, anio: int = 2024) -> list:
+    """Filas (dependencia_general, agentes_total, evaluados)."""
+    return _rpc(supabase, "avance_por_dependencia_general", {"p_anio": anio})
+
+
+def cupo_destacados(supabase) -> list:
+    """Filas (dependencia_general, total_agentes, cupo_destacados, evaluados_con_destacado)."""
+    return _rpc(supabase, "cupo_destacados_por_dependencia", {})
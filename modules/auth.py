@@ -3,18 +3,34 @@
 import streamlit as st
 from supabase import create_client
 import streamlit_authenticator as stauth
-import json
 import datetime
 import bcrypt
 import re
+import threading
+from modules import sesion, trazas
 
 TIEMPO_MAX_SESION_MIN = 10  # Logout automático tras 10 minutos
+TTL_DIRECTORIO_SEG = 300  # Vigencia del directorio de usuarios en caché
+
+# ---- Estado del directorio de usuarios (compartido por todo el proceso) ----
+_lock_directorio = threading.Lock()
+_estado_directorio = {"version": 0, "aciertos": 0, "fallos": 0}
 
 @st.cache_resource
 def init_connection():
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_SERVICE_KEY"]
-    return create_client(url, key)
+    # [supabase_local] en secrets: backend SQLite sin red para pruebas y
+    # benchmarks (ver modules/supabase_local.py); sus claves son los
+    # parámetros de supabase_local.crear_cliente
+    local = st.secrets.get("supabase_local")
+    if local is not None:
+        from modules import supabase_local
+        cliente = supabase_local.crear_cliente(**local)
+    else:
+        url = st.secrets["SUPABASE_URL"]
+        key = st.secrets["SUPABASE_SERVICE_KEY"]
+        cliente = create_client(url, key)
+    # TRAZAS_JSONL en secrets: archivo donde agregar cada llamada al backend
+    return trazas.instalar(cliente, st.secrets.get("TRAZAS_JSONL"))
 
 def hashear_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
@@ -22,6 +38,60 @@ def hashear_password(password: str) -> str:
 def contraseña_valida(pwd: str) -> bool:
     return len(pwd) >= 6 and re.search(r"\d", pwd) is not None
 
+@st.cache_data(ttl=TTL_DIRECTORIO_SEG, show_spinner=False)
+def _consultar_directorio(_supabase, version):
+    """Lee los usuarios activos y arma el diccionario de credenciales.
+
+    Solo se ejecuta ante un fallo de caché; `version` forma parte de la clave
+    para que una invalidación descarte de inmediato la copia vigente.
+    """
+    with _lock_directorio:
+        _estado_directorio["fallos"] += 1
+
+    usuarios_result = _supabase.table("usuarios")\
+        .select("usuario, password, apellido_nombre, rol, activo")\
+        .eq("activo", True).execute()
+
+    usernames = {}
+    for u in usuarios_result.data:
+        usuario = u.get("usuario", "").strip().lower()
+        password = u.get("password", "")
+        nombre = u.get("apellido_nombre", "")
+        if not usuario or not password or not nombre:
+            continue
+        if not password.startswith("$2b$"):
+            continue
+        usernames[usuario] = {
+            "name": nombre,
+            "password": password,
+            "email": f"{usuario}@indec.gob.ar"
+        }
+    return usernames
+
+def cargar_directorio_usuarios(supabase) -> dict:
+    """Devuelve las credenciales de los usuarios activos desde la caché del proceso."""
+    with _lock_directorio:
+        version = _estado_directorio["version"]
+        fallos_previos = _estado_directorio["fallos"]
+
+    usernames = _consultar_directorio(supabase, version)
+
+    with _lock_directorio:
+        if _estado_directorio["fallos"] == fallos_previos:
+            _estado_directorio["aciertos"] += 1
+    return usernames
+
+def invalidar_directorio_usuarios():
+    """Descarta el directorio en caché. Llamar tras cualquier escritura en `usuarios`."""
+    with _lock_directorio:
+        _estado_directorio["version"] += 1
+    _consultar_directorio.clear()
+
+def metricas_directorio_usuarios() -> dict:
+    """Contadores de aciertos/fallos del directorio de usuarios."""
+    with _lock_directorio:
+        return dict(_estado_directorio)
+
 def cargar_usuarios_y_autenticar():
     supabase = init_connection()
 
@@ -36,13 +106,9 @@ def cargar_usuarios_y_autenticar():
             st.stop()
     st.session_state["last_activity"] = ahora
 
-    # ---- Cargar usuarios activos ----
-    usuarios_result = supabase.table("usuarios")\
-        .select("usuario, password, apellido_nombre, rol, activo")\
-        .eq("activo", True).execute()
-
+    # ---- Cargar usuarios activos (desde caché) ----
     credentials = {
-        "usernames": {},
+        "usernames": cargar_directorio_usuarios(supabase),
         "cookie": {
             "expiry_days": 0.0014,
             "key": "clave_segura_super_oculta",
@@ -50,20 +116,6 @@ def cargar_usuarios_y_autenticar():
         }
     }
 
-    for u in usuarios_result.data:
-        usuario = u.get("usuario", "").strip().lower()
-        password = u.get("password", "")
-        nombre = u.get("apellido_nombre", "")
-        if not usuario or not password or not nombre:
-            continue
-        if not password.startswith("$2b$"):
-            continue
-        credentials["usernames"][usuario] = {
-            "name": nombre,
-            "password": password,
-            "email": f"{usuario}@indec.gob.ar"
-        }
-
     if not credentials["usernames"]:
         st.error("❌ No se encontraron usuarios válidos.")
         st.stop()
@@ -84,33 +136,10 @@ def cargar_usuarios_y_autenticar():
     # ---- Post-login ----
     cambiar_password = False
     if authentication_status:
-        usuario_data = supabase.table("usuarios")\
-            .select("dependencia, dependencia_general, apellido_nombre, rol, cambiar_password")\
-            .eq("usuario", username).maybe_single().execute().data
-
-        if not usuario_data:
-            st.error("❌ No se pudieron cargar los datos del usuario.")
-            st.stop()
-
-        if usuario_data.get("cambiar_password", False):
-            cambiar_password = True
-
-        # Guardar datos en sesión solo si no requiere cambio de clave
-        if not cambiar_password:
-            st.session_state["usuario"] = username
-            st.session_state["nombre_completo"] = usuario_data.get("apellido_nombre", "")
-            st.session_state["dependencia"] = usuario_data.get("dependencia", "")
-
-            rol_raw = usuario_data.get("rol", "")
-            try:
-                st.session_state["rol"] = json.loads(rol_raw) if isinstance(rol_raw, str) else rol_raw
-            except Exception:
-                st.session_state["rol"] = {}
-
-            if any(st.session_state["rol"].get(r) for r in ["rrhh", "coordinador", "evaluador_general"]):
-                st.session_state["dependencia_general"] = usuario_data.get("dependencia_general") or ""
-            else:
-                st.session_state["dependencia_general"] = ""
+        perfil = sesion.iniciar_sesion(supabase, username)
+        cambiar_password = perfil.cambiar_password
+    else:
+        sesion.refrescar_perfil()
 
     return name, authentication_status, username, authenticator, supabase, cambiar_password
 
@@ -2,8 +2,48 @@ import streamlit as st
 import pandas as pd
 import os
 import io
-from modules.capacitacion_utils import generar_informe_evaluaciones_docx
-from io import BytesIO
+from modules.capacitacion_utils import informe_direccion_docx
+from modules import informes_docx, informes_lote, repositorio_configuracion, repositorio_evaluaciones, sesion
+from modules.capacitacion_escritura import escribir_analisis_bdd, fijar_desempate, CLAVE_ANALISIS_REALIZADO
+from modules.capacitacion_bdd import GRUPO_RESIDUAL, calcular_bdd
+
+PARAMETRO_TRABAJO_INFORMES = "trabajo_informes"
+
+
+# ---- Informes de todas las dependencias (en segundo plano) ----
+
+@st.fragment(run_every=2)
+def _progreso_informes_lote(id_trabajo):
+    trabajo = informes_lote.consultar(id_trabajo)
+    if trabajo is None or trabajo.estado == informes_lote.TERMINADO:
+        st.rerun()
+    st.progress(trabajo.progreso, text=f"⏳ Generando informes: {trabajo.completados} de {trabajo.total} dependencias")
+
+
+def _seguimiento_informes_lote():
+    """Progreso o descarga del trabajo cuyo id está en la URL."""
+    id_trabajo = st.query_params.get(PARAMETRO_TRABAJO_INFORMES)
+    if not id_trabajo:
+        return
+    trabajo = informes_lote.consultar(id_trabajo)
+    if trabajo is None:
+        st.info("ℹ️ El trabajo de informes ya no está disponible. Generalo nuevamente.")
+        del st.query_params[PARAMETRO_TRABAJO_INFORMES]
+        return
+    if trabajo.estado == informes_lote.EN_CURSO:
+        _progreso_informes_lote(id_trabajo)
+        return
+
+    if trabajo.errores:
+        st.warning(f"⚠️ {len(trabajo.errores)} informes no se pudieron generar (ver ERRORES.txt en el ZIP).")
+    st.download_button(
+        label=f"📦 Descargar informes de {trabajo.total - len(trabajo.errores)} dependencias (ZIP)",
+        data=trabajo.zip,
+        file_name="INFORMES_EVALUACIÓN.zip",
+        mime="application/zip",
+        key=f"descargar_lote_{id_trabajo}",
+        type="primary",
+    )
 
 
 def mostrar_analisis(df_evals, agentes, supabase):
@@ -11,7 +51,7 @@ def mostrar_analisis(df_evals, agentes, supabase):
     #st.markdown("<h2 style='font-size:22px;'>📊 Análisis de Evaluaciones por Dependencia General</h2>", unsafe_allow_html=True)
 
     # Obtener datos desde Supabase
-    evaluaciones_data = supabase.table("evaluaciones").select("*").execute().data
+    evaluaciones_data = repositorio_evaluaciones.listar(supabase)
     df = pd.DataFrame(evaluaciones_data)
     df = df[df["anulada"] != True]  # Aplicar el mismo filtro que en LISTADOS
 
@@ -32,104 +72,52 @@ def mostrar_analisis(df_evals, agentes, supabase):
         dependencias = df["dependencia_general"].dropna().unique()
         
         st.write(f"🏢 Analizando {len(dependencias)} dependencias...")
-        
-        # Analizar cada dependencia
-        for dep in dependencias:
-            df_dep = df[df["dependencia_general"] == dep].copy()
-            
-            # Nivel 1: siempre residual
-            df_nivel1 = df_dep[df_dep["nivel"] == 1]
-            if not df_nivel1.empty:
-                df.loc[df_nivel1.index, "residual"] = True
-            
-            # Niveles Medios (2, 3, 4)
-            df_medios = df_dep[df_dep["nivel"].isin([2, 3, 4])]
-            if not df_medios.empty and len(df_medios) < 6:
-                df.loc[df_medios.index, "residual"] = True
-            
-            # Niveles Operativos (5, 6)
-            df_operativos = df_dep[df_dep["nivel"].isin([5, 6])]
-            if not df_operativos.empty and len(df_operativos) < 6:
-                df.loc[df_operativos.index, "residual"] = True
-        
-        # Actualizar en Supabase TODOS los cambios de residual
-        cambios = df[["id_evaluacion", "residual"]]
-        for _, row in cambios.iterrows():
-            supabase.table("evaluaciones").update({
-                "residual": row["residual"]
-            }).eq("id_evaluacion", row["id_evaluacion"]).execute()
-        
-        # Resetear bonificaciones solo para las dependencias analizadas
-        for dep in dependencias:
-            supabase.table("evaluaciones").update({
-                "bonificacion_elegible": False
-            }).eq("dependencia_general", dep).execute()
-        
-        # Analizar BDD para cada dependencia
-        for dep in dependencias:
-            df_dep = df[df["dependencia_general"] == dep].copy()
-            
-            # Filtrar elegibles según manual BDD
-            df_elegibles = df_dep[
-                (df_dep["calificacion"] == "DESTACADO") &  # Solo calificación Destacado
-                (df_dep["residual"] == False) &  # Excluir residuales
-                (df_dep["anulada"] != True)  # Excluir anuladas
-            ].copy()
-            
-            if not df_elegibles.empty:
-                # Calcular cupo de bonificaciones (10% del total evaluado)
-                total_evaluados = len(df_dep[df_dep["anulada"] != True])
-                cupo_bonificaciones = max(1, int(total_evaluados * 0.1))
-                
-                # Ordenar por puntaje relativo descendente
-                df_elegibles = df_elegibles.sort_values("puntaje_relativo", ascending=False)
-                
-                # Marcar quiénes reciben bonificación
-                elegibles_ids = df_elegibles.iloc[:cupo_bonificaciones]["id_evaluacion"].tolist()
-                
-                # Actualizar en base de datos
-                for id_eval in elegibles_ids:
-                    supabase.table("evaluaciones").update({
-                        "bonificacion_elegible": True
-                    }).eq("id_evaluacion", id_eval).execute()
-        
-        # Analizar BDD para Unidad Residual
-        df_residuales_bdd = df[
-            (df["residual"] == True) &  # Solo residuales
-            (df["calificacion"] == "DESTACADO") &  # Solo calificación Destacado
-            (df["anulada"] != True)  # Excluir anuladas
-        ].copy()
-        
-        if not df_residuales_bdd.empty:
-            # Calcular cupo según regla residual: una bonificación por cada fracción superior a 5
-            total_residuales = len(df_residuales_bdd)
-            cupo_residual = max(1, total_residuales // 5)
-            
-            # Ordenar por puntaje relativo descendente
-            df_residuales_bdd = df_residuales_bdd.sort_values("puntaje_relativo", ascending=False)
-            
-            # Marcar quiénes reciben bonificación residual
-            residuales_ids = df_residuales_bdd.iloc[:cupo_residual]["id_evaluacion"].tolist()
-            
-            # Actualizar en base de datos
-            for id_eval in residuales_ids:
-                supabase.table("evaluaciones").update({
-                    "bonificacion_elegible": True
-                }).eq("id_evaluacion", id_eval).execute()
+
+        # Residuales y BDD de todas las dependencias (y de la Unidad Residual) en una pasada
+        analisis = calcular_bdd(df)
+        df["residual"] = analisis.marcas["residual"]
+
+        # Las evaluaciones sin dependencia general conservan su bonificación actual
+        df["bonificacion_elegible"] = analisis.marcas["bonificacion_elegible"].where(
+            df["dependencia_general"].notna(), df["bonificacion_elegible"]
+        )
+        # Los desempates hechos a mano que siguen en el corte se conservan
+        if "bonificacion_manual" in analisis.marcas.columns:
+            df["bonificacion_manual"] = analisis.marcas["bonificacion_manual"].where(
+                df["dependencia_general"].notna(), df["bonificacion_manual"]
+            )
+
+        # Escribir residuales y bonificaciones en una sola transacción
+        resultado = escribir_analisis_bdd(supabase, df, dependencias)
+        # Desde ahora las altas y anulaciones lo mantienen al día por dependencia
+        repositorio_configuracion.guardar(supabase, CLAVE_ANALISIS_REALIZADO, True, sesion.perfil_actual().usuario)
+        st.caption(
+            f"💾 {resultado['filas_actualizadas'] + resultado['bonificaciones_reseteadas']} filas actualizadas "
+            f"({resultado['filas_enviadas']} analizadas) en {resultado['duracion_seg']:.2f} s"
+        )
         
         st.success("✅ Análisis completo realizado: Residuales y BDD procesados en todas las dependencias.")
-        
-        # Marcar que el análisis fue realizado usando session_state
-        st.session_state.analisis_realizado = True
 
-    # Mostrar contenido solo si se realizó el análisis
-    if st.session_state.get("analisis_realizado", False):
+    # El trabajo de informes sigue visible aunque se recargue la página (id en la URL)
+    _seguimiento_informes_lote()
+
+    # Mostrar contenido solo si se realizó el análisis (marca guardada en la
+    # base: vale para todas las sesiones, no solo para la que lo corrió)
+    if repositorio_configuracion.valor(supabase, CLAVE_ANALISIS_REALIZADO, False):
         # Actualizar df con los datos más recientes de Supabase después del análisis
-        evaluaciones_data_actualizada = supabase.table("evaluaciones").select("*").execute().data
+        evaluaciones_data_actualizada = repositorio_evaluaciones.listar(supabase)
         df = pd.DataFrame(evaluaciones_data_actualizada)
         df = df[df["anulada"] != True]
         df = df[df["formulario"].notnull()]
         df["nivel"] = df["formulario"].astype(int)
+        # Cupos, ganadores y empates de todas las secciones salen del mismo
+        # motor que escribió las marcas (respeta los desempates hechos a mano)
+        analisis = calcular_bdd(df)
+        cupos = analisis.cupos.set_index("dependencia_general")
+
+        if st.button("📦 Generar informes de todas las dependencias"):
+            st.query_params[PARAMETRO_TRABAJO_INFORMES] = informes_lote.iniciar(df[df["dependencia_general"].notna()])
+            st.rerun()
         
         st.markdown("---")
 
@@ -141,7 +129,7 @@ def mostrar_analisis(df_evals, agentes, supabase):
 
         seleccion_dir = st.selectbox("📍 Seleccioná Dirección para ver detalles", opciones)
 
-        if seleccion_dir != "- Seleccionar Dirección -":
+        if seleccion_dir != opciones[0]:
             df_filtrada = df[df["dependencia_general"] == seleccion_dir].copy()
             st.write(f"👥 Evaluaciones encontradas en {seleccion_dir}: {len(df_filtrada)}")
 
@@ -181,44 +169,13 @@ def mostrar_analisis(df_evals, agentes, supabase):
 
            # st.markdown("#### 📝 Generar Informe Evaluación")
             
-            # Preparar total y resumen de niveles
-            total = len(df_filtrada)
-            df_filtrada["nivel"] = df_filtrada["formulario"].astype(int)
-            
-            resumen_niveles = (
-                df_filtrada.groupby("nivel")
-                .agg(Cantidad_de_agentes=("cuil", "count"),
-                     Bonif_otorgadas=("calificacion", lambda x: (pd.Series(x).str.upper() == "DESTACADO").sum()))
-                .reindex([1, 2, 3, 4, 5, 6], fill_value=0)
-            )
-            
-            resumen_niveles["Bonif. correspondientes"] = (resumen_niveles["Cantidad_de_agentes"] * 0.3).round().astype(int)
-            resumen_niveles["Diferencia"] = (
-                resumen_niveles["Bonif_otorgadas"] - resumen_niveles["Bonif. correspondientes"]
-            )
-            resumen_niveles["Diferencia"] = resumen_niveles["Diferencia"].apply(
-                lambda x: f"{x:+d}" if x != 0 else "0"
-            )
-            
-            df_resumen = pd.DataFrame({
-                "Cantidad de agentes": resumen_niveles["Cantidad_de_agentes"],
-                "Bonif. otorgadas": resumen_niveles["Bonif_otorgadas"],
-                "Bonif. correspondientes": resumen_niveles["Bonif. correspondientes"],
-                "Diferencia": resumen_niveles["Diferencia"]
-            }).T
-            
-            # Generar informe directamente en memoria
-            buffer = BytesIO()
-            generar_informe_evaluaciones_docx(df_filtrada, seleccion_dir, total, df_resumen, buffer)
-            buffer.seek(0)
-            
-            # Mostrar botón de descarga directamente (sin otro paso)
-            st.download_button(
-                label=f"📥 Descargar INFORME EVALUACIÓN {seleccion_dir}",
-                data=buffer,
-                file_name=f"INFORME_EVALUACIÓN_{seleccion_dir}.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                key=f"descargar_{seleccion_dir}"
+            # El informe se arma recién cuando se pide, y queda cacheado por contenido
+            informes_docx.boton_informe(
+                "evaluacion_direccion", seleccion_dir, (df_filtrada,),
+                lambda: informe_direccion_docx(df_filtrada, seleccion_dir),
+                etiqueta=f"INFORME EVALUACIÓN {seleccion_dir}",
+                archivo=f"INFORME_EVALUACIÓN_{seleccion_dir}.docx",
+                key=f"evaluacion_{seleccion_dir}",
             )
             
             # Mostrar Nivel 1 si existe
@@ -231,34 +188,30 @@ def mostrar_analisis(df_evals, agentes, supabase):
             st.markdown("---")
             st.markdown("#### 🏆 Elegibles para Bonificación por Desempeño Destacado (10%)")
             
-            # Filtrar elegibles según manual BDD
+            # Elegibles según manual BDD: DESTACADO no residuales (anuladas ya excluidas)
+            marcas = analisis.marcas.loc[df_filtrada.index]
             df_elegibles = df_filtrada[
-                (df_filtrada["calificacion"] == "DESTACADO") &  # Solo calificación Destacado
-                (df_filtrada["residual"] == False) &  # Excluir residuales
-                (df_filtrada["anulada"] != True)  # Excluir anuladas
-            ].copy()
+                (df_filtrada["calificacion"] == "DESTACADO") & ~marcas["residual"]
+            ].assign(recibe_bdd=marcas["bonificacion_elegible"])
             
             if df_elegibles.empty:
                 st.info("No hay personal elegible para BDD en esta dependencia.")
             else:
-                # Calcular cupo de bonificaciones (10% del total evaluado)
-                total_evaluados = len(df_filtrada[df_filtrada["anulada"] != True])
-                cupo_bonificaciones = max(1, int(total_evaluados * 0.1))
+                cupo = cupos.loc[seleccion_dir]
                 
-                # Ordenar por puntaje relativo descendente (mayor puntaje primero)
-                df_elegibles = df_elegibles.sort_values("puntaje_relativo", ascending=False)
-                
-                # Determinar quiénes reciben efectivamente la bonificación
-                df_elegibles["recibe_bdd"] = df_elegibles["bonificacion_elegible"]
+                # Mayor puntaje primero; a igual puntaje, el mismo orden que usa el motor
+                df_elegibles = df_elegibles.sort_values(
+                    ["puntaje_relativo", "id_evaluacion"], ascending=[False, True]
+                )
                 
                 # Mostrar métricas
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("📊 Total Evaluados", total_evaluados)
+                    st.metric("📊 Total Evaluados", int(cupo["total_evaluados"]))
                 with col2:
-                    st.metric("🎯 Cupo BDD (10%)", cupo_bonificaciones)
+                    st.metric("🎯 Cupo BDD (10%)", int(cupo["cupo_bdd"]))
                 with col3:
-                    st.metric("⭐ Elegibles Destacado", len(df_elegibles))
+                    st.metric("⭐ Elegibles Destacado", int(cupo["elegibles_destacado"]))
                 
                 # Tabla de elegibles
                 st.dataframe(
@@ -282,66 +235,61 @@ def mostrar_analisis(df_evals, agentes, supabase):
                 )
                 
 
-                # Mostrar advertencias si hay empates
-                if len(df_elegibles) > cupo_bonificaciones:
-                    # Verificar si hay empates en el límite
-                    puntaje_corte = df_elegibles.iloc[cupo_bonificaciones-1]["puntaje_relativo"]
-                    empates = df_elegibles[df_elegibles["puntaje_relativo"] == puntaje_corte]
+                # Empatados en el puntaje de corte, según el motor
+                empates = analisis.empates[analisis.empates["grupo"] == seleccion_dir]
+                
+                if not empates.empty:
+                    st.warning(f"⚠️ Hay {len(empates)} agentes empatados. El superior debe desempatar.")
                     
-                    if len(empates) > 1:
-                        #st.warning(f"⚠️ Hay {len(empates)} agentes empatados con puntaje {puntaje_corte:.3f}. Según manual BDD, el superior debe desempatar.")
-                        st.warning(f"⚠️ Hay {len(empates)} agentes empatados. El superior debe desempatar.")
-                        
-                        # Crear tabla con checkboxes editables
-                        col1, col2 = st.columns([4, 1])
+                    # Crear tabla con checkboxes editables
+                    col1, col2 = st.columns([4, 1])
+                    
+                    with col1:
+                        # Crear editor de datos para resolver empates
+                        empates_editor = empates[["apellido_nombre", "puntaje_relativo"]].assign(
+                            bonificacion_elegible=analisis.marcas.loc[empates.index, "bonificacion_elegible"]
+                        ).rename(columns={
+                            "apellido_nombre": "AGENTE",
+                            "puntaje_relativo": "PUNTAJE RELATIVO", 
+                            "bonificacion_elegible": "RECIBE BDD"
+                        })
                         
-                        with col1:
-                            # Crear editor de datos para resolver empates
-                            empates_editor = empates[["apellido_nombre", "puntaje_relativo", "bonificacion_elegible"]].copy()
-                            empates_editor = empates_editor.rename(columns={
-                                "apellido_nombre": "AGENTE",
-                                "puntaje_relativo": "PUNTAJE RELATIVO", 
-                                "bonificacion_elegible": "RECIBE BDD"
-                            })
+                        # Usar st.data_editor para permitir edición de checkboxes
+                        edited_empates = st.data_editor(
+                            empates_editor,
+                            column_config={
+                                "RECIBE BDD": st.column_config.CheckboxColumn(
+                                    "RECIBE BDD",
+                                    help="Seleccione quién recibe la bonificación BDD",
+                                    default=False,
+                                )
+                            },
+                            disabled=["AGENTE", "PUNTAJE RELATIVO"],
+                            hide_index=True,
+                            use_container_width=True,
+                            key=f"editor_empates_{seleccion_dir}"
+                        )
+                    
+                    with col2:
+                        # Botón para aplicar cambios
+                        if st.button("✅ Aplicar", key=f"btn_empate_{seleccion_dir}"):
+                            # Contar seleccionados
+                            seleccionados = int(edited_empates["RECIBE BDD"].sum())
                             
-                            # Usar st.data_editor para permitir edición de checkboxes
-                            edited_empates = st.data_editor(
-                                empates_editor,
-                                column_config={
-                                    "RECIBE BDD": st.column_config.CheckboxColumn(
-                                        "RECIBE BDD",
-                                        help="Seleccione quién recibe la bonificación BDD",
-                                        default=False,
-                                    )
-                                },
-                                disabled=["AGENTE", "PUNTAJE RELATIVO"],
-                                hide_index=True,
-                                use_container_width=True,
-                                key=f"editor_empates_{seleccion_dir}"
-                            )
-                        
-                        with col2:
-                            # Botón para aplicar cambios
-                            if st.button("✅ Aplicar", key=f"btn_empate_{seleccion_dir}"):
-                                # Contar seleccionados
-                                seleccionados = edited_empates["RECIBE BDD"].sum()
-                                
-                                # Calcular espacios disponibles
-                                ya_asignados = len(df_elegibles[df_elegibles["bonificacion_elegible"] == True])
-                                espacios_disponibles = cupo_bonificaciones - ya_asignados + len(empates[empates["bonificacion_elegible"] == True])
+                            # Lugares del cupo que no ocupan los que están por encima del corte
+                            bonificados_empatados = int(analisis.marcas.loc[empates.index, "bonificacion_elegible"].sum())
+                            espacios_disponibles = int(cupo["cupo_bdd"] - (cupo["bonificados"] - bonificados_empatados))
+                            
+                            if seleccionados <= espacios_disponibles:
+                                # Una sola escritura; los recálculos posteriores respetan la decisión
+                                fijar_desempate(supabase, dict(zip(
+                                    empates["id_evaluacion"], edited_empates["RECIBE BDD"].to_numpy(dtype=bool)
+                                )))
                                 
-                                if seleccionados <= espacios_disponibles:
-                                    # Actualizar base de datos
-                                    for idx, (orig_idx, emp_row) in enumerate(empates.iterrows()):
-                                        nuevo_valor = bool(edited_empates.iloc[idx]["RECIBE BDD"])  # Convertir a bool nativo
-                                        supabase.table("evaluaciones").update({
-                                            "bonificacion_elegible": nuevo_valor
-                                        }).eq("id_evaluacion", emp_row["id_evaluacion"]).execute()
-                                    
-                                    st.success(f"✅ Aplicado: {seleccionados} seleccionados")
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Seleccionados: {seleccionados}, Disponibles: {espacios_disponibles}")
+                                st.success(f"✅ Aplicado: {seleccionados} seleccionados")
+                                st.rerun()
+                            else:
+                                st.error(f"❌ Seleccionados: {seleccionados}, Disponibles: {espacios_disponibles}")
 
         # SIEMPRE mostrar tabla de residuales al final
         st.markdown("---")
@@ -381,9 +329,9 @@ def mostrar_analisis(df_evals, agentes, supabase):
             if df_residuales_bdd.empty:
                 st.info("No hay personal residual elegible para BDD (sin calificación DESTACADO).")
             else:
-                # Calcular cupo según regla residual
-                total_residuales_destacado = len(df_residuales_bdd)
-                cupo_residual = max(1, total_residuales_destacado // 5)
+                # Cupo según regla residual, del mismo cálculo que las marcas
+                total_residuales_destacado = analisis.residual["elegibles"]
+                cupo_residual = analisis.residual["cupo"]
                 
                 # Ordenar por puntaje relativo descendente
                 df_residuales_bdd = df_residuales_bdd.sort_values("puntaje_relativo", ascending=False)
@@ -424,45 +372,26 @@ def mostrar_analisis(df_evals, agentes, supabase):
                     hide_index=True
                 )
                 
-                # Mostrar advertencias si hay empates
-                if total_residuales_destacado > cupo_residual:
-                    # Verificar si hay empates en el límite
-                    if cupo_residual > 0:
-                        puntaje_corte = df_residuales_bdd.iloc[cupo_residual-1]["puntaje_relativo"]
-                        empates = df_residuales_bdd[df_residuales_bdd["puntaje_relativo"] == puntaje_corte]
-                        
-                        if len(empates) > 1:
-                            st.warning(f"⚠️ Hay {len(empates)} agentes empatados con puntaje {puntaje_corte:.3f}. El superior debe desempatar.")
-                            st.dataframe(empates[["agente", "puntaje_relativo"]])
+                # Empatados en el puntaje de corte de la unidad residual
+                empates = df_residuales_bdd[df_residuales_bdd.index.isin(
+                    analisis.empates.index[analisis.empates["grupo"] == GRUPO_RESIDUAL]
+                )]
+                if not empates.empty:
+                    puntaje_corte = empates["puntaje_relativo"].iloc[0]
+                    st.warning(f"⚠️ Hay {len(empates)} agentes empatados con puntaje {puntaje_corte:.3f}. El superior debe desempatar.")
+                    st.dataframe(empates[["agente", "puntaje_relativo"]])
         
         # Mostrar resumen global de BDD al final
         st.markdown("---")
         st.markdown("#### 📈 Resumen Global de Elegibles BDD")
         
-        # Obtener todas las dependencias
-        dependencias = df["dependencia_general"].dropna().unique()
-        resumen_global = []
-        
-        for dep in dependencias:
-            df_dep = df[df["dependencia_general"] == dep]
-            total_dep = len(df_dep[df_dep["anulada"] != True])
-            elegibles_dep = len(df_dep[
-                (df_dep["calificacion"] == "DESTACADO") & 
-                (df_dep["residual"] == False) & 
-                (df_dep["anulada"] != True)
-            ])
-            bonificados_dep = len(df_dep[df_dep["bonificacion_elegible"] == True])
-            cupo_dep = max(1, int(total_dep * 0.1))
-            
-            resumen_global.append({
-                "DEPENDENCIA": dep,
-                "TOTAL_EVALUADOS": total_dep,
-                "ELEGIBLES_DESTACADO": elegibles_dep,
-                "CUPO_BDD_10%": cupo_dep,
-                "BONIFICADOS_EFECTIVOS": bonificados_dep
-            })
-        
-        df_resumen = pd.DataFrame(resumen_global)
+        df_resumen = analisis.cupos.rename(columns={
+            "dependencia_general": "DEPENDENCIA",
+            "total_evaluados": "TOTAL_EVALUADOS",
+            "elegibles_destacado": "ELEGIBLES_DESTACADO",
+            "cupo_bdd": "CUPO_BDD_10%",
+            "bonificados": "BONIFICADOS_EFECTIVOS",
+        })
         st.dataframe(df_resumen, use_container_width=True, hide_index=True)
         
         # Métricas totales
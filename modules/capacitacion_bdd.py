@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+# Motor de residuales y Bonificación por Desempeño Destacado (BDD).
+#
+# Reglas (manual BDD):
+#   - Nivel 1 (jerárquico) siempre es residual.
+#   - Dentro de cada grupo, los niveles medios (2, 3, 4) y los operativos (5, 6)
+#     con menos de 6 evaluaciones pasan a residual.
+#   - Cupo BDD por grupo: 10% de las evaluaciones no anuladas (mínimo 1), entre
+#     los DESTACADO no residuales, por puntaje relativo descendente.
+#   - Unidad residual: una bonificación cada 5 DESTACADO residuales (mínimo 1).
+#   - Empate en el puntaje de corte: lo resuelve a mano el coordinador
+#     (columna bonificacion_manual). A igual puntaje, la evaluación elegida va
+#     antes que las demás y la descartada no ocupa un lugar del corte. La marca
+#     dura mientras dure el empate: si el corte se mueve, se descarta.
+#
+# Todo se calcula con groupby/transform sobre el DataFrame completo, sin
+# recorrer grupos en Python.
+
+NIVELES_MEDIOS = (2, 3, 4)
+NIVELES_OPERATIVOS = (5, 6)
+MINIMO_GRUPO = 6
+PORCENTAJE_BDD = 0.1
+RESIDUALES_POR_BONIFICACION = 5
+GRUPO_RESIDUAL = "UNIDAD RESIDUAL"
+
+
+@dataclass
+class ResultadoBDD:
+    """Resultado del análisis, alineado con el índice del DataFrame de entrada."""
+    marcas: pd.DataFrame  # columnas: residual, bonificacion_elegible (y bonificacion_manual si venía)
+    cupos: pd.DataFrame  # una fila por grupo: total_evaluados, elegibles_destacado, cupo_bdd, bonificados
+    residual: dict  # elegibles, cupo y bonificados de la unidad residual
+    empates: pd.DataFrame  # filas empatadas en el puntaje de corte, con la columna "grupo"
+
+
+def _tramos(nivel: pd.Series) -> pd.Series:
+    return pd.Series(
+        np.select(
+            [nivel == 1, nivel.isin(NIVELES_MEDIOS), nivel.isin(NIVELES_OPERATIVOS)],
+            ["jerarquico", "medios", "operativos"],
+            default="",
+        ),
+        index=nivel.index,
+    )
+
+
+def marcar_residuales(df: pd.DataFrame, grupo: str = "dependencia_general", unificar_subniveles: bool = False) -> pd.Series:
+    """Marca residual por grupo. Con `unificar_subniveles`, dentro de un tramo
+    de 6 o más evaluaciones se juntan los niveles con menos de 6 y, si la unión
+    sigue por debajo de 6, pasan a residual."""
+    nivel = df["nivel"]
+    tramo = _tramos(nivel)
+    con_grupo = df[grupo].notna()
+    agrupable = con_grupo & tramo.isin(["medios", "operativos"])
+
+    claves_tramo = [df[grupo], tramo]
+    tam_tramo = nivel.groupby(claves_tramo, dropna=False).transform("size")
+
+    residual = ((nivel == 1) & con_grupo) | (agrupable & (tam_tramo < MINIMO_GRUPO))
+
+    if unificar_subniveles:
+        tam_nivel = nivel.groupby([df[grupo], nivel], dropna=False).transform("size")
+        chico = agrupable & (tam_tramo >= MINIMO_GRUPO) & (tam_nivel < MINIMO_GRUPO)
+        tam_unificado = chico.groupby(claves_tramo, dropna=False).transform("sum")
+        residual |= chico & (tam_unificado < MINIMO_GRUPO)
+
+    return residual.astype(bool)
+
+
+def cupo_bdd(total_evaluados):
+    """10% de las evaluaciones no anuladas, con mínimo 1 (escalar o Series)."""
+    return np.maximum(1, np.floor(np.asarray(total_evaluados, dtype=float) * PORCENTAJE_BDD)).astype(int)
+
+
+def cupo_residual(elegibles: int) -> int:
+    return max(1, int(elegibles) // RESIDUALES_POR_BONIFICACION) if elegibles else 0
+
+
+def _puestos(elegible, puntaje, claves, prioridad=1):
+    """Puesto (1, 2, ...) de cada elegible dentro de su grupo: mayor puntaje
+    primero y, a igual puntaje, menor `prioridad` y después el orden de las filas."""
+    tabla = pd.DataFrame({
+        "puntaje": -puntaje.to_numpy(),
+        "prioridad": prioridad,
+        "clave": claves.to_numpy(),
+    })[elegible.to_numpy()]
+    # Con más de una columna sort_values usa lexsort, que es estable
+    tabla = tabla.sort_values(["puntaje", "prioridad"])
+    puesto = np.full(len(elegible), np.nan)
+    puesto[tabla.index.to_numpy()] = tabla.groupby("clave", sort=False).cumcount().to_numpy() + 1
+    return pd.Series(puesto, index=elegible.index)
+
+
+def _en_corte(elegible, puntaje, orden, cupo, claves):
+    """Elegibles con el mismo puntaje que el último lugar del cupo, cuando hay
+    más elegibles que cupo."""
+    corte = puntaje.where(elegible & (orden == cupo)).groupby(claves).transform("max")
+    n_elegibles = elegible.groupby(claves).transform("sum")
+    return elegible & (n_elegibles > cupo) & (puntaje == corte)
+
+
+def _empates(en_corte, claves):
+    """Filas en el corte cuando hay más de una en ese puntaje."""
+    return en_corte & (en_corte.groupby(claves).transform("sum") > 1)
+
+
+def _desempate_manual(df: pd.DataFrame):
+    """Evaluaciones elegidas y descartadas a mano en un empate."""
+    if "bonificacion_manual" not in df.columns:
+        ninguna = pd.Series(False, index=df.index)
+        return ninguna, ninguna
+    manual = df["bonificacion_manual"] == True
+    elegida = manual & (df["bonificacion_elegible"] == True)
+    return elegida, manual & ~elegida
+
+
+def resumen_cupos(df: pd.DataFrame, grupo: str = "dependencia_general") -> pd.DataFrame:
+    """Totales por grupo a partir de las columnas `residual` y `bonificacion_elegible` de `df`."""
+    valida = df["anulada"] != True
+    residual = df["residual"] == True
+    tabla = pd.DataFrame({
+        grupo: df[grupo],
+        "evaluado": valida,
+        "elegible": (df["calificacion"] == "DESTACADO") & ~residual & valida,
+        "bonificado": (df["bonificacion_elegible"] == True) & ~residual,
+    })
+    cupos = tabla.groupby(grupo).agg(
+        total_evaluados=("evaluado", "sum"),
+        elegibles_destacado=("elegible", "sum"),
+        bonificados=("bonificado", "sum"),
+    )
+    cupos.insert(2, "cupo_bdd", cupo_bdd(cupos["total_evaluados"]))
+    return cupos.reset_index()
+
+
+def _ordenar(df: pd.DataFrame) -> pd.DataFrame:
+    """Orden base para desempatar: a igual puntaje, primero el menor id_evaluacion."""
+    return df.sort_values("id_evaluacion", kind="stable") if "id_evaluacion" in df.columns else df
+
+
+def _puntajes(df: pd.DataFrame) -> pd.Series:
+    return pd.to_numeric(df["puntaje_relativo"], errors="coerce").fillna(-np.inf)
+
+
+def _bdd_grupos(df: pd.DataFrame, residual: pd.Series, grupo: str):
+    """Ganadores, empates y marcas manuales vigentes del 10% de cada grupo,
+    entre los DESTACADO no residuales."""
+    claves = df[grupo]
+    valida = df["anulada"] != True
+    puntaje = _puntajes(df)
+    total_evaluados = (valida & claves.notna()).groupby(claves).transform("sum")
+    cupo_grupo = pd.Series(cupo_bdd(total_evaluados.fillna(0)), index=df.index)
+    elegible = (df["calificacion"] == "DESTACADO") & ~residual & valida & claves.notna()
+    elegida, descartada = _desempate_manual(df)
+    prioridad = np.select([elegida.to_numpy(), descartada.to_numpy()], [0, 2], 1)
+    orden = _puestos(elegible, puntaje, claves, prioridad)
+    empate = _empates(_en_corte(elegible, puntaje, orden, cupo_grupo, claves), claves)
+    bonificado = elegible & (orden <= cupo_grupo) & ~(descartada & empate)
+    return bonificado, empate, (elegida | descartada) & empate
+
+
+def _bdd_residual(df: pd.DataFrame, residual: pd.Series):
+    """Ganadores y empates de la unidad residual (una bonificación cada 5)."""
+    elegible = residual & (df["calificacion"] == "DESTACADO") & (df["anulada"] != True)
+    puntaje = _puntajes(df)
+    cupo = cupo_residual(elegible.sum())
+    unico = pd.Series(GRUPO_RESIDUAL, index=df.index)
+    orden = _puestos(elegible, puntaje, unico)
+    bonificado = elegible & (orden <= cupo)
+    resumen = {"elegibles": int(elegible.sum()), "cupo": cupo, "bonificados": int(bonificado.sum())}
+    return bonificado, _empates(_en_corte(elegible, puntaje, orden, cupo, unico), unico), resumen
+
+
+def calcular_bdd(df: pd.DataFrame, grupo: str = "dependencia_general") -> ResultadoBDD:
+    """Residuales, cupos, ganadores BDD y empates en una sola pasada.
+
+    `df` necesita las columnas nivel, calificacion, anulada, puntaje_relativo
+    y la columna de `grupo`; con bonificacion_manual (y bonificacion_elegible)
+    se respetan los desempates hechos a mano. No se modifica.
+    """
+    datos = _ordenar(df)
+    residual = marcar_residuales(datos, grupo)
+    bonificado, empate_grupo, manual = _bdd_grupos(datos, residual, grupo)
+    bonificado_residual, empate_residual, resumen_residual = _bdd_residual(datos, residual)
+
+    marcas = pd.DataFrame({
+        "residual": residual,
+        "bonificacion_elegible": bonificado | bonificado_residual,
+    })
+    if "bonificacion_manual" in df.columns:
+        marcas["bonificacion_manual"] = manual
+    marcas = marcas.reindex(df.index)
+
+    empates = pd.concat([
+        datos[empate_grupo].assign(grupo=datos.loc[empate_grupo, grupo]),
+        datos[empate_residual].assign(grupo=GRUPO_RESIDUAL),
+    ])
+
+    return ResultadoBDD(
+        marcas=marcas,
+        cupos=resumen_cupos(df.assign(**marcas), grupo),
+        residual=resumen_residual,
+        empates=empates,
+    )
+
+
+def recalcular_grupos(df: pd.DataFrame, grupos, grupo: str = "dependencia_general") -> pd.DataFrame:
+    """Recalcula solo los grupos afectados por un alta o una anulación.
+
+    `df` trae las evaluaciones válidas de `grupos` y las residuales del resto,
+    con sus marcas guardadas (columnas residual, bonificacion_elegible y,
+    opcional, bonificacion_manual). Los demás grupos no dependen del cambio;
+    la unidad residual sí, y se recalcula completa. Devuelve id_evaluacion y
+    las marcas de las filas que cambian. Es la referencia de la función
+    actualizar_analisis_bdd de sql/analisis_bdd.sql.
+    """
+    datos = _ordenar(df)
+    grupos = [g for g in grupos if pd.notna(g)]
+    afectadas = datos[grupo].isin(grupos)
+    residual_actual = datos["residual"] == True
+    bonificacion_actual = datos["bonificacion_elegible"] == True
+
+    # Asignaciones con máscara siempre desde arrays bool: una Series alineada
+    # pasa la columna a object y `~residual` deja de ser una negación lógica
+    residual = residual_actual & datos[grupo].notna()
+    residual.loc[afectadas] = marcar_residuales(datos[afectadas], grupo).to_numpy(dtype=bool)
+
+    bonificacion = bonificacion_actual.copy()
+    bonificado, _, manual_vigente = _bdd_grupos(datos[afectadas], residual[afectadas], grupo)
+    bonificacion.loc[afectadas] = bonificado.to_numpy(dtype=bool)
+    bonificado_residual, _, _ = _bdd_residual(datos, residual)
+    bonificacion.loc[residual] = bonificado_residual[residual].to_numpy(dtype=bool)
+
+    marcas = {"residual": (residual, residual_actual), "bonificacion_elegible": (bonificacion, bonificacion_actual)}
+    if "bonificacion_manual" in datos.columns:
+        manual_actual = datos["bonificacion_manual"] == True
+        manual = manual_actual.copy()
+        manual.loc[afectadas] = manual_vigente.to_numpy(dtype=bool)
+        manual.loc[residual] = False
+        marcas["bonificacion_manual"] = (manual, manual_actual)
+
+    cambiadas = pd.Series(False, index=datos.index)
+    for nueva, actual in marcas.values():
+        cambiadas |= nueva != actual
+    return pd.DataFrame({
+        "id_evaluacion": datos.loc[cambiadas, "id_evaluacion"],
+        **{columna: nueva[cambiadas] for columna, (nueva, _) in marcas.items()},
+    })
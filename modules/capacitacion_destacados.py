@@ -1,30 +1,15 @@
 import streamlit as st
 import pandas as pd
-import io
-import math
+from modules import agregados, exportacion
 
-def mostrar_destacados(df_evals, agentes):
+def mostrar_destacados(supabase):
     st.markdown("### 🌟 Cupo DESTACADOS por Dependencia General")
 
-    # --- Preparar dataframes
-    df_agentes = pd.DataFrame(agentes)
-    #   df_agentes = df_agentes[df_agentes["activo"] == True]
-
-    df_eval_validas = df_evals[
-        (df_evals["calificacion"] == "DESTACADO") & (df_evals["anulada"] != True)
-    ]
-
-    # --- Agrupar por dependencia
-    resumen = df_agentes.groupby("dependencia_general").agg(
-        total_agentes=("cuil", "count")
-    ).reset_index()
-    resumen["cupo_destacados"] = resumen["total_agentes"].apply(lambda x: math.floor(x * 0.3) if (x * 0.3) - math.floor(x * 0.3) < 0.5 else math.floor(x * 0.3) + 1)
-    evaluados_destacados = df_eval_validas.groupby("dependencia_general").agg(
-        evaluados_con_destacado=("cuil", "count")
-    ).reset_index()
-
-    resumen = pd.merge(resumen, evaluados_destacados, on="dependencia_general", how="left")
-    resumen["evaluados_con_destacado"] = resumen["evaluados_con_destacado"].fillna(0).astype(int)
+    # --- Cupo y DESTACADOS por dependencia, calculados en la base
+    resumen = pd.DataFrame(
+        agregados.cupo_destacados(supabase),
+        columns=["dependencia_general", "total_agentes", "cupo_destacados", "evaluados_con_destacado"]
+    ).sort_values("dependencia_general")
 
     # --- Estado visual
     def calcular_estado(row):
@@ -65,14 +50,8 @@ def mostrar_destacados(df_evals, agentes):
     df_destacados_excel = df_destacados_excel.drop("Estado", axis=1)
     df_destacados_excel = df_destacados_excel.rename(columns={"Estado_Excel": "ESTADO"})
     
-    buffer_destacados = io.BytesIO()
-    with pd.ExcelWriter(buffer_destacados, engine="xlsxwriter") as writer:
-        df_destacados_excel.to_excel(writer, index=False, sheet_name="Destacados")
-    st.download_button(
-        label="📥 Descargar Cupo DESTACADOS (Excel)",
-        data=buffer_destacados.getvalue(),
-        file_name="cupo_destacados.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    exportacion.boton_descarga(
+        "📥 Descargar Cupo DESTACADOS", df_destacados_excel, "cupo_destacados", hoja="Destacados"
     )
 
     # --- Métricas globales
@@ -0,0 +1,61 @@
+import time
+from modules import repositorio
+
+# Escritura en bloque de los resultados del análisis de residuales y BDD.
+# Reemplaza los miles de `update` individuales por una única llamada a las
+# funciones de sql/analisis_bdd.sql, que son transaccionales.
+
+# Marca en `configuracion` que ya se corrió el análisis completo: recién desde
+# entonces tiene sentido mantenerlo al día de forma incremental. Con la marca
+# puesta, registrar_evaluacion y anular_evaluaciones recalculan la dependencia
+# general tocada en su propia transacción (_analisis_bdd_realizado() en
+# sql/analisis_bdd.sql lee esta misma clave).
+CLAVE_ANALISIS_REALIZADO = "analisis_bdd_realizado"
+
+
+def escribir_analisis_bdd(supabase, df, dependencias) -> dict:
+    """Persiste las columnas `residual`, `bonificacion_elegible` y, si está,
+    `bonificacion_manual` de `df`.
+
+    `dependencias` son las dependencias generales analizadas: sus evaluaciones
+    que no estén en `df` quedan sin bonificación. Devuelve las filas enviadas,
+    las filas realmente modificadas y la duración de la llamada.
+    """
+    columnas = ["residual", "bonificacion_elegible"]
+    if "bonificacion_manual" in df.columns:
+        columnas.append("bonificacion_manual")
+    filas = [
+        {"id_evaluacion": str(id_evaluacion), **{c: bool(v) for c, v in zip(columnas, marcas)}}
+        for id_evaluacion, *marcas in zip(df["id_evaluacion"], *(df[c] for c in columnas))
+    ]
+
+    inicio = time.perf_counter()
+    respuesta = supabase.rpc("aplicar_analisis_bdd", {
+        "p_filas": filas,
+        "p_dependencias": [str(d) for d in dependencias],
+    }).execute()
+    duracion = time.perf_counter() - inicio
+
+    repositorio.invalidar("evaluaciones")
+
+    resumen = (respuesta.data or [{}])[0]
+    return {
+        "filas_enviadas": len(filas),
+        "filas_actualizadas": resumen.get("filas_actualizadas", 0),
+        "bonificaciones_reseteadas": resumen.get("bonificaciones_reseteadas", 0),
+        "duracion_seg": duracion,
+    }
+
+
+def fijar_desempate(supabase, decisiones: dict) -> int:
+    """Guarda el desempate del coordinador ({id_evaluacion: recibe BDD}) en una
+    sola llamada. Las evaluaciones quedan marcadas como decididas a mano y los
+    recálculos posteriores respetan la decisión mientras dure el empate."""
+    respuesta = supabase.rpc("fijar_desempate_bdd", {
+        "p_filas": [
+            {"id_evaluacion": str(id_evaluacion), "bonificacion_elegible": bool(recibe)}
+            for id_evaluacion, recibe in decisiones.items()
+        ],
+    }).execute()
+    repositorio.invalidar("evaluaciones")
+    return (respuesta.data or [{}])[0].get("filas_actualizadas", 0)
@@ -0,0 +1,55 @@
+import streamlit as st
+from modules import factores_matriz
+from modules.catalogo_formularios import cargar_catalogo
+
+def mostrar_factores(supabase):
+    st.markdown("### 🧩 Factores por Dependencia General")
+
+    # --- Matrices de puntajes por factor (una vez por carga de evaluaciones)
+    catalogo = cargar_catalogo()
+    matrices = factores_matriz.cargar(supabase, catalogo)
+
+    tipo = st.selectbox(
+        "📄 Formulario:",
+        options=list(catalogo.keys()),
+        format_func=lambda x: f"Formulario {x} – {catalogo[x].titulo}",
+        key="factores_formulario",
+    )
+    matriz = matrices[int(tipo)]
+
+    if not len(matriz):
+        st.info("ℹ️ No hay evaluaciones registradas con este formulario.")
+        return
+
+    valores = st.radio(
+        "Valores:", ["puntajes", "posiciones"], horizontal=True, key="factores_valores",
+        format_func=str.capitalize,
+    )
+
+    # --- Promedio de cada factor por dependencia general
+    st.markdown(f"**Promedio por factor** ({len(matriz)} evaluaciones no anuladas)")
+    st.dataframe(
+        factores_matriz.promedio_por_dependencia(matriz, valores).round(2),
+        use_container_width=True
+    )
+
+    # --- Cuántas evaluaciones tuvieron cada valor de un factor, por dependencia general
+    factores = {f.clave: f for f in catalogo[tipo].factores}
+    clave = st.selectbox(
+        "🔎 Factor:",
+        options=list(matriz.claves),
+        format_func=lambda c: f"{c} – {factores[c].factor}",
+        key="factores_clave",
+    )
+    st.markdown(f"**Distribución de {valores} de {clave}** (evaluaciones por valor)")
+    st.dataframe(
+        factores_matriz.distribucion_por_dependencia(matriz, clave, valores),
+        use_container_width=True
+    )
+
+    # --- Qué factores acompañan más a la calificación final
+    st.markdown("**Correlación de cada factor con la calificación**")
+    st.dataframe(
+        factores_matriz.correlacion_con_calificacion(matriz, valores).round(3).to_frame(),
+        use_container_width=True
+    )
@@ -1,6 +1,87 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import io
+from modules import exportacion
+
+ZONA_HORARIA = "America/Argentina/Buenos_Aires"
+
+
+# ---- Armado de los listados (por columnas, sin recorrer filas) ----
+
+def _fechas_locales(fechas: pd.Series) -> pd.Series:
+    """Timestamps ISO -> datetime en hora argentina (NaT si falta o no se puede leer)."""
+    return pd.to_datetime(fechas, utc=True, errors="coerce", format="ISO8601").dt.tz_convert(ZONA_HORARIA)
+
+
+def _texto_fechas(fechas: pd.Series) -> pd.Series:
+    """datetime -> "dd/mm/aaaa hh:mm" (vacío si NaT), reordenando el ISO de numpy:
+    bastante más rápido que strftime, que arma un Timestamp por fila."""
+    iso = pd.Series(np.datetime_as_string(fechas.dt.tz_localize(None).to_numpy(), unit="m"), index=fechas.index)
+    texto = iso.str[8:10] + "/" + iso.str[5:7] + "/" + iso.str[0:4] + " " + iso.str[11:16]
+    return texto.where(fechas.notna(), "")
+
+
+def _texto_valores(columna: pd.Series) -> pd.Series:
+    """Valores de una columna de factores como texto; los enteros sin ".0"."""
+    valores = columna.dropna()
+    if pd.api.types.is_float_dtype(valores) and (valores % 1 == 0).all():
+        valores = valores.astype("int64")
+    return valores.astype(str).reindex(columna.index)
+
+
+def _resumen_factores(factores: pd.Series) -> pd.Series:
+    """{"Factor 1": 4, ...} -> "Factor 1 (4), ..." para toda la columna.
+
+    Las claves van en el orden en que jsonb las devuelve (largo, luego texto),
+    que es el que tenían los dicts al leerlos de la base.
+    """
+    resumen = pd.Series("", index=factores.index, dtype=object)
+    es_dict = factores.map(lambda v: isinstance(v, dict))
+    if not es_dict.any():
+        return resumen
+    ancho = pd.DataFrame(factores[es_dict].tolist(), index=factores.index[es_dict])
+    for clave in sorted(ancho.columns, key=lambda c: (len(c), c)):
+        parte = (clave + " (" + _texto_valores(ancho[clave]) + ")").reindex(resumen.index)
+        resumen = resumen.where(parte.isna(), np.where(resumen == "", parte, resumen + ", " + parte))
+    return resumen
+
+
+def construir_listados(df_filtrada: pd.DataFrame, agentes) -> tuple:
+    """Tabla de pantalla (ordenada por fecha, más reciente primero) y planilla
+    Excel (por dependencia general, formulario y agente) en una pasada."""
+    df = df_filtrada.reindex(columns=[
+        "cuil", "formulario", "calificacion", "puntaje_total", "puntaje_maximo", "puntaje_relativo",
+        "dependencia", "dependencia_general", "fecha_evaluacion", "factor_puntaje", "factor_posicion",
+    ])
+    nombres = pd.DataFrame(agentes, columns=["cuil", "apellido_nombre"]).drop_duplicates("cuil", keep="last")
+    agente = df["cuil"].map(nombres.set_index("cuil")["apellido_nombre"]).fillna("Desconocido")
+
+    fecha = _fechas_locales(df["fecha_evaluacion"])
+    df_tabla = pd.DataFrame({
+        "DEPENDENCIA GENERAL": df["dependencia_general"],
+        "AGENTE": agente,
+        "FORMULARIO": df["formulario"],
+        "CALIFICACIÓN": df["calificacion"],
+        "FECHA": _texto_fechas(fecha),
+        "_orden": fecha,
+    }).sort_values("_orden", ascending=False, na_position="last", kind="stable").drop(columns="_orden")
+
+    df_excel = pd.DataFrame({
+        "CUIL": df["cuil"],
+        "AGENTE": agente,
+        "FORMULARIO": df["formulario"],
+        "FACTOR/PUNTAJE": _resumen_factores(df["factor_puntaje"]),
+        "FACTOR/POSICION": _resumen_factores(df["factor_posicion"]),
+        "CALIFICACIÓN": df["calificacion"],
+        "PUNTAJE TOTAL": df["puntaje_total"],
+        "PUNTAJE MÁXIMO": df["puntaje_maximo"],
+        "PUNTAJE RELATIVO": df["puntaje_relativo"],
+        "DEPENDENCIA": df["dependencia"],
+        "DEPENDENCIA GENERAL": df["dependencia_general"],
+    }).sort_values(["DEPENDENCIA GENERAL", "FORMULARIO", "AGENTE"])
+
+    return df_tabla.reset_index(drop=True), df_excel
+
 
 def mostrar_listado_general(df_evals, agentes):
     st.markdown("### 📑 Listado General de Evaluaciones")
@@ -16,64 +97,11 @@ def mostrar_listado_general(df_evals, agentes):
     else:
         df_filtrada = df_evals[(df_evals["anulada"] != True) & (df_evals["dependencia_general"] == dependencia_seleccionada)]
 
-    df_agentes = pd.DataFrame(agentes)
-    mapa_agentes = {a["cuil"]: a["apellido_nombre"] for a in agentes}
-
-    filas_tabla = []
-    filas_excel = []
-
-    for e in df_filtrada.to_dict(orient="records"):
-        cuil = e.get("cuil", "")
-        agente = mapa_agentes.get(cuil, "Desconocido")
-        formulario = e.get("formulario", "")
-        calificacion = e.get("calificacion", "")
-        total = e.get("puntaje_total", "")
-        fecha_eval = e.get("fecha_evaluacion")
-
-        if fecha_eval:
-            try:
-                fecha = pd.to_datetime(fecha_eval, utc=True).tz_convert("America/Argentina/Buenos_Aires")
-                fecha_str = fecha.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                fecha_str = ""
-        else:
-            fecha_str = ""
-
-        filas_tabla.append({
-            "DEPENDENCIA GENERAL": e.get("dependencia_general", ""),
-            "AGENTE": agente,
-            "FORMULARIO": formulario,
-            "CALIFICACIÓN": calificacion,
-            "FECHA": fecha_str
-        })
-
-        resumen_puntaje = ", ".join([f"{k} ({v})" for k, v in e.get("factor_puntaje", {}).items()])
-        resumen_posicion = ", ".join([f"{k} ({v})" for k, v in e.get("factor_posicion", {}).items()])
-
-        filas_excel.append({
-            "CUIL": cuil,
-            "AGENTE": agente,
-            "FORMULARIO": formulario,
-            "FACTOR/PUNTAJE": resumen_puntaje,
-            "FACTOR/POSICION": resumen_posicion,
-            "CALIFICACIÓN": calificacion,
-            "PUNTAJE TOTAL": total,
-            "PUNTAJE MÁXIMO": e.get("puntaje_maximo", ""),
-            "PUNTAJE RELATIVO": e.get("puntaje_relativo", ""),
-            "DEPENDENCIA": e.get("dependencia", ""),
-            "DEPENDENCIA GENERAL": e.get("dependencia_general", "")
-        })
-
-    df_tabla = pd.DataFrame(filas_tabla)
-    st.dataframe(df_tabla.sort_values("FECHA", ascending=False), use_container_width=True)
-
-    df_excel = pd.DataFrame(filas_excel).sort_values(["DEPENDENCIA GENERAL", "FORMULARIO", "AGENTE"])
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df_excel.to_excel(writer, index=False, sheet_name="Resumen")
-    st.download_button(
-        label="📥 Descargar Listado General (Excel)",
-        data=buffer.getvalue(),
-        file_name="listado_general.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    df_tabla, df_excel = construir_listados(df_filtrada, agentes)
+
+    st.dataframe(df_tabla, use_container_width=True)
+
+    formato = exportacion.selector_formato(key="formato_listado_general")
+    exportacion.boton_descarga(
+        "📥 Descargar Listado General", df_excel, "listado_general", formato, hoja="Resumen"
     )
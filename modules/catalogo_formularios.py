@@ -0,0 +1,129 @@
+import os
+import streamlit as st
+import yaml
+from bisect import bisect_right
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Catálogo de formularios compilado a partir de formularios.yaml.
+#
+# Se lee y valida una sola vez por proceso (st.cache_resource) y es inmutable:
+# cada factor trae su tabla opción -> puntaje, cada formulario su puntaje
+# máximo y un índice ordenado de los intervalos de clasificación.
+
+# En la raíz del repositorio, sin depender del directorio de trabajo
+RUTA_FORMULARIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "formularios.yaml")
+SIN_CLASIFICACION = "Sin clasificación"
+
+MAPA_NIVEL_EVALUACION = {
+    "1": "Jerárquico (1)",
+    "2": "Medio (2)",
+    "3": "Medio (3)",
+    "4": "Medio (4)",
+    "5": "Operativo (5)",
+    "6": "Operativo (6)"
+}
+
+MAXIMO_PUNTAJE_FORMULARIO = {
+    "1": 56,
+    "2": 48,
+    "3": 48,
+    "4": 40,
+    "5": 32,
+    "6": 24
+}
+
+
+@dataclass(frozen=True)
+class Factor:
+    factor: str
+    descripcion: str
+    clave: str  # "Factor 1", "Factor 4.1", ... (claves de factor_puntaje / factor_posicion)
+    opciones: tuple
+    puntajes: MappingProxyType  # texto de la opción -> puntaje
+    maximo: int
+
+    def posicion(self, opcion: str) -> int:
+        """Posición de la opción, empezando en 1."""
+        return self.opciones.index(opcion) + 1
+
+
+@dataclass(frozen=True)
+class Formulario:
+    tipo: int
+    titulo: str
+    factores: tuple
+    puntaje_maximo: int
+    clasificaciones: tuple  # (nombre, máximo, mínimo), en el orden del YAML
+    _minimos: tuple  # índice ordenado por mínimo, para bisect
+    _intervalos: tuple  # (mínimo, máximo, nombre), mismo orden que _minimos
+
+    def clasificar(self, total) -> str:
+        i = bisect_right(self._minimos, total) - 1
+        if i >= 0 and total <= self._intervalos[i][1]:
+            return self._intervalos[i][2]
+        return SIN_CLASIFICACION
+
+
+def _compilar_factor(bloque: dict) -> Factor:
+    opciones = tuple(texto for texto, _ in bloque["opciones"])
+    puntajes = {texto: puntaje for texto, puntaje in bloque["opciones"]}
+    if len(puntajes) != len(opciones):
+        raise ValueError(f"Opciones repetidas en el factor {bloque['factor']!r}")
+    return Factor(
+        factor=bloque["factor"],
+        descripcion=bloque["descripcion"],
+        clave=f"Factor {bloque['factor'].split(' ')[0].strip()}",
+        opciones=opciones,
+        puntajes=MappingProxyType(puntajes),
+        maximo=max(puntajes.values()),
+    )
+
+
+def _compilar_formulario(tipo, datos: dict, rangos: list) -> Formulario:
+    factores = tuple(_compilar_factor(b) for b in datos["factores"])
+    puntaje_maximo = sum(f.maximo for f in factores)
+
+    esperado = MAXIMO_PUNTAJE_FORMULARIO.get(str(tipo))
+    if esperado != puntaje_maximo:
+        raise ValueError(
+            f"Formulario {tipo}: el puntaje máximo del YAML es {puntaje_maximo} "
+            f"y MAXIMO_PUNTAJE_FORMULARIO indica {esperado}"
+        )
+
+    intervalos = tuple(sorted((minv, maxv, nombre) for nombre, maxv, minv in rangos))
+    for (min_a, max_a, nombre_a), (min_b, _, nombre_b) in zip(intervalos, intervalos[1:]):
+        if min_b <= max_a:
+            raise ValueError(f"Formulario {tipo}: se superponen {nombre_a} y {nombre_b}")
+    if intervalos and max(i[1] for i in intervalos) != puntaje_maximo:
+        raise ValueError(f"Formulario {tipo}: las clasificaciones no terminan en el puntaje máximo {puntaje_maximo}")
+
+    return Formulario(
+        tipo=tipo,
+        titulo=datos["titulo"],
+        factores=factores,
+        puntaje_maximo=puntaje_maximo,
+        clasificaciones=tuple(tuple(r) for r in rangos),
+        _minimos=tuple(i[0] for i in intervalos),
+        _intervalos=intervalos,
+    )
+
+
+def compilar(config: dict) -> MappingProxyType:
+    """Arma el catálogo {tipo: Formulario} y lo valida. Lanza ValueError si el
+    YAML no es consistente con las constantes de este módulo."""
+    formularios = config["formularios"]
+    clasificaciones = config["clasificaciones"]
+    faltantes = set(formularios) - set(clasificaciones)
+    if faltantes:
+        raise ValueError(f"Formularios sin clasificaciones: {sorted(faltantes)}")
+    return MappingProxyType({
+        tipo: _compilar_formulario(tipo, datos, clasificaciones[tipo])
+        for tipo, datos in formularios.items()
+    })
+
+
+@st.cache_resource(show_spinner=False)
+def cargar_catalogo(ruta: str = RUTA_FORMULARIOS) -> MappingProxyType:
+    with open(ruta, "r", encoding="utf-8") as f:
+        return compilar(yaml.safe_load(f))
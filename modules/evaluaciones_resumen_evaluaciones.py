@@ -1,11 +1,7 @@
 # import streamlit as st
 import pandas as pd
-import tempfile
 import time
-from docx import Document
-from docx.shared import Pt, RGBColor, Cm
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from modules import informes_docx, repositorio_cupos
 
 def mostrar_evaluaciones(data):
 
@@ -76,154 +72,6 @@ def mostrar_evaluaciones(data):
             hide_index=True
         )
 
-    def set_cell_style(cell, bold=True, bg_color=None, font_color="000000"):
-        para = cell.paragraphs[0]
-        run = para.runs[0] if para.runs else para.add_run(" ")
-        run.text = run.text if run.text.strip() else " "
-        run.font.name = "Calibri"
-        run.font.size = Pt(10)
-        run.font.bold = bold
-        run.font.color.rgb = RGBColor.from_string(font_color.upper())
-    
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-        if bg_color:
-            shd = OxmlElement("w:shd")
-            shd.set(qn("w:fill"), bg_color)
-            tcPr.append(shd)
-    
-        para.alignment = 1  # Centrado
-
-    def generar_informe_docx(df_base, df_eval, dependencia_nombre):
-        doc = Document()
-    
-        # Márgenes 2 cm
-        section = doc.sections[0]
-        section.top_margin = Cm(2)
-        section.bottom_margin = Cm(2)
-        section.left_margin = Cm(2)
-        section.right_margin = Cm(2)
-    
-        # Fuente general
-        doc.styles["Normal"].font.name = "Calibri"
-        doc.styles["Normal"].font.size = Pt(10)
-    
-        # Títulos con estilo
-        def titulo(texto):
-            p = doc.add_paragraph()
-            run = p.add_run(texto)
-            run.font.name = "Calibri"
-            run.font.size = Pt(10)
-            run.font.bold = True
-            run.font.color.rgb = RGBColor.from_string("104f8e")
-    
-        # Encabezado
-        header = section.header
-        p_header = header.paragraphs[0]
-        p_header.clear()
-        run = p_header.add_run(
-            f"INSTITUTO NACIONAL DE ESTADISTICA Y CENSOS\n"
-            f"DIRECCIÓN DE CAPACITACIÓN Y CARRERA DE PERSONAL\n"
-            f"EVALUACIÓN DE DESEMPEÑO 2024\n"
-            f"UNIDAD DE ANÁLISIS: {dependencia_nombre}"
-        )
-        run.font.name = "Calibri"
-        run.font.size = Pt(10)
-        run.font.bold = True
-        run.font.color.rgb = RGBColor.from_string("104f8e")
-        p_header.alignment = 1
-        p_header.paragraph_format.line_spacing = Pt(12)
-
-        # AGRUPAMIENTO
-        doc.add_paragraph()
-
-        titulo("PERSONAL TOTAL POR TIPO DE AGRUPAMIENTO")
-        gral = len(df_base[df_base["agrupamiento"] == "GRAL"])
-        prof = len(df_base[df_base["agrupamiento"] == "PROF"])
-        tabla_agrup = doc.add_table(rows=2, cols=2)
-        tabla_agrup.style = 'Table Grid'
-        for i, h in enumerate(["GENERAL", "PROFESIONAL"]):
-            tabla_agrup.cell(0, i).text = h
-            set_cell_style(tabla_agrup.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-            tabla_agrup.cell(1, i).text = str([gral, prof][i])
-            set_cell_style(tabla_agrup.cell(1, i), bold=False)
-    
-        doc.add_paragraph()
-    
-        # ESCALAFÓN
-        titulo("PERSONAL TOTAL POR TIPO DE NIVEL ESCALAFONARIO")
-        niveles = ["A", "B", "C", "D", "E"]
-        conteo_niveles = df_base["nivel"].value_counts()
-        tabla_nivel = doc.add_table(rows=2, cols=5)
-        tabla_nivel.style = 'Table Grid'
-        for i, nivel in enumerate(niveles):
-            tabla_nivel.cell(0, i).text = nivel
-            set_cell_style(tabla_nivel.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-            tabla_nivel.cell(1, i).text = str(conteo_niveles.get(nivel, 0))
-            set_cell_style(tabla_nivel.cell(1, i), bold=False)
-    
-        doc.add_paragraph()
-    
-        # EVALUADO / INGRESANTE
-        titulo("PERSONAL PARA EVALUAR/EVALUADO")
-        df_evaluable = df_base[df_base["ingresante"].isin([True, False])]
-        no_ingresantes = len(df_evaluable[df_evaluable["ingresante"] == False])
-        ingresantes = len(df_evaluable[df_evaluable["ingresante"] == True])
-        total_evaluable = no_ingresantes + ingresantes
-        evaluados = df_eval["calificacion"].apply(lambda x: x != "").sum()
-    
-        tabla_eval = doc.add_table(rows=2, cols=4)
-        tabla_eval.style = 'Table Grid'
-        eval_headers = [
-            "PERMANENTES NO INGRESANTE",
-            "PERMANENTES INGRESANTES",
-            "TOTAL A EVALUAR",
-            "TOTAL EVALUADO"
-        ]
-        for i, h in enumerate(eval_headers):
-            tabla_eval.cell(0, i).text = h
-            set_cell_style(tabla_eval.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-            tabla_eval.cell(1, i).text = str([no_ingresantes, ingresantes, total_evaluable, evaluados][i])
-            set_cell_style(tabla_eval.cell(1, i), bold=False)
-    
-        doc.add_paragraph()
-    
-        # FUNCION AUXILIAR: Listados por formulario
-        def agregar_tabla_por_formulario(titulo_texto, formularios):
-            titulo(titulo_texto)
-            subset = df_eval[df_eval["formulario"].astype(str).isin(formularios)].sort_values("apellido_nombre")
-    
-            tabla = doc.add_table(rows=1, cols=3)
-            tabla.style = 'Table Grid'
-            headers = ["APELLIDOS Y NOMBRES", "CALIFICACIÓN", "PUNTAJE"]
-            for i, col in enumerate(headers):
-                tabla.cell(0, i).text = col
-                set_cell_style(tabla.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-    
-            if subset.empty:
-                doc.add_paragraph("No hay evaluaciones registradas en este nivel.")
-                return
-    
-            for _, row in subset.iterrows():
-                r = tabla.add_row().cells
-                r[0].text = row.get("apellido_nombre", "")
-                r[1].text = row.get("calificacion", "")
-                puntaje = row.get("puntaje_total", "")
-                try:
-                    puntaje_float = float(puntaje)
-                    puntaje = int(puntaje_float) if puntaje_float.is_integer() else puntaje_float
-                except:
-                    pass
-                r[2].text = str(puntaje)
-    
-        agregar_tabla_por_formulario("EVALUACIONES - NIVEL JERÁRQUICO (FORMULARIO 1)", ["1"])
-        doc.add_paragraph()
-        agregar_tabla_por_formulario("EVALUACIONES - NIVELES MEDIO (FORMULARIOS 2, 3 y 4)", ["2", "3", "4"])
-        doc.add_paragraph()
-        agregar_tabla_por_formulario("EVALUACIONES - NIVELES OPERATIVOS (FORMULARIOS 5 Y 6)", ["5", "6"])
-    
-        return doc
-
     df_informe = df_agentes.copy()  # todos los agentes asignados
     
     df_evaluados = df_agentes[["cuil", "apellido_nombre"]].merge(
@@ -244,21 +92,13 @@ def mostrar_evaluaciones(data):
             if col not in df_evaluados.columns:
                 df_evaluados[col] = ""
 
-        with st.spinner("✏️ Generando documento..."):
-            doc = generar_informe_docx(df_informe, df_evaluados, dependencia_filtro)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                doc.save(tmp.name)
-                tmp_path = tmp.name
-    
-        with open(tmp_path, "rb") as file:
-            st.download_button(
-                label="📥 Descargar Informe",
-                data=file,
-                file_name=f"informe_{dependencia_filtro.replace(' ', '_')}.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                # use_container_width=True,
-                type="primary"
-            )
+        informes_docx.boton_informe(
+            "unidad", dependencia_filtro, (df_informe, df_evaluados),
+            lambda: informes_docx.informe_unidad_docx(df_informe, df_evaluados, dependencia_filtro),
+            etiqueta="Informe",
+            archivo=f"informe_{dependencia_filtro.replace(' ', '_')}.docx",
+            key=f"unidad_{dependencia_filtro}",
+        )
 
     # Mostrar tabla solo para evaluador_general con destacados y si hay al menos 4 agentes activos
     if tiene_rol("evaluador_general") and not df_no_anuladas.empty:
@@ -267,21 +107,14 @@ def mostrar_evaluaciones(data):
     
         if dependencia_actual:
             try:
-                # Obtener total de agentes activos en esa dependencia_general
-                agentes_dependencia = supabase.table("agentes")\
-                    .select("cuil, activo")\
-                    .eq("dependencia_general", dependencia_actual)\
-                    .execute().data
-
-                total_activos = sum(1 for a in agentes_dependencia if a.get("activo") == True)
+                # Contador mantenido en la base: una sola fila por dependencia general
+                cupo = repositorio_cupos.de_dependencia_general(supabase, dependencia_actual)
                 
-                if total_activos > 3:  # Mostrar solo si hay más de 3
-                    import math
-                    cupo_exacto = total_activos * 0.3
-                    max_destacados = math.floor(cupo_exacto) if (cupo_exacto - math.floor(cupo_exacto)) < 0.5 else math.floor(cupo_exacto) + 1
+                if cupo["agentes_activos"] > 3:  # Mostrar solo si hay más de 3
+                    max_destacados = cupo["cupo"]
+                    usados = cupo["destacados"]
                 
                     df_destacados = df_no_anuladas[df_no_anuladas["calificacion"] == "DESTACADO"].copy()
-                    usados = len(df_destacados)
                 
                     st.markdown("---")
                     st.markdown(f"<h2 style='font-size:20px;'>🌟 Evaluaciones con calificación DESTACADO ({usados} / {max_destacados})</h2>", unsafe_allow_html=True)
@@ -0,0 +1,136 @@
+import csv
+import io
+import math
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+try:
+    import pyarrow  # noqa: F401  (solo para saber si hay Parquet)
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# Exportación de listados a Excel, CSV y Parquet.
+#
+# Excel y CSV se escriben fila por fila desde un iterador: xlsxwriter en modo
+# constant_memory baja cada fila a disco al pasar a la siguiente, así que no
+# se arma en memoria ni una copia del DataFrame ni la grilla de celdas de
+# pd.ExcelWriter. Parquet es columnar: se escribe desde el DataFrame.
+#
+# Las funciones devuelven el BytesIO escrito (al principio), sin copiarlo a
+# bytes con getvalue(). Los botones de descarga arman el archivo recién al
+# pulsarlos, no en cada rerun de la página.
+#
+# Parquet requiere pyarrow, que no es dependencia obligatoria.
+
+MIMES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+NOMBRES_FORMATO = {"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet"}
+
+
+def formatos_disponibles() -> list:
+    return ["xlsx", "csv"] + (["parquet"] if PARQUET_DISPONIBLE else [])
+
+
+def _valor(v):
+    """Valor de celda: nulos (None/NaN/NaT/NA) -> None; fechas sin zona horaria
+    (Excel no las admite); dicts y listas (jsonb) como texto."""
+    if v is None or isinstance(v, (str, int)):
+        return v
+    if isinstance(v, float):
+        return None if math.isnan(v) else v
+    if v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, datetime):
+        return v.replace(tzinfo=None) if v.tzinfo else v
+    if isinstance(v, (dict, list)):
+        return str(v)
+    return v
+
+
+def filas_de(df: pd.DataFrame):
+    """Filas del DataFrame como tuplas de valores de Python, sin copiar el frame."""
+    for fila in df.itertuples(index=False, name=None):
+        yield tuple(_valor(v) for v in fila)
+
+
+def a_excel(columnas, filas, hoja: str = "Hoja1") -> io.BytesIO:
+    """.xlsx con una fila de encabezados en negrita y `filas` (iterable de
+    secuencias), escrito en modo constant_memory."""
+    salida = io.BytesIO()
+    libro = xlsxwriter.Workbook(salida, {"constant_memory": True, "strings_to_urls": False})
+    hoja_excel = libro.add_worksheet(hoja[:31])
+    formato_fecha = libro.add_format({"num_format": "dd/mm/yyyy hh:mm"})
+
+    hoja_excel.write_row(0, 0, list(columnas), libro.add_format({"bold": True}))
+    for i, fila in enumerate(filas, start=1):
+        for j, v in enumerate(fila):
+            if isinstance(v, datetime):
+                hoja_excel.write_datetime(i, j, v, formato_fecha)
+            else:
+                hoja_excel.write(i, j, v)
+    libro.close()
+    salida.seek(0)
+    return salida
+
+
+def a_csv(columnas, filas) -> io.BytesIO:
+    """CSV en UTF-8 con BOM (para que Excel respete los acentos)."""
+    salida = io.BytesIO()
+    texto = io.TextIOWrapper(salida, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto)
+    escritor.writerow(columnas)
+    escritor.writerows(filas)
+    texto.flush()
+    texto.detach()
+    salida.seek(0)
+    return salida
+
+
+def a_parquet(df: pd.DataFrame) -> io.BytesIO:
+    if not PARQUET_DISPONIBLE:
+        raise ImportError("Para exportar a Parquet hace falta pyarrow: pip install pyarrow")
+    salida = io.BytesIO()
+    df.to_parquet(salida, index=False, engine="pyarrow")
+    salida.seek(0)
+    return salida
+
+
+def exportar(df: pd.DataFrame, formato: str = "xlsx", hoja: str = "Hoja1") -> io.BytesIO:
+    if formato == "xlsx":
+        return a_excel(df.columns, filas_de(df), hoja)
+    if formato == "csv":
+        return a_csv(df.columns, filas_de(df))
+    if formato == "parquet":
+        # Las columnas jsonb (dicts/listas) se guardan como texto
+        jsonb = [c for c in df.columns if df[c].dtype == object and df[c].map(lambda v: isinstance(v, (dict, list))).any()]
+        return a_parquet(df.assign(**{c: df[c].map(_valor) for c in jsonb}) if jsonb else df)
+    raise ValueError(f"Formato de exportación desconocido: {formato!r}")
+
+
+# ---- Descargas en la interfaz ----
+
+def selector_formato(key: str) -> str:
+    formatos = formatos_disponibles()
+    return st.radio(
+        "Formato", formatos, format_func=NOMBRES_FORMATO.get, horizontal=True,
+        key=key, label_visibility="collapsed",
+    )
+
+
+def boton_descarga(etiqueta: str, df: pd.DataFrame, nombre: str, formato: str = "xlsx", hoja: str = "Hoja1", key=None):
+    """Botón de descarga de `df` como `nombre`.<formato>. El archivo se arma
+    al pulsarlo (en otro hilo), no en cada rerun."""
+    st.download_button(
+        label=f"{etiqueta} ({NOMBRES_FORMATO[formato]})",
+        data=lambda: exportar(df, formato, hoja),
+        file_name=f"{nombre}.{formato}",
+        mime=MIMES[formato],
+        key=key,
+    )
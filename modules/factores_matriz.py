@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from modules import repositorio, repositorio_evaluaciones
+
+# Puntajes y posiciones por factor en forma de matriz, para análisis.
+#
+# En `evaluaciones`, factor_puntaje y factor_posicion son dicts jsonb por fila.
+# Aquí se pasan, una vez por carga de datos, a una matriz int8 por formulario
+# (filas = evaluaciones no anuladas, columnas = factores del catálogo, en el
+# orden de formularios.yaml). Los factores sin valor quedan en SIN_VALOR.
+# Las funciones de análisis trabajan sobre esas matrices con NumPy.
+
+SIN_VALOR = -1
+# Columnas de `evaluaciones` que usan las matrices
+COLUMNAS = "id_evaluacion, formulario, anulada, calificacion, dependencia_general, factor_puntaje, factor_posicion"
+
+
+@dataclass(frozen=True)
+class MatrizFactores:
+    tipo: int
+    claves: tuple  # claves de factor_puntaje, en el orden del catálogo
+    id_evaluacion: np.ndarray
+    dependencia_general: np.ndarray  # object; None si la evaluación no tiene
+    calificacion: np.ndarray  # índice de la clasificación, de menor a mayor; SIN_VALOR si no coincide
+    clasificaciones: tuple  # nombres, de menor a mayor puntaje
+    puntajes: np.ndarray  # int8, (evaluaciones, factores)
+    posiciones: np.ndarray  # int8, (evaluaciones, factores)
+
+    def __len__(self):
+        return len(self.id_evaluacion)
+
+    def columna(self, clave: str) -> int:
+        return self.claves.index(clave)
+
+
+def _matriz(dicts: pd.Series, claves: tuple) -> np.ndarray:
+    validos = dicts.map(lambda v: isinstance(v, dict))
+    ancho = pd.DataFrame(dicts[validos].tolist(), index=dicts.index[validos]).reindex(
+        index=dicts.index, columns=list(claves)
+    )
+    return ancho.fillna(SIN_VALOR).to_numpy(dtype=np.int8)
+
+
+def construir(df_evaluaciones: pd.DataFrame, catalogo) -> dict:
+    """{tipo de formulario: MatrizFactores} para las evaluaciones no anuladas.
+    Sin evaluaciones, las matrices quedan vacías."""
+    df = df_evaluaciones.reindex(columns=[c.strip() for c in COLUMNAS.split(",")]).astype(object)
+    df = df[(df["anulada"] != True) & df["formulario"].notna()]
+    tipo_fila = df["formulario"].astype(int)
+    matrices = {}
+    for tipo, formulario in catalogo.items():
+        filas = df[tipo_fila == int(tipo)]
+        claves = tuple(f.clave for f in formulario.factores)
+        clasificaciones = tuple(nombre for nombre, _, _ in sorted(formulario.clasificaciones, key=lambda r: r[2]))
+        calificacion = pd.Categorical(filas["calificacion"].str.upper(), categories=clasificaciones).codes
+        matrices[int(tipo)] = MatrizFactores(
+            tipo=int(tipo),
+            claves=claves,
+            id_evaluacion=filas["id_evaluacion"].to_numpy(),
+            dependencia_general=filas["dependencia_general"].to_numpy(dtype=object),
+            calificacion=calificacion.astype(np.int8),
+            clasificaciones=clasificaciones,
+            puntajes=_matriz(filas["factor_puntaje"], claves),
+            posiciones=_matriz(filas["factor_posicion"], claves),
+        )
+    return matrices
+
+
+def cargar(supabase, catalogo) -> dict:
+    """Matrices de todas las evaluaciones, armadas una vez por carga de
+    `evaluaciones` (se invalidan con la tabla)."""
+    return repositorio.consultar(
+        ("factores_matriz",),
+        ("evaluaciones",),
+        lambda: construir(pd.DataFrame(repositorio_evaluaciones.listar(supabase, COLUMNAS)), catalogo),
+    )
+
+
+# ---- Análisis ----
+
+def _grupos(matriz: MatrizFactores):
+    """Código por fila (-1 sin dependencia) y dependencias en orden de aparición."""
+    return pd.factorize(matriz.dependencia_general, use_na_sentinel=True)
+
+
+def promedio_por_dependencia(matriz: MatrizFactores, valores="puntajes") -> pd.DataFrame:
+    """Promedio de cada factor por dependencia_general (filas) ignorando los
+    factores sin valor. `valores`: "puntajes" o "posiciones"."""
+    datos = getattr(matriz, valores)
+    codigos, dependencias = _grupos(matriz)
+    con_grupo = codigos >= 0
+    codigos, datos = codigos[con_grupo], datos[con_grupo]
+    presente = datos != SIN_VALOR
+
+    sumas = np.zeros((len(dependencias), len(matriz.claves)))
+    cantidades = np.zeros((len(dependencias), len(matriz.claves)))
+    np.add.at(sumas, codigos, np.where(presente, datos, 0))
+    np.add.at(cantidades, codigos, presente)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedios = sumas / cantidades
+    return pd.DataFrame(promedios, index=pd.Index(dependencias, name="dependencia_general"), columns=list(matriz.claves))
+
+
+def distribucion_por_dependencia(matriz: MatrizFactores, clave: str, valores="puntajes") -> pd.DataFrame:
+    """Cantidad de evaluaciones por dependencia_general (filas) y valor del
+    factor `clave` (columnas)."""
+    columna = getattr(matriz, valores)[:, matriz.columna(clave)].astype(np.int64)
+    codigos, dependencias = _grupos(matriz)
+    validas = (codigos >= 0) & (columna != SIN_VALOR)
+    codigos, columna = codigos[validas], columna[validas]
+
+    niveles = np.unique(columna)
+    posicion = np.searchsorted(niveles, columna)
+    conteo = np.bincount(codigos * len(niveles) + posicion, minlength=len(dependencias) * len(niveles))
+    return pd.DataFrame(
+        conteo.reshape(len(dependencias), len(niveles)),
+        index=pd.Index(dependencias, name="dependencia_general"),
+        columns=pd.Index(niveles, name=clave),
+    )
+
+
+def correlacion_con_calificacion(matriz: MatrizFactores, valores="puntajes") -> pd.Series:
+    """Correlación de Pearson de cada factor con la calificación final
+    (ordinal, de menor a mayor). NaN si el factor o la calificación no varían."""
+    datos = getattr(matriz, valores).astype(np.float64)
+    datos[datos == SIN_VALOR] = np.nan
+    calificacion = np.where(matriz.calificacion == SIN_VALOR, np.nan, matriz.calificacion).astype(np.float64)
+
+    validos = ~np.isnan(datos) & ~np.isnan(calificacion)[:, None]
+    n = validos.sum(axis=0)
+    x = np.where(validos, datos, 0.0)
+    y = np.where(validos, calificacion[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = x.sum(axis=0) / n
+        media_y = y.sum(axis=0) / n
+        dx = np.where(validos, x - media_x, 0.0)
+        dy = np.where(validos, y - media_y, 0.0)
+        r = (dx * dy).sum(axis=0) / np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+    return pd.Series(r, index=list(matriz.claves), name="correlacion")
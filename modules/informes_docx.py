@@ -0,0 +1,303 @@
+import functools
+import hashlib
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import pandas as pd
+import streamlit as st
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Cm, Pt, RGBColor
+from docx.table import Table
+
+from modules import repositorio
+
+# Motor común de los informes DOCX.
+#
+# Cada documento parte de una plantilla ya configurada (márgenes y fuente),
+# que se arma una sola vez por proceso y se reutiliza desde memoria. Las tablas
+# no se construyen celda por celda con python-docx: se genera el XML completo
+# de la tabla (sombreado y formato incluidos) y se inserta con un único parse.
+# El resultado se escribe en un buffer en memoria, sin archivos temporales.
+#
+# Los informes no se generan al dibujar la vista: se piden con un botón y los
+# bytes quedan en la caché compartida de `repositorio`, con clave en la huella
+# del contenido de los DataFrames de entrada y la dependencia. Mientras los
+# datos no cambien, una nueva descarga no vuelve a armar el documento.
+
+AZUL_INSTITUCIONAL = "104f8e"
+CELESTE = "B7E0F7"
+NEGRO = "000000"
+BLANCO = "FFFFFF"
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+TTL_INFORME_SEG = 600
+TAG_INFORMES = "informes"
+
+_TWIPS_POR_EMU = 1 / 635
+
+
+@functools.lru_cache(maxsize=None)
+def _plantilla(tamanio_normal=None) -> bytes:
+    doc = Document()
+    seccion = doc.sections[0]
+    seccion.top_margin = Cm(2)
+    seccion.bottom_margin = Cm(2)
+    seccion.left_margin = Cm(2)
+    seccion.right_margin = Cm(2)
+    if tamanio_normal:
+        doc.styles["Normal"].font.name = "Calibri"
+        doc.styles["Normal"].font.size = Pt(tamanio_normal)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def nuevo_documento(tamanio_normal=None):
+    """Documento con márgenes de 2 cm; con `tamanio_normal`, estilo Normal en Calibri de ese tamaño."""
+    return Document(BytesIO(_plantilla(tamanio_normal)))
+
+
+def a_bytes(doc) -> bytes:
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def encabezado(doc, texto: str, color=AZUL_INSTITUCIONAL, tamanio=10):
+    """Encabezado de página centrado, en negrita."""
+    p = doc.sections[0].header.paragraphs[0]
+    p.clear()
+    run = p.add_run(texto)
+    run.font.name = "Calibri"
+    run.font.size = Pt(tamanio)
+    run.font.bold = True
+    run.font.color.rgb = RGBColor.from_string(color)
+    p.alignment = 1
+    p.paragraph_format.line_spacing = Pt(12)
+
+
+def titulo(doc, texto: str, color=AZUL_INSTITUCIONAL, tamanio=10, centrado=False):
+    p = doc.add_paragraph()
+    run = p.add_run(texto)
+    run.font.name = "Calibri"
+    run.font.size = Pt(tamanio)
+    run.font.bold = True
+    run.font.color.rgb = RGBColor.from_string(color)
+    if centrado:
+        p.alignment = 1
+
+
+def _propiedades_run(negrita, color, tamanio) -> str:
+    return (
+        '<w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:cs="Calibri"/>'
+        + ("<w:b/>" if negrita else "")
+        + (f'<w:color w:val="{color}"/>' if color else "")
+        + (f'<w:sz w:val="{int(tamanio * 2)}"/>' if tamanio else "")
+        + "</w:rPr>"
+    )
+
+
+def _celda(texto, ancho, propiedades_run, fondo, centrado) -> str:
+    sombreado = f'<w:shd w:val="clear" w:color="auto" w:fill="{fondo}"/>' if fondo else ""
+    alineacion = '<w:pPr><w:jc w:val="center"/></w:pPr>' if centrado else ""
+    return (
+        f'<w:tc><w:tcPr><w:tcW w:w="{ancho}" w:type="dxa"/>{sombreado}</w:tcPr>'
+        f'<w:p>{alineacion}<w:r>{propiedades_run}'
+        f'<w:t xml:space="preserve">{escape(texto)}</w:t></w:r></w:p></w:tc>'
+    )
+
+
+def agregar_tabla(
+    doc, filas, encabezados=None, *,
+    fondo=CELESTE, color_encabezado=NEGRO, tamanio_encabezado=None, negrita_encabezado=True,
+    tamanio=9, color=NEGRO, negrita=False, centrado=False,
+    destacar_primera_columna=False,
+):
+    """Agrega una tabla "Table Grid" con `filas` (iterable de secuencias) y,
+    opcionalmente, una fila de `encabezados` en negrita sobre `fondo`.
+
+    Con `destacar_primera_columna`, la primera celda de cada fila lleva el
+    mismo fondo y va en negrita (tablas de rótulo/valor).
+    """
+    filas = [["" if v is None else str(v) for v in fila] for fila in filas]
+    columnas = len(encabezados) if encabezados else max((len(f) for f in filas), default=1)
+
+    seccion = doc.sections[-1]
+    ancho_total = int((seccion.page_width - seccion.left_margin - seccion.right_margin) * _TWIPS_POR_EMU)
+    ancho = ancho_total // columnas
+
+    run_encabezado = _propiedades_run(negrita_encabezado, color_encabezado, tamanio_encabezado)
+    run_rotulo = _propiedades_run(True, color, tamanio)
+    run_cuerpo = _propiedades_run(negrita, color, tamanio)
+
+    partes = [
+        f"<w:tbl {nsdecls('w')}>"
+        '<w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="0" w:type="auto"/>'
+        '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" '
+        'w:lastColumn="0" w:noHBand="0" w:noVBand="1"/></w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{ancho}"/>' * columnas,
+        "</w:tblGrid>",
+    ]
+    if encabezados:
+        partes.append("<w:tr>")
+        partes.extend(_celda(str(e), ancho, run_encabezado, fondo, centrado) for e in encabezados)
+        partes.append("</w:tr>")
+    for fila in filas:
+        partes.append("<w:tr>")
+        for j, texto in enumerate(fila):
+            if destacar_primera_columna and j == 0:
+                partes.append(_celda(texto, ancho, run_rotulo, fondo, centrado))
+            else:
+                partes.append(_celda(texto, ancho, run_cuerpo, None, centrado))
+        partes.append("</w:tr>")
+    partes.append("</w:tbl>")
+
+    tbl = parse_xml("".join(partes))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
+
+
+# ---- Informes de la vista Evaluaciones ----
+
+def _tabla_institucional(doc, encabezados, filas):
+    agregar_tabla(
+        doc, filas, encabezados, fondo=AZUL_INSTITUCIONAL, color_encabezado=BLANCO,
+        tamanio_encabezado=10, tamanio=10, centrado=True,
+    )
+
+
+def _puntaje(valor):
+    try:
+        valor = float(valor)
+        return int(valor) if valor.is_integer() else valor
+    except (TypeError, ValueError):
+        return valor
+
+
+def informe_unidad_docx(df_base: pd.DataFrame, df_eval: pd.DataFrame, dependencia_nombre: str) -> bytes:
+    """Informe de la unidad: agentes por agrupamiento, nivel y situación, y
+    listados de evaluaciones por tipo de formulario."""
+    doc = nuevo_documento(tamanio_normal=10)
+    encabezado(doc, (
+        f"INSTITUTO NACIONAL DE ESTADISTICA Y CENSOS\n"
+        f"DIRECCIÓN DE CAPACITACIÓN Y CARRERA DE PERSONAL\n"
+        f"EVALUACIÓN DE DESEMPEÑO 2024\n"
+        f"UNIDAD DE ANÁLISIS: {dependencia_nombre}"
+    ))
+
+    doc.add_paragraph()
+    titulo(doc, "PERSONAL TOTAL POR TIPO DE AGRUPAMIENTO")
+    agrupamientos = df_base["agrupamiento"].value_counts()
+    _tabla_institucional(doc, ["GENERAL", "PROFESIONAL"], [[agrupamientos.get("GRAL", 0), agrupamientos.get("PROF", 0)]])
+
+    doc.add_paragraph()
+    titulo(doc, "PERSONAL TOTAL POR TIPO DE NIVEL ESCALAFONARIO")
+    niveles = ["A", "B", "C", "D", "E"]
+    conteo_niveles = df_base["nivel"].value_counts()
+    _tabla_institucional(doc, niveles, [[conteo_niveles.get(n, 0) for n in niveles]])
+
+    doc.add_paragraph()
+    titulo(doc, "PERSONAL PARA EVALUAR/EVALUADO")
+    ingresante = df_base["ingresante"]
+    no_ingresantes = int((ingresante == False).sum())
+    ingresantes = int((ingresante == True).sum())
+    evaluados = int((df_eval["calificacion"] != "").sum())
+    _tabla_institucional(
+        doc,
+        ["PERMANENTES NO INGRESANTE", "PERMANENTES INGRESANTES", "TOTAL A EVALUAR", "TOTAL EVALUADO"],
+        [[no_ingresantes, ingresantes, no_ingresantes + ingresantes, evaluados]],
+    )
+
+    formulario = df_eval["formulario"].astype(str)
+    secciones = [
+        ("EVALUACIONES - NIVEL JERÁRQUICO (FORMULARIO 1)", ["1"]),
+        ("EVALUACIONES - NIVELES MEDIO (FORMULARIOS 2, 3 y 4)", ["2", "3", "4"]),
+        ("EVALUACIONES - NIVELES OPERATIVOS (FORMULARIOS 5 Y 6)", ["5", "6"]),
+    ]
+    for i, (texto, formularios) in enumerate(secciones):
+        doc.add_paragraph()
+        titulo(doc, texto)
+        subset = df_eval[formulario.isin(formularios)].sort_values("apellido_nombre")
+        _tabla_institucional(doc, ["APELLIDOS Y NOMBRES", "CALIFICACIÓN", "PUNTAJE"], [
+            [nombre, calificacion, _puntaje(puntaje)]
+            for nombre, calificacion, puntaje in zip(subset["apellido_nombre"], subset["calificacion"], subset["puntaje_total"])
+        ])
+        if subset.empty:
+            doc.add_paragraph("No hay evaluaciones registradas en este nivel.")
+
+    return a_bytes(doc)
+
+
+def informe_agentes_docx(df_agentes: pd.DataFrame, dependencia_nombre: str) -> bytes:
+    """Listado de agentes de la unidad para la evaluación."""
+    doc = nuevo_documento(tamanio_normal=10)
+    encabezado(doc, (
+        f"INSTITUTO NACIONAL DE ESTADISTICA Y CENSOS\n"
+        f"DIRECCIÓN DE CAPACITACIÓN Y CARRERA DE PERSONAL\n"
+        f"LISTADO DE AGENTES PARA EVALUACIÓN DE DESEMPEÑO 2024\n"
+        f"UNIDAD DE ANÁLISIS: {dependencia_nombre}"
+    ))
+    doc.add_paragraph()
+    titulo(doc, "LISTADO DE AGENTES", centrado=True)
+    doc.add_paragraph()
+
+    ordenado = df_agentes.sort_values("apellido_nombre")
+    agrupamientos = {"PROF": "Profesional", "GRAL": "General"}
+    columnas = {c: ordenado[c] if c in ordenado else [""] * len(ordenado)
+                for c in ("apellido_nombre", "nivel", "grado", "agrupamiento", "tramo", "ingresante")}
+    _tabla_institucional(doc, ["APELLIDO Y NOMBRE", "NIVEL/GRADO", "AGRUPAMIENTO", "TRAMO", "INGRESANTE"], [
+        [nombre, f"{nivel}-{grado}", agrupamientos.get(agrupamiento, ""), tramo, "Sí" if ingresante is True else ""]
+        for nombre, nivel, grado, agrupamiento, tramo, ingresante in zip(*columnas.values())
+    ])
+    return a_bytes(doc)
+
+
+# ---- Generación bajo demanda ----
+
+def huella(*frames: pd.DataFrame) -> str:
+    """Hash del contenido (columnas, tipos, índice y valores) de los DataFrames."""
+    h = hashlib.blake2b(digest_size=16)
+    for df in frames:
+        h.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+        for _, columna in df.items():
+            try:
+                valores = pd.util.hash_array(columna.to_numpy())
+            except TypeError:
+                # Columnas jsonb (dict/list): se hashea su representación
+                valores = pd.util.hash_array(columna.astype(str).to_numpy())
+            h.update(valores.tobytes())
+    return h.hexdigest()
+
+
+def en_cache(nombre: str, dependencia, frames, generar) -> bytes:
+    """Bytes de `generar()`, cacheados por informe, dependencia y contenido de `frames`."""
+    clave = ("informe", nombre, dependencia, huella(*frames))
+    return repositorio.consultar(clave, (TAG_INFORMES,), generar, ttl=TTL_INFORME_SEG)
+
+
+def boton_informe(nombre: str, dependencia, frames, generar, *, etiqueta: str, archivo: str, key: str):
+    """Botón "Generar" que, una vez pulsado, muestra la descarga del informe.
+
+    El pedido queda en session_state bajo `key` (que debe incluir la
+    dependencia), así las ejecuciones siguientes muestran la descarga sin
+    volver a pulsar y un cambio de dependencia vuelve al botón.
+    """
+    pedido = f"_informe_pedido_{key}"
+    if not st.session_state.get(pedido):
+        if not st.button(f"📝 Generar {etiqueta}", key=f"generar_{key}"):
+            return
+        st.session_state[pedido] = True
+
+    with st.spinner("✏️ Generando documento..."):
+        datos = en_cache(nombre, dependencia, frames, generar)
+    st.download_button(
+        label=f"📥 Descargar {etiqueta}",
+        data=datos,
+        file_name=archivo,
+        mime=MIME_DOCX,
+        key=f"descargar_{key}",
+        type="primary",
+    )
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from io import BytesIO
+
+import streamlit as st
+
+from modules.capacitacion_utils import informe_direccion_docx
+
+# Generación en segundo plano del INFORME EVALUACIÓN de todas las dependencias.
+#
+# Cada trabajo reparte un informe por dependencia_general en un pool de
+# procesos compartido por todas las sesiones (st.cache_resource) y, cuando
+# terminan todos, los empaqueta en un ZIP en memoria. El script de Streamlit
+# nunca espera: solo consulta el estado del trabajo por su id, que la vista
+# guarda en la URL para retomarlo después de recargar la página.
+#
+# Los trabajos viven en el proceso del servidor: un reinicio los descarta. Si
+# un proceso del pool muere (por ejemplo, sin memoria), los informes en curso
+# quedan con error y el próximo trabajo arranca con un pool nuevo.
+
+TTL_TRABAJO_SEG = 3600
+MAXIMO_PROCESOS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+EN_CURSO = "en_curso"
+TERMINADO = "terminado"
+
+
+@dataclass
+class Trabajo:
+    id: str
+    total: int
+    creado: float = field(default_factory=time.monotonic)
+    completados: int = 0
+    errores: dict = field(default_factory=dict)  # dependencia -> mensaje
+    informes: dict = field(default_factory=dict)  # dependencia -> bytes del DOCX
+    zip: bytes = None
+
+    @property
+    def estado(self) -> str:
+        return TERMINADO if self.zip is not None else EN_CURSO
+
+    @property
+    def progreso(self) -> float:
+        return self.completados / self.total if self.total else 1.0
+
+
+@st.cache_resource(show_spinner=False)
+def _pool() -> ProcessPoolExecutor:
+    # "spawn": el servidor de Streamlit tiene hilos y un fork podría heredar locks tomados
+    return ProcessPoolExecutor(max_workers=MAXIMO_PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_resource(show_spinner=False)
+def _registro() -> tuple:
+    return {}, threading.Lock()
+
+
+def _archivo(dependencia: str) -> str:
+    return f"INFORME_EVALUACIÓN_{dependencia}.docx".replace("/", "-")
+
+
+def _empaquetar(trabajo: Trabajo) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for dependencia in sorted(trabajo.informes):
+            zf.writestr(_archivo(dependencia), trabajo.informes[dependencia])
+        if trabajo.errores:
+            zf.writestr("ERRORES.txt", "\n".join(f"{d}: {m}" for d, m in sorted(trabajo.errores.items())))
+    return buffer.getvalue()
+
+
+def _al_terminar(trabajo: Trabajo, lock: threading.Lock, dependencia: str):
+    def callback(futuro):
+        informe, error = None, None
+        try:
+            informe = futuro.result()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with lock:
+            if error:
+                trabajo.errores[dependencia] = error
+            else:
+                trabajo.informes[dependencia] = informe
+            trabajo.completados += 1
+            if trabajo.completados == trabajo.total:
+                trabajo.zip = _empaquetar(trabajo)
+                trabajo.informes = {}
+    return callback
+
+
+def _purgar(trabajos: dict):
+    limite = time.monotonic() - TTL_TRABAJO_SEG
+    for id_trabajo in [i for i, t in trabajos.items() if t.creado < limite]:
+        del trabajos[id_trabajo]
+
+
+def _encolar(grupos: list) -> list:
+    """Un futuro por (dependencia, grupo). Un pool roto (murió un proceso) no
+    acepta más tareas: se descarta y se reintenta una vez con uno nuevo."""
+    try:
+        pool = _pool()
+        return [pool.submit(informe_direccion_docx, grupo, dependencia) for dependencia, grupo in grupos]
+    except BrokenProcessPool:
+        pool.shutdown(wait=False, cancel_futures=True)
+        _pool.clear()
+        pool = _pool()
+        return [pool.submit(informe_direccion_docx, grupo, dependencia) for dependencia, grupo in grupos]
+
+
+def iniciar(df_evaluaciones) -> str:
+    """Encola un informe por dependencia_general de `df_evaluaciones` (no
+    anuladas, con formulario) y devuelve el id del trabajo."""
+    trabajos, lock = _registro()
+    grupos = [(dep, grupo) for dep, grupo in df_evaluaciones.groupby("dependencia_general", sort=True)]
+    # Se registra recién con todo encolado: si falla, no queda un trabajo
+    # huérfano EN_CURSO
+    futuros = _encolar(grupos)
+    trabajo = Trabajo(id=uuid.uuid4().hex, total=len(grupos))
+    if not grupos:
+        trabajo.zip = _empaquetar(trabajo)
+    with lock:
+        _purgar(trabajos)
+        trabajos[trabajo.id] = trabajo
+
+    for (dependencia, _), futuro in zip(grupos, futuros):
+        futuro.add_done_callback(_al_terminar(trabajo, lock, dependencia))
+    return trabajo.id
+
+
+def consultar(id_trabajo: str):
+    """El Trabajo con ese id, o None si no existe o ya expiró."""
+    trabajos, lock = _registro()
+    with lock:
+        return trabajos.get(id_trabajo)
@@ -1,8 +1,9 @@
-import streamlit as st
+from modules import sesion
 
 def rol_usuario() -> dict:
     """Devuelve el diccionario de roles del usuario autenticado."""
-    return st.session_state.get("rol", {})
+    perfil = sesion.perfil_actual()
+    return perfil.rol if perfil else {}
 
 def es_coordinador() -> bool:
     return rol_usuario().get("coordinador", False)
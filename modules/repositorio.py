@@ -0,0 +1,215 @@
+import streamlit as st
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+# Capa de acceso a datos compartida por los repositorios de cada tabla.
+#
+# Dos niveles de caché:
+#   1. Memo por ejecución: vive en st.session_state y se vacía al inicio de cada
+#      rerun, así una consulta idéntica dentro del mismo script nunca sale del proceso.
+#   2. Caché compartida entre sesiones: vive en el proceso, con TTL y etiquetas
+#      (por convención, el nombre de la tabla) para invalidar desde las escrituras.
+#      Guarda hasta MAXIMO_ENTRADAS_COMPARTIDA consultas y descarta la usada hace
+#      más tiempo; cada escritura en la caché purga además las vencidas.
+#
+# Cada etiqueta tiene un número de generación que invalidar() incrementa: una
+# consulta que empezó a cargarse antes de invalidar trae datos posiblemente
+# viejos y no se guarda en la caché compartida.
+#
+# Las consultas de Supabase se cachean por su forma (tabla, columnas, filtros y
+# orden) antes de ejecutarlas: un acierto no genera ninguna llamada de red.
+#
+# Los resultados se comparten entre vistas y sesiones: no deben modificarse.
+
+TTL_COMPARTIDA_SEG = 60
+MAXIMO_ENTRADAS_COMPARTIDA = 512
+CLAVE_MEMO = "_memo_consultas"
+# Presupuesto de caracteres para la lista de un filtro `in`: deja margen para el
+# resto de la URL (límite práctico de ~8 KB en el gateway de Supabase)
+MAXIMO_CARACTERES_IN = 6000
+# Filas por pedido al recorrer un resultado completo (tope por defecto de PostgREST en Supabase)
+FILAS_POR_PEDIDO = 1000
+
+_FALTA = object()
+_lock_cache = threading.Lock()
+_cache_compartida = OrderedDict()  # clave -> (expira, valor, tags), de la menos a la más usada
+_indice_tags = {}  # tag -> {claves}
+_generaciones = {}  # tag -> invalidaciones hasta ahora
+
+
+def iniciar_ejecucion():
+    """Descarta el memo de la ejecución anterior. Llamar al comienzo de cada rerun."""
+    st.session_state[CLAVE_MEMO] = {}
+
+
+def _memo() -> dict:
+    if CLAVE_MEMO not in st.session_state:
+        st.session_state[CLAVE_MEMO] = {}
+    return st.session_state[CLAVE_MEMO]
+
+
+def _descartar(clave):
+    """Saca `clave` de la caché y del índice de etiquetas (con _lock_cache tomado)."""
+    _, _, tags = _cache_compartida.pop(clave)
+    for tag in tags:
+        claves = _indice_tags.get(tag)
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del _indice_tags[tag]
+
+
+def _leer_compartida(clave):
+    with _lock_cache:
+        entrada = _cache_compartida.get(clave)
+        if entrada is None:
+            return _FALTA
+        expira, valor, _ = entrada
+        if expira < time.monotonic():
+            _descartar(clave)
+            return _FALTA
+        _cache_compartida.move_to_end(clave)
+        return valor
+
+
+def _generacion(tags) -> tuple:
+    with _lock_cache:
+        return tuple(_generaciones.get(tag, 0) for tag in tags)
+
+
+def _guardar_compartida(clave, valor, tags, ttl, generacion):
+    with _lock_cache:
+        # Invalidada mientras se cargaba: el valor puede ser anterior a la escritura
+        if tuple(_generaciones.get(tag, 0) for tag in tags) != generacion:
+            return
+        ahora = time.monotonic()
+        for vencida in [c for c, (expira, _, _) in _cache_compartida.items() if expira < ahora]:
+            _descartar(vencida)
+        if clave in _cache_compartida:
+            _descartar(clave)
+        _cache_compartida[clave] = (ahora + ttl, valor, tuple(tags))
+        for tag in tags:
+            _indice_tags.setdefault(tag, set()).add(clave)
+        while len(_cache_compartida) > MAXIMO_ENTRADAS_COMPARTIDA:
+            _descartar(next(iter(_cache_compartida)))
+
+
+def consultar(clave, tags, cargar, ttl=TTL_COMPARTIDA_SEG, compartida=True):
+    """Devuelve el resultado de `cargar()` pasando por el memo del rerun y,
+    si `compartida`, por la caché entre sesiones.
+
+    `clave` debe ser hashable e identificar la consulta; `tags` son las
+    etiquetas con las que se invalidará (normalmente, las tablas leídas).
+    """
+    memo = _memo()
+    if clave in memo:
+        return memo[clave]
+
+    valor = _leer_compartida(clave) if compartida else _FALTA
+    if valor is _FALTA:
+        generacion = _generacion(tags)
+        valor = cargar()
+        if compartida:
+            _guardar_compartida(clave, valor, tags, ttl, generacion)
+
+    memo[clave] = valor
+    return valor
+
+
+def clave_consulta(query) -> tuple:
+    """Forma de una consulta sin ejecutar: método, tabla, parámetros
+    (select, filtros, order, limit), cabeceras que cambian la respuesta y
+    rango (paginado con `.range()`)."""
+    return (
+        query.http_method,
+        query.path,
+        tuple(sorted(query.params.multi_items())),
+        query.headers.get("accept", ""),
+        query.headers.get("prefer", ""),
+        query.headers.get("range", ""),
+    )
+
+
+def tabla_consulta(query) -> str:
+    return query.path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def ejecutar(query, ttl=TTL_COMPARTIDA_SEG):
+    """Ejecuta una consulta de lectura pasando por el memo y la caché compartida.
+    Se invalida con el nombre de la tabla consultada."""
+    def cargar():
+        respuesta = query.execute()
+        return respuesta.data if respuesta is not None else None
+
+    return consultar(clave_consulta(query), (tabla_consulta(query),), cargar, ttl)
+
+
+def ejecutar_paginado(query, orden: str, ttl=TTL_COMPARTIDA_SEG) -> list:
+    """Como `ejecutar`, pero con todas las filas aunque superen el tope por
+    respuesta de PostgREST: las pide de a FILAS_POR_PEDIDO con `.range()`.
+    `orden` debe ser un orden total (terminar en la clave primaria) para que
+    los pedidos no se solapen ni salteen filas. Se cachea como una sola consulta."""
+    query = query.order(orden)
+    clave = clave_consulta(query) + ("paginado",)
+
+    def cargar():
+        filas, desde = [], 0
+        while True:
+            # En postgrest-py 0.10 el fin de `.range()` es exclusivo
+            lote = query.range(desde, desde + FILAS_POR_PEDIDO).execute().data or []
+            filas.extend(lote)
+            if len(lote) < FILAS_POR_PEDIDO:
+                return filas
+            desde += FILAS_POR_PEDIDO
+
+    return consultar(clave, (tabla_consulta(query),), cargar, ttl)
+
+
+def contar(query, ttl=TTL_COMPARTIDA_SEG) -> int:
+    """Cantidad de filas de una consulta armada con `select(..., count="exact")`.
+    Se cachea igual que `ejecutar`."""
+    query = query.limit(1)
+
+    def cargar():
+        return query.execute().count or 0
+
+    return consultar(clave_consulta(query) + ("count",), (tabla_consulta(query),), cargar, ttl)
+
+
+def lotes_in(valores, maximo_caracteres=MAXIMO_CARACTERES_IN):
+    """Parte `valores` en listas cuya representación en un filtro `in` entra en
+    `maximo_caracteres`."""
+    lote, largo = [], 0
+    for valor in valores:
+        largo_valor = len(str(valor)) + 3  # comillas y coma
+        if lote and largo + largo_valor > maximo_caracteres:
+            yield lote
+            lote, largo = [], 0
+        lote.append(valor)
+        largo += largo_valor
+    if lote:
+        yield lote
+
+
+def consulta_cacheada(ttl=TTL_COMPARTIDA_SEG):
+    """Decorador para funciones que arman una consulta de Supabase sin llamar a
+    `.execute()`: la ejecuta con `ejecutar` y devuelve los datos."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return ejecutar(funcion(*args, **kwargs), ttl=ttl)
+        return envoltura
+    return decorador
+
+
+def invalidar(*tags):
+    """Descarta todas las consultas cacheadas con alguna de las etiquetas dadas."""
+    with _lock_cache:
+        for tag in tags:
+            _generaciones[tag] = _generaciones.get(tag, 0) + 1
+            for clave in list(_indice_tags.get(tag, ())):
+                _descartar(clave)
+    # La escritura ocurrió en este rerun: las lecturas siguientes deben ver el cambio
+    st.session_state[CLAVE_MEMO] = {}
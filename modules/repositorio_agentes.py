@@ -0,0 +1,99 @@
+from modules import repositorio
+
+TABLA = "agentes"
+# Las opciones de filtros cambian poco y las reasignaciones las invalidan
+TTL_VALORES_DISTINTOS_SEG = 600
+# Filas por pedido al recorrer un resultado completo (tope por defecto de PostgREST en Supabase)
+FILAS_POR_PEDIDO = 1000
+
+COLUMNAS_FORMULARIO = (
+    "cuil, apellido_nombre, ingresante, nivel, grado, tramo, agrupamiento, dependencia, "
+    "dependencia_general, ultima_calificacion, calificaciones_corrimiento, activo, "
+    "motivo_inactivo, fecha_inactivo"
+)
+
+
+def listar(supabase, columnas: str = "*", orden: str = None, **filtros) -> list:
+    """Agentes que cumplen las igualdades `filtros` (columna=valor)."""
+    query = supabase.table(TABLA).select(columnas)
+    for columna, valor in filtros.items():
+        query = query.eq(columna, valor)
+    if orden:
+        query = query.order(orden)
+    return repositorio.ejecutar(query) or []
+
+
+def valores_distintos(supabase, columna: str) -> list:
+    """Valores distintos no nulos de `columna`, ordenados (ver sql/valores_distintos.sql)."""
+    def cargar():
+        filas = supabase.rpc("valores_distintos_agentes", {"p_columna": columna}).execute().data or []
+        return [f["valor"] for f in filas]
+
+    return repositorio.consultar(("distintos", TABLA, columna), (TABLA,), cargar, ttl=TTL_VALORES_DISTINTOS_SEG)
+
+
+def _filtrados(query, busqueda: str = None, **filtros):
+    for columna, valor in filtros.items():
+        query = query.eq(columna, valor)
+    if busqueda:
+        # * es el comodín de PostgREST en like/ilike; se descartan los del usuario
+        query = query.ilike("apellido_nombre", f"*{busqueda.replace('*', '').strip()}*")
+    return query
+
+
+def contar(supabase, busqueda: str = None, **filtros) -> int:
+    """Cantidad de agentes que cumplen `filtros` y la búsqueda por nombre."""
+    return repositorio.contar(_filtrados(supabase.table(TABLA).select("cuil", count="exact"), busqueda, **filtros))
+
+
+def pagina(supabase, columnas: str, numero: int, tamanio: int, orden: str = "apellido_nombre",
+           descendente: bool = False, busqueda: str = None, **filtros) -> list:
+    """Página `numero` (desde 0) de `tamanio` agentes, filtrada y ordenada en
+    el servidor. El CUIL desempata el orden para que las páginas no se solapen."""
+    desde = numero * tamanio
+    query = _filtrados(supabase.table(TABLA).select(columnas), busqueda, **filtros)
+    query = query.order(f"{orden}{'.desc' if descendente else ''},cuil").range(desde, desde + tamanio)
+    return repositorio.ejecutar(query) or []
+
+
+def todas_las_paginas(supabase, columnas: str, orden: str = "apellido_nombre",
+                      descendente: bool = False, busqueda: str = None, **filtros) -> list:
+    """Todos los agentes filtrados, pedidos de a FILAS_POR_PEDIDO en el mismo orden que `pagina`."""
+    filas, numero = [], 0
+    while True:
+        lote = pagina(supabase, columnas, numero, FILAS_POR_PEDIDO, orden, descendente, busqueda, **filtros)
+        filas.extend(lote)
+        if len(lote) < FILAS_POR_PEDIDO:
+            return filas
+        numero += 1
+
+
+def pendientes_de_evaluador(supabase, usuario: str) -> list:
+    """Agentes asignados a `usuario` que aún no tienen evaluación registrada."""
+    return listar(
+        supabase, COLUMNAS_FORMULARIO, orden="apellido_nombre",
+        evaluador_2024=usuario, evaluado_2024=False
+    )
+
+
+def por_dependencia_general(supabase, dependencia_general: str, columnas: str = "*") -> list:
+    return listar(supabase, columnas, dependencia_general=dependencia_general)
+
+
+def por_dependencia(supabase, dependencia: str, columnas: str = "*") -> list:
+    return listar(supabase, columnas, dependencia=dependencia)
+
+
+def marcar_evaluado(supabase, cuil: str, evaluado: bool = True):
+    supabase.table(TABLA).update({"evaluado_2024": evaluado}).eq("cuil", cuil).execute()
+    repositorio.invalidar(TABLA)
+
+
+def actualizar_asignacion(supabase, cuil: str, dependencia: str, dependencia_general: str, evaluador: str):
+    """Reasigna dependencia y evaluador 2024 de un agente."""
+    supabase.table(TABLA).update({
+        "dependencia": dependencia,
+        "dependencia_general": dependencia_general,
+        "evaluador_2024": evaluador
+    }).eq("cuil", cuil).execute()
+    repositorio.invalidar(TABLA)
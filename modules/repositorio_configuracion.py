@@ -0,0 +1,22 @@
+from modules import repositorio
+
+TABLA = "configuracion"
+
+
+def todas(supabase) -> list:
+    return repositorio.ejecutar(supabase.table(TABLA).select("*")) or []
+
+
+def valor(supabase, id_config: str, defecto=True):
+    """Valor del parámetro `id_config`, o `defecto` si no está definido."""
+    item = next((c for c in todas(supabase) if c.get("id") == id_config), None)
+    return item["valor"] if item else defecto
+
+
+def guardar(supabase, id_config: str, nuevo_valor, usuario: str):
+    supabase.table(TABLA).upsert({
+        "id": id_config,
+        "valor": nuevo_valor,
+        "actualizado_por": usuario
+    }).execute()
+    repositorio.invalidar(TABLA)
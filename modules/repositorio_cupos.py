@@ -0,0 +1,27 @@
+from modules import repositorio
+
+# Contadores de cupo DESTACADO por dependencia general (sql/cupo_destacados.sql).
+# Los mantienen triggers sobre agentes y evaluaciones, así que una escritura en
+# cualquiera de esas tablas también invalida lo cacheado aquí.
+
+TABLA = "cupo_destacados"
+TAGS = (TABLA, "agentes", "evaluaciones")
+
+
+def de_dependencia_general(supabase, dependencia_general: str) -> dict:
+    """Fila de la dependencia general (agentes_activos, destacados, cupo y
+    disponibles); con ceros si todavía no tiene agentes activos ni DESTACADOS."""
+    query = (
+        supabase.table(TABLA)
+        .select("agentes_activos, destacados, cupo")
+        .eq("dependencia_general", dependencia_general)
+        .limit(1)
+    )
+
+    def cargar():
+        filas = query.execute().data or []
+        return filas[0] if filas else {"agentes_activos": 0, "destacados": 0, "cupo": 0}
+
+    fila = dict(repositorio.consultar(repositorio.clave_consulta(query), TAGS, cargar))
+    fila["disponibles"] = max(0, fila["cupo"] - fila["destacados"])
+    return fila
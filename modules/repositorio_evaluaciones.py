@@ -0,0 +1,120 @@
+from postgrest.exceptions import APIError
+
+from modules import repositorio
+
+TABLA = "evaluaciones"
+# SQLSTATE con el que registrar_evaluacion rechaza un DESTACADO sin cupo
+SIN_CUPO_DESTACADOS = "EV001"
+
+# Columnas de los listados: sin los JSON de factores
+COLUMNAS_LISTADO = (
+    "id_evaluacion, cuil, apellido_nombre, formulario, calificacion, puntaje_total, "
+    "evaluador, fecha_evaluacion, anulada, dependencia_general"
+)
+# Columnas de los indicadores y del informe de una unidad
+COLUMNAS_RESUMEN = "cuil, formulario, calificacion, puntaje_total"
+# Orden total de los listados: las páginas pedidas por rango no se solapan
+ORDEN_LISTADO = ("apellido_nombre", "fecha_evaluacion", "id_evaluacion")
+
+
+def listar(supabase, columnas: str = "*", **filtros) -> list:
+    """Evaluaciones que cumplen las igualdades `filtros` (columna=valor), todas
+    aunque pasen del tope de filas por respuesta (se piden por páginas)."""
+    query = supabase.table(TABLA).select(columnas)
+    for columna, valor in filtros.items():
+        query = query.eq(columna, valor)
+    return repositorio.ejecutar_paginado(query, "id_evaluacion")
+
+
+def por_cuils(supabase, cuils: list, columnas: str = "*") -> list:
+    """Evaluaciones de los `cuils`, en tantas consultas como haga falta para no
+    exceder el largo de URL."""
+    filas = []
+    for lote in repositorio.lotes_in(cuils):
+        query = supabase.table(TABLA).select(columnas).in_("cuil", lote)
+        filas += repositorio.ejecutar(query) or []
+    return filas
+
+
+def _de_unidad(query, dependencia_general=None, dependencia=None, anulada=None, calificacion=None):
+    if dependencia_general:
+        query = query.eq("dependencia_general", dependencia_general)
+    if dependencia:
+        query = query.eq("dependencia", dependencia)
+    if calificacion:
+        query = query.eq("calificacion", calificacion)
+    if anulada is True:
+        query = query.is_("anulada", "true")
+    elif anulada is False:
+        query = query.not_.is_("anulada", "true")
+    return query
+
+
+def de_unidad(supabase, columnas: str = COLUMNAS_LISTADO, **unidad) -> list:
+    """Evaluaciones de una dependencia general o de una dependencia, filtradas
+    en el servidor por la unidad guardada en cada evaluación (la del agente al
+    momento del alta). `unidad`: dependencia_general, dependencia, anulada,
+    calificacion. Se pide de a páginas: no se corta en el tope por respuesta."""
+    query = _de_unidad(supabase.table(TABLA).select(columnas), **unidad)
+    return repositorio.ejecutar_paginado(query, ",".join(ORDEN_LISTADO))
+
+
+def contar_de_unidad(supabase, **unidad) -> int:
+    query = _de_unidad(supabase.table(TABLA).select("id_evaluacion", count="exact"), **unidad)
+    return repositorio.contar(query)
+
+
+def pagina_de_unidad(supabase, numero: int, tamanio: int, columnas: str = COLUMNAS_LISTADO, **unidad) -> list:
+    """Página `numero` (desde 0) de `tamanio` evaluaciones en ORDEN_LISTADO,
+    pedida directamente por rango, sin leer las páginas anteriores."""
+    desde = numero * tamanio
+    query = _de_unidad(supabase.table(TABLA).select(columnas), **unidad)
+    return repositorio.ejecutar(query.order(",".join(ORDEN_LISTADO)).range(desde, desde + tamanio)) or []
+
+
+def destacados_de_dependencia_general(supabase, dependencia_general: str, anio: int = 2024) -> list:
+    return listar(
+        supabase, "id_evaluacion, calificacion, anulada, dependencia_general",
+        anio_evaluacion=anio, calificacion="DESTACADO", dependencia_general=dependencia_general
+    )
+
+
+class CupoDestacadosAgotado(Exception):
+    """La dependencia general ya usó todo su cupo de calificaciones DESTACADO."""
+
+
+def registrar(supabase, datos: dict, clave_idempotencia: str) -> dict:
+    """Alta atómica (sql/registrar_evaluacion.sql): completa la unidad de la
+    dependencia, inserta y marca al agente como evaluado. Repetir la misma
+    `clave_idempotencia` no duplica la evaluación. Un DESTACADO reserva cupo
+    en la misma transacción; sin cupo lanza CupoDestacadosAgotado.
+
+    Devuelve id_evaluacion, dependencia_general y duplicada.
+    """
+    try:
+        respuesta = supabase.rpc("registrar_evaluacion", {
+            "p_evaluacion": datos,
+            "p_clave_idempotencia": clave_idempotencia,
+        }).execute()
+    except APIError as e:
+        if e.code != SIN_CUPO_DESTACADOS:
+            raise
+        # Otro evaluador pudo haber usado el cupo: lo cacheado ya no vale
+        repositorio.invalidar(TABLA)
+        raise CupoDestacadosAgotado(e.message) from e
+    repositorio.invalidar(TABLA, "agentes")
+    return (respuesta.data or [{}])[0]
+
+
+def anular(supabase, ids_evaluacion: list) -> list:
+    """Anula las evaluaciones y deja a sus agentes pendientes, en una sola
+    llamada (sql/anular_evaluaciones.sql).
+
+    Devuelve una fila por id: id_evaluacion, cuil, dependencia_general y
+    resultado ('anulada', 'ya_anulada' o 'inexistente').
+    """
+    respuesta = supabase.rpc("anular_evaluaciones", {
+        "p_ids": [str(i) for i in ids_evaluacion],
+    }).execute()
+    repositorio.invalidar(TABLA, "agentes")
+    return respuesta.data or []
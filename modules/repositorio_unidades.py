@@ -0,0 +1,25 @@
+from modules import repositorio
+
+TABLA = "unidades_evaluacion"
+
+# Las unidades de evaluación casi no cambian: se mantienen más tiempo en caché
+TTL_UNIDADES_SEG = 600
+
+
+def todas(supabase) -> list:
+    query = supabase.table(TABLA).select("*")
+    return repositorio.ejecutar(query, ttl=TTL_UNIDADES_SEG) or []
+
+
+def por_dependencia(supabase, dependencia: str):
+    """Unidad evaluadora, de análisis y dependencia general de una dependencia (o None)."""
+    return next((u for u in todas(supabase) if u.get("dependencia") == dependencia), None)
+
+
+def dependencias_de_general(supabase, dependencia_general: str, excluir: str = None) -> list:
+    """Dependencias (ordenadas, sin repetir) que pertenecen a una dependencia general."""
+    return sorted({
+        u["dependencia"] for u in todas(supabase)
+        if u.get("dependencia_general") == dependencia_general
+        and u.get("dependencia") and u["dependencia"] != excluir
+    })
@@ -0,0 +1,105 @@
+import streamlit as st
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+CLAVE_PERFIL = "perfil"
+CLAVE_VERSION_PERFIL = "perfil_version"
+ROLES_CON_DEPENDENCIA_GENERAL = ("rrhh", "coordinador", "evaluador_general")
+
+# ---- Versiones de perfil por usuario (compartidas entre sesiones) ----
+_lock_versiones = threading.Lock()
+_versiones_perfil = {}
+
+
+@dataclass(frozen=True)
+class PerfilUsuario:
+    """Datos del usuario autenticado, cargados una única vez por sesión."""
+    usuario: str
+    nombre_completo: str = ""
+    dependencia: str = ""
+    dependencia_general: str = ""
+    rol: dict = field(default_factory=dict)
+    cambiar_password: bool = False
+
+    def tiene_rol(self, *roles) -> bool:
+        return any(self.rol.get(r, False) for r in roles)
+
+
+def parsear_rol(rol_raw) -> dict:
+    """Normaliza la columna `rol` (JSON en texto o dict) a un diccionario."""
+    if isinstance(rol_raw, str):
+        try:
+            rol_raw = json.loads(rol_raw)
+        except json.JSONDecodeError:
+            return {}
+    return rol_raw if isinstance(rol_raw, dict) else {}
+
+
+def cargar_perfil(supabase, usuario: str) -> Optional[PerfilUsuario]:
+    """Consulta `usuarios` y arma el perfil. Devuelve None si el usuario no existe."""
+    respuesta = supabase.table("usuarios")\
+        .select("dependencia, dependencia_general, apellido_nombre, rol, cambiar_password")\
+        .eq("usuario", usuario).maybe_single().execute()
+    datos = respuesta.data if respuesta else None
+    if not datos:
+        return None
+
+    rol = parsear_rol(datos.get("rol", ""))
+    if any(rol.get(r) for r in ROLES_CON_DEPENDENCIA_GENERAL):
+        dependencia_general = datos.get("dependencia_general") or ""
+    else:
+        dependencia_general = ""
+
+    return PerfilUsuario(
+        usuario=usuario,
+        nombre_completo=datos.get("apellido_nombre") or "",
+        dependencia=datos.get("dependencia") or "",
+        dependencia_general=dependencia_general,
+        rol=rol,
+        cambiar_password=bool(datos.get("cambiar_password", False)),
+    )
+
+
+def _version_perfil(usuario: str) -> int:
+    with _lock_versiones:
+        return _versiones_perfil.get(usuario, 0)
+
+
+def iniciar_sesion(supabase, usuario: str) -> PerfilUsuario:
+    """Devuelve el perfil de la sesión, consultando la base solo si aún no se cargó
+    o si fue invalidado desde otra sesión."""
+    version = _version_perfil(usuario)
+    perfil = st.session_state.get(CLAVE_PERFIL)
+    if (
+        perfil is None
+        or perfil.usuario != usuario
+        or st.session_state.get(CLAVE_VERSION_PERFIL) != version
+    ):
+        perfil = cargar_perfil(supabase, usuario)
+        if perfil is None:
+            st.error("❌ No se pudieron cargar los datos del usuario.")
+            st.stop()
+        st.session_state[CLAVE_PERFIL] = perfil
+        st.session_state[CLAVE_VERSION_PERFIL] = version
+    return perfil
+
+
+def perfil_actual() -> Optional[PerfilUsuario]:
+    """Perfil del usuario autenticado, o None si no hay sesión iniciada."""
+    return st.session_state.get(CLAVE_PERFIL)
+
+
+def invalidar_perfil(usuario: str):
+    """Marca el perfil de `usuario` como desactualizado en todas sus sesiones
+    (cambio de clave o de rol). Se recarga en el próximo rerun."""
+    with _lock_versiones:
+        _versiones_perfil[usuario] = _versiones_perfil.get(usuario, 0) + 1
+
+
+def refrescar_perfil():
+    """Descarta el perfil de la sesión actual (por ejemplo, al cerrar sesión)."""
+    st.session_state.pop(CLAVE_PERFIL, None)
+    st.session_state.pop(CLAVE_VERSION_PERFIL, None)
+
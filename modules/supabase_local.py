@@ -0,0 +1,965 @@
+import json
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import bcrypt
+import httpx
+import pandas as pd
+import yaml
+from supabase import create_client
+
+from modules.capacitacion_bdd import recalcular_grupos
+from modules.catalogo_formularios import RUTA_FORMULARIOS, compilar
+
+# Backend local de Supabase para pruebas y benchmarks, sin red.
+#
+# El cliente es un supabase.Client de verdad: lo único que cambia es el
+# transporte HTTP de PostgREST, que en lugar de salir a la red interpreta el
+# pedido (tabla, select, filtros, order, limit/Range, Prefer, RPC) contra una
+# base SQLite. Así la aplicación usa los mismos builders de postgrest-py y
+# repositorio.clave_consulta ve las mismas consultas que en producción.
+#
+# Las tablas replican las columnas que usa la aplicación; cupo_destacados se
+# mantiene con triggers como en sql/cupo_destacados.sql y las funciones de
+# sql/*.sql están reimplementadas en Python (RPCS). Las escrituras toman el
+# lock de escritura de SQLite (BEGIN IMMEDIATE), que además serializa a los
+# procesos que comparten el mismo archivo.
+#
+# Cada pedido puede esperar una latencia fija más una proporcional al tamaño
+# de la respuesta, para modelar el viaje de ida y vuelta a Supabase.
+#
+# Las RPC locales no ejecutan sql/*.sql: tests/test_rpcs_sql.py y
+# tests/test_analisis_bdd_sql.py comparan cada una con su función de sql/ en un
+# PostgreSQL real. Los benchmarks que corren acá lo dicen en su salida
+# (DESCRIPCION_BACKEND).
+
+URL_LOCAL = "http://supabase.local"
+# create_client exige una clave con forma de JWT; no se valida
+CLAVE_LOCAL = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bG9jYWw"
+# Contraseña de todos los usuarios sembrados
+CONTRASENIA_SEMBRADA = "local1234"
+# Para la salida de los benchmarks: qué se midió
+DESCRIPCION_BACKEND = "local (SQLite; RPC en Python, no las funciones de sql/*.sql)"
+
+TEXTO, ENTERO, REAL, BOOLEANO, JSONB = "text", "integer", "real", "boolean", "jsonb"
+
+ESQUEMA = {
+    "agentes": {
+        "cuil": TEXTO, "apellido_nombre": TEXTO, "ingresante": BOOLEANO, "nivel": TEXTO,
+        "grado": ENTERO, "tramo": TEXTO, "agrupamiento": TEXTO, "dependencia": TEXTO,
+        "dependencia_general": TEXTO, "ultima_calificacion": TEXTO,
+        "calificaciones_corrimiento": TEXTO, "activo": BOOLEANO, "motivo_inactivo": TEXTO,
+        "fecha_inactivo": TEXTO, "evaluador_2024": TEXTO, "evaluado_2024": BOOLEANO,
+    },
+    "evaluaciones": {
+        "id_evaluacion": TEXTO, "cuil": TEXTO, "apellido_nombre": TEXTO, "nivel": TEXTO,
+        "grado": ENTERO, "tramo": TEXTO, "agrupamiento": TEXTO, "dependencia": TEXTO,
+        "dependencia_general": TEXTO, "unidad_evaluadora": TEXTO, "unidad_analisis": TEXTO,
+        "anio_evaluacion": ENTERO, "evaluador": TEXTO, "formulario": ENTERO,
+        "factor_puntaje": JSONB, "factor_posicion": JSONB, "puntaje_total": ENTERO,
+        "ultima_calificacion": TEXTO, "calificaciones_corrimiento": TEXTO,
+        "puntaje_maximo": ENTERO, "puntaje_relativo": REAL, "calificacion": TEXTO,
+        "fecha_notificacion": TEXTO, "fecha_evaluacion": TEXTO, "residual": BOOLEANO,
+        "bonificacion_elegible": BOOLEANO, "bonificacion_manual": BOOLEANO, "anulada": BOOLEANO,
+        "activo": BOOLEANO, "motivo_inactivo": TEXTO, "fecha_inactivo": TEXTO, "clave_idempotencia": TEXTO,
+    },
+    "usuarios": {
+        "usuario": TEXTO, "password": TEXTO, "apellido_nombre": TEXTO, "rol": JSONB,
+        "dependencia": TEXTO, "dependencia_general": TEXTO, "activo": BOOLEANO,
+        "cambiar_password": BOOLEANO,
+    },
+    "unidades_evaluacion": {
+        "dependencia": TEXTO, "dependencia_general": TEXTO, "unidad_evaluadora": TEXTO,
+        "unidad_analisis": TEXTO,
+    },
+    "configuracion": {"id": TEXTO, "valor": JSONB, "actualizado_por": TEXTO},
+    "cupo_destacados": {
+        "dependencia_general": TEXTO, "agentes_activos": ENTERO, "destacados": ENTERO, "cupo": ENTERO,
+    },
+}
+CLAVE_PRIMARIA = {
+    "agentes": "cuil",
+    "evaluaciones": "id_evaluacion",
+    "usuarios": "usuario",
+    "unidades_evaluacion": "dependencia",
+    "configuracion": "id",
+    "cupo_destacados": "dependencia_general",
+}
+# Valores por defecto de las columnas que completa la base
+DEFECTOS = {
+    "evaluaciones": {
+        "id_evaluacion": lambda: str(uuid.uuid4()),
+        "fecha_evaluacion": lambda: datetime.now(timezone.utc).isoformat(),
+        "anulada": lambda: False,
+        "bonificacion_elegible": lambda: False,
+        "bonificacion_manual": lambda: False,
+    },
+}
+
+_DDL_EXTRA = """
+create unique index if not exists evaluaciones_clave_idempotencia_key on evaluaciones (clave_idempotencia);
+create index if not exists evaluaciones_dependencia_general on evaluaciones (dependencia_general);
+create index if not exists evaluaciones_cuil on evaluaciones (cuil);
+create index if not exists agentes_evaluador on agentes (evaluador_2024, evaluado_2024);
+create index if not exists agentes_dependencia_general on agentes (dependencia_general);
+"""
+
+
+def _ddl_tabla(tabla: str) -> str:
+    columnas = []
+    for columna, tipo in ESQUEMA[tabla].items():
+        if tabla == "cupo_destacados" and columna == "cupo":
+            # cupo_destacados_de(): 30 % con las mitades hacia arriba, en enteros
+            columnas.append("cupo integer generated always as ((3 * agentes_activos + 5) / 10) stored")
+            continue
+        definicion = f"{columna} {tipo}"
+        if columna == CLAVE_PRIMARIA[tabla]:
+            definicion += " primary key"
+        elif tabla == "cupo_destacados":
+            definicion += " not null default 0"
+        columnas.append(definicion)
+    return f"create table if not exists {tabla} ({', '.join(columnas)});"
+
+
+# _anio_cupo_destacados() de sql/cupo_destacados.sql: solo los DESTACADO de ese
+# año ocupan cupo
+ANIO_CUPO_DESTACADOS = 2024
+
+
+def _ajuste_cupo(dependencia: str, agentes: int, destacados: int, condicion: str) -> str:
+    return f"""
+        insert into cupo_destacados (dependencia_general, agentes_activos, destacados)
+        select {dependencia}, {agentes}, {destacados} where {dependencia} is not null and ({condicion})
+        on conflict (dependencia_general) do update
+            set agentes_activos = agentes_activos + excluded.agentes_activos,
+                destacados = destacados + excluded.destacados;"""
+
+
+def _ddl_triggers() -> str:
+    # Mismos contadores que sql/cupo_destacados.sql
+    activo_viejo, activo_nuevo = "old.activo is 1", "new.activo is 1"
+    destacado_viejo = (
+        f"old.calificacion = 'DESTACADO' and old.anulada is not 1 and old.anio_evaluacion = {ANIO_CUPO_DESTACADOS}"
+    )
+    destacado_nuevo = (
+        f"new.calificacion = 'DESTACADO' and new.anulada is not 1 and new.anio_evaluacion = {ANIO_CUPO_DESTACADOS}"
+    )
+    return f"""
+    create trigger if not exists cupo_agentes_insert after insert on agentes begin
+        {_ajuste_cupo("new.dependencia_general", 1, 0, activo_nuevo)}
+    end;
+    create trigger if not exists cupo_agentes_delete after delete on agentes begin
+        {_ajuste_cupo("old.dependencia_general", -1, 0, activo_viejo)}
+    end;
+    create trigger if not exists cupo_agentes_update after update of activo, dependencia_general on agentes begin
+        {_ajuste_cupo("old.dependencia_general", -1, 0, activo_viejo)}
+        {_ajuste_cupo("new.dependencia_general", 1, 0, activo_nuevo)}
+    end;
+    create trigger if not exists cupo_evaluaciones_insert after insert on evaluaciones begin
+        {_ajuste_cupo("new.dependencia_general", 0, 1, destacado_nuevo)}
+    end;
+    create trigger if not exists cupo_evaluaciones_delete after delete on evaluaciones begin
+        {_ajuste_cupo("old.dependencia_general", 0, -1, destacado_viejo)}
+    end;
+    create trigger if not exists cupo_evaluaciones_update
+        after update of calificacion, anulada, anio_evaluacion, dependencia_general on evaluaciones begin
+        {_ajuste_cupo("old.dependencia_general", 0, -1, destacado_viejo)}
+        {_ajuste_cupo("new.dependencia_general", 0, 1, destacado_nuevo)}
+    end;
+    """
+
+
+class ErrorLocal(Exception):
+    """Error con la forma de las respuestas de PostgREST (llega al cliente
+    como postgrest.exceptions.APIError con el mismo `code`)."""
+
+    def __init__(self, code: str, message: str, details: str = None, status: int = 400):
+        super().__init__(message)
+        self.code, self.message, self.details, self.status = code, message, details, status
+
+    def cuerpo(self) -> dict:
+        return {"code": self.code, "message": self.message, "details": self.details, "hint": None}
+
+
+# ---- Valores ----
+
+def _a_sqlite(valor, tipo: str):
+    if valor is None:
+        return None
+    if tipo == JSONB:
+        return json.dumps(valor, ensure_ascii=False)
+    if tipo == BOOLEANO:
+        return int(bool(valor))
+    return valor
+
+
+def _de_sqlite(valor, tipo: str):
+    if valor is None:
+        return None
+    if tipo == JSONB:
+        return json.loads(valor)
+    if tipo == BOOLEANO:
+        return bool(valor)
+    return valor
+
+
+def _de_texto(texto: str, tipo: str):
+    """Valor de un filtro de la URL (siempre texto) al tipo de la columna."""
+    if tipo == BOOLEANO:
+        minuscula = texto.lower()
+        if minuscula not in ("true", "false"):
+            raise ErrorLocal("22P02", f'invalid input syntax for type boolean: "{texto}"')
+        return int(minuscula == "true")
+    try:
+        if tipo == ENTERO:
+            return int(texto)
+        if tipo == REAL:
+            return float(texto)
+    except ValueError:
+        raise ErrorLocal("22P02", f'invalid input syntax for type {tipo}: "{texto}"')
+    return texto
+
+
+@lru_cache(maxsize=256)
+def _patron(patron: str, insensible: bool) -> re.Pattern:
+    partes = (".*" if c in "*%" else "." if c == "_" else re.escape(c) for c in patron)
+    return re.compile("".join(partes), re.DOTALL | (re.IGNORECASE if insensible else 0))
+
+
+def _like(valor, patron, insensible) -> int:
+    if valor is None or patron is None:
+        return None
+    return int(_patron(patron, bool(insensible)).fullmatch(str(valor)) is not None)
+
+
+# ---- Sintaxis de PostgREST ----
+
+def _partir(texto: str) -> list:
+    """Parte por comas de primer nivel, respetando paréntesis y comillas."""
+    partes, actual, nivel, comillas, escape = [], [], 0, False, False
+    for c in texto:
+        if escape:
+            actual.append(c)
+            escape = False
+            continue
+        if c == "\\" and comillas:
+            actual.append(c)
+            escape = True
+            continue
+        if c == '"':
+            comillas = not comillas
+        elif not comillas and c == "(":
+            nivel += 1
+        elif not comillas and c == ")":
+            nivel -= 1
+        elif not comillas and nivel == 0 and c == ",":
+            partes.append("".join(actual))
+            actual = []
+            continue
+        actual.append(c)
+    partes.append("".join(actual))
+    return [p for p in partes if p != ""]
+
+
+def _sin_comillas(texto: str) -> str:
+    if len(texto) >= 2 and texto[0] == texto[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", texto[1:-1])
+    return texto
+
+
+class _Consulta:
+    """Traduce los filtros de PostgREST de una tabla a un WHERE de SQLite."""
+
+    OPERADORES = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+    def __init__(self, tabla: str):
+        if tabla not in ESQUEMA:
+            raise ErrorLocal("42P01", f'relation "public.{tabla}" does not exist', status=404)
+        self.tabla = tabla
+        self.tipos = ESQUEMA[tabla]
+        self.condiciones, self.parametros = [], []
+
+    def columna(self, nombre: str) -> str:
+        nombre = nombre.strip()
+        if nombre not in self.tipos:
+            raise ErrorLocal("42703", f"column {self.tabla}.{nombre} does not exist")
+        return nombre
+
+    def condicion(self, columna: str, expresion: str, parametros: list) -> str:
+        """SQL de `columna` con `op.valor` (o `not.op.valor`); agrega parámetros."""
+        negada = expresion.startswith("not.")
+        if negada:
+            expresion = expresion[4:]
+        operador, _, valor = expresion.partition(".")
+        columna = self.columna(columna)
+        tipo = self.tipos[columna]
+
+        if operador in self.OPERADORES:
+            sql = f"{columna} {self.OPERADORES[operador]} ?"
+            parametros.append(_de_texto(_sin_comillas(valor), tipo))
+        elif operador in ("like", "ilike"):
+            sql = f"_like({columna}, ?, {int(operador == 'ilike')})"
+            parametros.append(_sin_comillas(valor))
+        elif operador == "is":
+            literal = {"null": "null", "true": "1", "false": "0"}.get(valor.lower())
+            if literal is None:
+                raise ErrorLocal("PGRST100", f'"failed to parse filter (is.{valor})"')
+            sql = f"{columna} is {literal}"
+        elif operador == "in":
+            valores = [_de_texto(_sin_comillas(v), tipo) for v in _partir(valor.strip()[1:-1])]
+            sql = f"{columna} in ({', '.join('?' * len(valores))})" if valores else "0"
+            parametros.extend(valores)
+        else:
+            raise ErrorLocal("PGRST100", f'"failed to parse filter ({operador}.{valor})"')
+        return f"not ({sql})" if negada else sql
+
+    def logica(self, conector: str, contenido: str, parametros: list) -> str:
+        """Árbol or(...)/and(...) de PostgREST."""
+        partes = []
+        for parte in _partir(contenido):
+            negada = parte.startswith("not.")
+            cuerpo = parte[4:] if negada else parte
+            anidado = re.match(r"^(and|or)\((.*)\)$", cuerpo, re.DOTALL)
+            if anidado:
+                sql = self.logica(anidado.group(1), anidado.group(2), parametros)
+            else:
+                columna, _, expresion = cuerpo.partition(".")
+                sql = self.condicion(columna, expresion, parametros)
+            partes.append(f"not ({sql})" if negada else f"({sql})")
+        return f" {conector} ".join(partes) or "1"
+
+    def filtrar(self, parametros) -> dict:
+        """Aplica los filtros de la URL y devuelve el resto (select, order, ...)."""
+        resto = {}
+        for clave, valor in parametros:
+            if clave in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                resto[clave] = valor
+            elif clave in ("or", "and", "not.or", "not.and"):
+                sql = self.logica(clave.split(".")[-1], valor.strip()[1:-1], self.parametros)
+                self.condiciones.append(f"not ({sql})" if clave.startswith("not.") else f"({sql})")
+            else:
+                self.condiciones.append(self.condicion(clave, valor, self.parametros))
+        return resto
+
+    @property
+    def where(self) -> str:
+        return f" where {' and '.join(self.condiciones)}" if self.condiciones else ""
+
+    def columnas(self, select: str) -> list:
+        if not select or select.strip() == "*":
+            return list(self.tipos)
+        columnas = []
+        for c in select.split(","):
+            columnas.extend(self.tipos if c.strip() == "*" else [self.columna(c)])
+        return columnas
+
+    def orden(self, order: str) -> str:
+        if not order:
+            return ""
+        partes = []
+        for termino in order.split(","):
+            columna, *modificadores = termino.strip().split(".")
+            descendente = "desc" in modificadores
+            nulos_primero = "nullsfirst" in modificadores or (descendente and "nullslast" not in modificadores)
+            partes.append(
+                f"{self.columna(columna)} {'desc' if descendente else 'asc'} nulls {'first' if nulos_primero else 'last'}"
+            )
+        return f" order by {', '.join(partes)}"
+
+
+# ---- Base ----
+
+class BaseLocal:
+    """Base SQLite con las tablas de la aplicación y el intérprete de PostgREST."""
+
+    def __init__(self, ruta: str = ":memory:", latencia_seg: float = 0.0, latencia_por_kb_seg: float = 0.0):
+        self.ruta = ruta
+        self.latencia_seg = latencia_seg
+        self.latencia_por_kb_seg = latencia_por_kb_seg
+        self.llamadas = 0
+        self._lock = threading.RLock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None, timeout=60)
+        self._conexion.create_function("_like", 3, _like, deterministic=True)
+        if ruta != ":memory:":
+            self._conexion.execute("pragma journal_mode = wal")
+        # executescript hace su propio commit: va fuera de una transacción
+        with self._lock:
+            self._conexion.executescript(
+                "\n".join(_ddl_tabla(tabla) for tabla in ESQUEMA) + _DDL_EXTRA + _ddl_triggers()
+            )
+            # Bases creadas antes de que ESQUEMA sumara columnas (como las migraciones de sql/)
+            for tabla, tipos in ESQUEMA.items():
+                existentes = {fila[1] for fila in self._conexion.execute(f"pragma table_xinfo({tabla})")}
+                for columna in tipos.keys() - existentes:
+                    self._conexion.execute(f"alter table {tabla} add column {columna} {tipos[columna]}")
+
+    @contextmanager
+    def transaccion(self):
+        """Cursor dentro de una transacción de escritura (BEGIN IMMEDIATE)."""
+        with self._lock:
+            c = self._conexion.cursor()
+            c.execute("begin immediate")
+            try:
+                yield c
+            except BaseException:
+                c.execute("rollback")
+                raise
+            c.execute("commit")
+
+    def leer(self, sql: str, parametros=()) -> list:
+        with self._lock:
+            c = self._conexion.execute(sql, parametros)
+            columnas = [d[0] for d in c.description]
+            return [dict(zip(columnas, fila)) for fila in c.fetchall()]
+
+    def vacia(self) -> bool:
+        return not self.leer("select 1 from agentes limit 1")
+
+    # ---- Filas ----
+
+    @staticmethod
+    def decodificar(tabla: str, filas: list) -> list:
+        tipos = ESQUEMA[tabla]
+        return [{k: _de_sqlite(v, tipos.get(k, TEXTO)) for k, v in fila.items()} for fila in filas]
+
+    @staticmethod
+    def _fila_sqlite(tabla: str, fila: dict, defectos: bool = True) -> dict:
+        """Columnas conocidas de `fila` (las demás se ignoran, como
+        jsonb_populate_record) convertidas para SQLite, con los defectos."""
+        tipos = ESQUEMA[tabla]
+        completa = {c: f() for c, f in DEFECTOS.get(tabla, {}).items() if defectos and fila.get(c) is None}
+        completa.update({c: v for c, v in fila.items() if c in tipos and not (c in completa and v is None)})
+        return {c: _a_sqlite(v, tipos[c]) for c, v in completa.items()}
+
+    def insertar(self, c, tabla: str, filas: list, conflicto: str = None, columnas_conflicto: str = None) -> list:
+        """INSERT ... RETURNING *. `conflicto`: None, "merge" (upsert) o "ignore"."""
+        devueltas = []
+        for fila in filas:
+            fila = self._fila_sqlite(tabla, fila)
+            if tabla == "cupo_destacados":
+                fila.pop("cupo", None)
+            columnas = list(fila)
+            sql = f"insert into {tabla} ({', '.join(columnas)}) values ({', '.join('?' * len(columnas))})"
+            if conflicto:
+                objetivo = columnas_conflicto or CLAVE_PRIMARIA[tabla]
+                if conflicto == "merge":
+                    asignaciones = ", ".join(f"{col} = excluded.{col}" for col in columnas if col != objetivo)
+                    sql += f" on conflict ({objetivo}) do update set {asignaciones}" if asignaciones else f" on conflict ({objetivo}) do nothing"
+                else:
+                    sql += f" on conflict ({objetivo}) do nothing"
+            try:
+                c.execute(sql + " returning *", list(fila.values()))
+            except sqlite3.IntegrityError as e:
+                raise ErrorLocal("23505", f"duplicate key value violates unique constraint: {e}", status=409)
+            columnas_salida = [d[0] for d in c.description]
+            devueltas += [dict(zip(columnas_salida, f)) for f in c.fetchall()]
+        return self.decodificar(tabla, devueltas)
+
+    # ---- REST ----
+
+    def responder(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.llamadas += 1
+        try:
+            ruta = request.url.path.split("/rest/v1/", 1)[-1].strip("/")
+            cuerpo = json.loads(request.content) if request.content else None
+            if ruta.startswith("rpc/"):
+                estado, datos, encabezados = 200, self.rpc(ruta[4:], cuerpo or {}), {}
+            else:
+                estado, datos, encabezados = self.tabla(request, ruta, cuerpo)
+        except ErrorLocal as e:
+            estado, datos, encabezados = e.status, e.cuerpo(), {}
+        contenido = json.dumps(datos, ensure_ascii=False, default=str).encode()
+        espera = self.latencia_seg + self.latencia_por_kb_seg * len(contenido) / 1024
+        if espera:
+            time.sleep(espera)
+        return httpx.Response(
+            estado, content=contenido,
+            headers={"content-type": "application/json; charset=utf-8", **encabezados},
+            request=request,
+        )
+
+    def tabla(self, request: httpx.Request, tabla: str, cuerpo):
+        consulta = _Consulta(tabla)
+        resto = consulta.filtrar(request.url.params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        objeto = "vnd.pgrst.object" in request.headers.get("accept", "")
+        metodo = request.method
+
+        if metodo == "GET":
+            columnas = consulta.columnas(resto.get("select"))
+            desde, hasta = 0, None
+            rango = request.headers.get("range")
+            if rango:
+                inicio, _, fin = rango.partition("-")
+                desde, hasta = int(inicio), int(fin) if fin else None
+            if "offset" in resto:
+                desde += int(resto["offset"])
+            limite = None if hasta is None else hasta - desde + 1
+            if "limit" in resto:
+                limite = int(resto["limit"]) if limite is None else min(limite, int(resto["limit"]))
+            sql = f"select {', '.join(columnas)} from {tabla}{consulta.where}{consulta.orden(resto.get('order'))}"
+            sql += f" limit {-1 if limite is None else limite} offset {desde}"
+            filas = self.decodificar(tabla, self.leer(sql, consulta.parametros))
+            # Como PostgREST: Content-Range siempre, con el total solo si se pidió count
+            total = "*"
+            if "count=" in prefer:
+                total = self.leer(f"select count(*) as n from {tabla}{consulta.where}", consulta.parametros)[0]["n"]
+            encabezados = {"content-range": f"{desde}-{desde + len(filas) - 1}/{total}" if filas else f"*/{total}"}
+            if objeto:
+                return 200, self._objeto(filas), encabezados
+            return (206 if rango and total != "*" else 200), filas, encabezados
+
+        with self.transaccion() as c:
+            if metodo == "POST":
+                filas = cuerpo if isinstance(cuerpo, list) else [cuerpo]
+                conflicto = "merge" if "merge-duplicates" in prefer else "ignore" if "ignore-duplicates" in prefer else None
+                filas = self.insertar(c, tabla, filas, conflicto, resto.get("on_conflict"))
+                estado = 201
+            elif metodo == "PATCH":
+                for k in cuerpo:
+                    consulta.columna(k)
+                valores = self._fila_sqlite(tabla, cuerpo, defectos=False)
+                asignaciones = ", ".join(f"{k} = ?" for k in valores)
+                c.execute(f"update {tabla} set {asignaciones}{consulta.where} returning *", list(valores.values()) + consulta.parametros)
+                filas, estado = self._devueltas(c, tabla), 200
+            elif metodo == "DELETE":
+                c.execute(f"delete from {tabla}{consulta.where} returning *", consulta.parametros)
+                filas, estado = self._devueltas(c, tabla), 200
+            else:
+                raise ErrorLocal("PGRST117", f"Unsupported HTTP method: {metodo}", status=405)
+        if "return=minimal" in prefer:
+            return 204 if metodo != "POST" else 201, [], {}
+        return estado, (self._objeto(filas) if objeto else filas), {}
+
+    def _devueltas(self, c, tabla: str) -> list:
+        columnas = [d[0] for d in c.description]
+        return self.decodificar(tabla, [dict(zip(columnas, f)) for f in c.fetchall()])
+
+    @staticmethod
+    def _objeto(filas: list) -> dict:
+        if len(filas) != 1:
+            raise ErrorLocal(
+                "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                f"Results contain {len(filas)} rows, application/vnd.pgrst.object+json requires 1 row",
+                status=406,
+            )
+        return filas[0]
+
+    # ---- RPC ----
+
+    def rpc(self, funcion: str, parametros: dict) -> list:
+        implementacion = RPCS.get(funcion)
+        if implementacion is None:
+            raise ErrorLocal("PGRST202", f"Could not find the function public.{funcion} in the schema cache", status=404)
+        return implementacion(self, **parametros)
+
+
+def _analisis_bdd_realizado(c) -> bool:
+    fila = c.execute("select valor from configuracion where id = 'analisis_bdd_realizado'").fetchone()
+    return fila is not None and _de_sqlite(fila[0], JSONB) is True
+
+
+def _registrar_evaluacion(base: BaseLocal, p_evaluacion: dict, p_clave_idempotencia: str) -> list:
+    with base.transaccion() as c:
+        unidad = c.execute(
+            "select dependencia_general, unidad_evaluadora, unidad_analisis from unidades_evaluacion "
+            "where dependencia = ? limit 1", (p_evaluacion.get("dependencia"),)
+        ).fetchone() or (None, None, None)
+        dependencia_general = unidad[0]
+
+        existente = c.execute(
+            "select id_evaluacion, dependencia_general from evaluaciones where clave_idempotencia = ?",
+            (p_clave_idempotencia,)
+        ).fetchone()
+        if existente:
+            return [{"id_evaluacion": existente[0], "dependencia_general": existente[1], "duplicada": True}]
+
+        if (p_evaluacion.get("calificacion") == "DESTACADO" and dependencia_general is not None
+                and int(p_evaluacion.get("anio_evaluacion") or 0) == ANIO_CUPO_DESTACADOS):
+            cupo = c.execute(
+                "select destacados, cupo from cupo_destacados where dependencia_general = ?", (dependencia_general,)
+            ).fetchone() or (0, 0)
+            if cupo[0] >= cupo[1]:
+                raise ErrorLocal("EV001", (
+                    f"No quedan calificaciones DESTACADO en {dependencia_general}: "
+                    f"{cupo[0]} asignada/s de un máximo de {cupo[1]}."
+                ))
+
+        datos = dict(p_evaluacion, dependencia_general=dependencia_general, unidad_evaluadora=unidad[1],
+                     unidad_analisis=unidad[2], clave_idempotencia=p_clave_idempotencia)
+        insertada = base.insertar(c, "evaluaciones", [datos])[0]
+        c.execute("update agentes set evaluado_2024 = 1 where cuil = ?", (p_evaluacion.get("cuil"),))
+        if dependencia_general is not None and _analisis_bdd_realizado(c):
+            _recalcular_bdd(base, c, [dependencia_general])
+    return [{"id_evaluacion": insertada["id_evaluacion"], "dependencia_general": dependencia_general, "duplicada": False}]
+
+
+def _anular_evaluaciones(base: BaseLocal, p_ids: list) -> list:
+    with base.transaccion() as c:
+        filas = {}
+        for id_evaluacion in p_ids:
+            fila = c.execute(
+                "select cuil, dependencia_general, anulada from evaluaciones where id_evaluacion = ?", (id_evaluacion,)
+            ).fetchone()
+            if fila is not None:
+                filas[id_evaluacion] = fila
+        anuladas = {i for i, (_, _, anulada) in filas.items() if anulada != 1}
+        for id_evaluacion in anuladas:
+            c.execute("update evaluaciones set anulada = 1 where id_evaluacion = ?", (id_evaluacion,))
+            c.execute("update agentes set evaluado_2024 = 0 where cuil = ?", (filas[id_evaluacion][0],))
+        if _analisis_bdd_realizado(c):
+            _recalcular_bdd(base, c, sorted({filas[i][1] for i in anuladas if filas[i][1] is not None}))
+
+    resultado = []
+    for id_evaluacion in p_ids:
+        cuil, dependencia_general, _ = filas.get(id_evaluacion, (None, None, None))
+        estado = "anulada" if id_evaluacion in anuladas else "ya_anulada" if id_evaluacion in filas else "inexistente"
+        resultado.append({"id_evaluacion": id_evaluacion, "cuil": cuil, "dependencia_general": dependencia_general, "resultado": estado})
+    return resultado
+
+
+def _aplicar_analisis_bdd(base: BaseLocal, p_filas: list, p_dependencias: list) -> list:
+    with base.transaccion() as c:
+        c.execute(
+            "create temporary table if not exists _analisis_bdd "
+            "(id_evaluacion text primary key, residual integer, bonificacion_elegible integer, bonificacion_manual integer)"
+        )
+        c.execute("delete from _analisis_bdd")
+        c.executemany(
+            "insert or replace into _analisis_bdd values (?, ?, ?, ?)",
+            [
+                (f["id_evaluacion"], _a_sqlite(f.get("residual"), BOOLEANO),
+                 _a_sqlite(f.get("bonificacion_elegible"), BOOLEANO), _a_sqlite(f.get("bonificacion_manual"), BOOLEANO))
+                for f in p_filas
+            ],
+        )
+        c.execute("""
+            update evaluaciones
+               set residual = f.residual, bonificacion_elegible = f.bonificacion_elegible,
+                   bonificacion_manual = coalesce(f.bonificacion_manual, evaluaciones.bonificacion_manual)
+              from _analisis_bdd f
+             where evaluaciones.id_evaluacion = f.id_evaluacion
+               and (evaluaciones.residual is not f.residual
+                    or evaluaciones.bonificacion_elegible is not f.bonificacion_elegible
+                    or evaluaciones.bonificacion_manual is not coalesce(f.bonificacion_manual, evaluaciones.bonificacion_manual))
+        """)
+        actualizadas = c.rowcount
+        c.execute(f"""
+            update evaluaciones
+               set bonificacion_elegible = 0, bonificacion_manual = 0
+             where dependencia_general in ({', '.join('?' * len(p_dependencias))})
+               and (bonificacion_elegible is not 0 or bonificacion_manual = 1)
+               and id_evaluacion not in (select id_evaluacion from _analisis_bdd)
+        """, list(p_dependencias))
+        reseteadas = c.rowcount
+        c.execute("delete from _analisis_bdd")
+    return [{"filas_actualizadas": actualizadas, "bonificaciones_reseteadas": reseteadas}]
+
+
+def _fijar_desempate_bdd(base: BaseLocal, p_filas: list) -> list:
+    with base.transaccion() as c:
+        c.executemany(
+            "update evaluaciones set bonificacion_elegible = ?, bonificacion_manual = 1 where id_evaluacion = ?",
+            [(_a_sqlite(f.get("bonificacion_elegible"), BOOLEANO), f["id_evaluacion"]) for f in p_filas],
+        )
+        actualizadas = c.rowcount
+    return [{"filas_actualizadas": actualizadas}]
+
+
+def _recalcular_bdd(base: BaseLocal, c, dependencias: list) -> int:
+    # Lee, recalcula con capacitacion_bdd.recalcular_grupos (la referencia de
+    # la versión SQL) y escribe con el cursor `c`, dentro de su transacción
+    marcadores = ", ".join("?" * len(dependencias))
+    c.execute(f"""
+        select id_evaluacion, dependencia_general, formulario, calificacion, anulada, puntaje_relativo,
+               residual, bonificacion_elegible, bonificacion_manual
+          from evaluaciones
+         where anulada is not 1 and formulario is not null
+           and (dependencia_general in ({marcadores}) or residual = 1)
+    """, dependencias)
+    filas = base._devueltas(c, "evaluaciones")
+    actualizadas = 0
+    if filas:
+        df = pd.DataFrame(filas)
+        df["nivel"] = df["formulario"].astype(int)
+        cambios = recalcular_grupos(df, dependencias)
+        c.executemany(
+            "update evaluaciones set residual = ?, bonificacion_elegible = ?, bonificacion_manual = ? where id_evaluacion = ?",
+            [
+                (int(residual), int(bonificacion), int(manual), id_evaluacion)
+                for id_evaluacion, residual, bonificacion, manual in zip(
+                    cambios["id_evaluacion"], cambios["residual"],
+                    cambios["bonificacion_elegible"], cambios["bonificacion_manual"],
+                )
+            ],
+        )
+        actualizadas = len(cambios)
+    c.execute(f"""
+        update evaluaciones
+           set bonificacion_elegible = 0, bonificacion_manual = 0
+         where dependencia_general in ({marcadores})
+           and (anulada = 1 or formulario is null)
+           and (bonificacion_elegible = 1 or bonificacion_manual = 1)
+    """, dependencias)
+    actualizadas += c.rowcount
+    return actualizadas
+
+
+def _actualizar_analisis_bdd(base: BaseLocal, p_dependencias: list) -> list:
+    with base.transaccion() as c:
+        actualizadas = _recalcular_bdd(base, c, list(p_dependencias))
+    return [{"filas_actualizadas": actualizadas}]
+
+
+def _valores_distintos_agentes(base: BaseLocal, p_columna: str) -> list:
+    if p_columna not in ESQUEMA["agentes"]:
+        raise ErrorLocal("P0001", f"agentes no tiene la columna {p_columna}")
+    filas = base.leer(f"select distinct cast({p_columna} as text) as valor from agentes where {p_columna} is not null order by 1")
+    if ESQUEMA["agentes"][p_columna] == BOOLEANO:
+        filas = [{"valor": "true" if f["valor"] == "1" else "false"} for f in filas]
+    return filas
+
+
+def _resumen_avance_evaluacion(base: BaseLocal, p_anio: int = 2024) -> list:
+    return base.leer("""
+        select
+            (select count(*) from agentes) as total_agentes,
+            count(distinct cuil) as evaluados,
+            count(*) filter (where calificacion = 'DESTACADO') as destacado,
+            count(*) filter (where calificacion = 'BUENO') as bueno,
+            count(*) filter (where calificacion = 'REGULAR') as regular,
+            count(*) filter (where calificacion = 'DEFICIENTE') as deficiente
+        from evaluaciones
+        where anio_evaluacion = ? and anulada is not 1 and cuil is not null
+    """, (p_anio,))
+
+
+def _avance_por_dependencia_general(base: BaseLocal, p_anio: int = 2024) -> list:
+    return base.leer("""
+        select
+            a.dependencia_general,
+            count(*) as agentes_total,
+            count(*) filter (where exists (
+                select 1 from evaluaciones e
+                 where e.cuil = a.cuil and e.anio_evaluacion = ? and e.anulada is not 1
+            )) as evaluados
+        from agentes a
+        where a.dependencia_general is not null
+        group by a.dependencia_general
+    """, (p_anio,))
+
+
+def _cupo_destacados_por_dependencia(base: BaseLocal) -> list:
+    return base.leer("""
+        with ag as (
+            select dependencia_general, count(*) as total_agentes
+            from agentes where dependencia_general is not null
+            group by dependencia_general
+        ),
+        dest as (
+            select dependencia_general, count(cuil) as evaluados_con_destacado
+            from evaluaciones where calificacion = 'DESTACADO' and anulada is not 1
+            group by dependencia_general
+        )
+        select
+            ag.dependencia_general,
+            ag.total_agentes,
+            (3 * ag.total_agentes + 5) / 10 as cupo_destacados,
+            coalesce(dest.evaluados_con_destacado, 0) as evaluados_con_destacado
+        from ag left join dest on dest.dependencia_general = ag.dependencia_general
+    """)
+
+
+# Funciones de sql/*.sql disponibles como supabase.rpc(nombre, parámetros)
+RPCS = {
+    "registrar_evaluacion": _registrar_evaluacion,
+    "anular_evaluaciones": _anular_evaluaciones,
+    "aplicar_analisis_bdd": _aplicar_analisis_bdd,
+    "fijar_desempate_bdd": _fijar_desempate_bdd,
+    "actualizar_analisis_bdd": _actualizar_analisis_bdd,
+    "valores_distintos_agentes": _valores_distintos_agentes,
+    "resumen_avance_evaluacion": _resumen_avance_evaluacion,
+    "avance_por_dependencia_general": _avance_por_dependencia_general,
+    "cupo_destacados_por_dependencia": _cupo_destacados_por_dependencia,
+}
+
+
+class TransporteLocal(httpx.BaseTransport):
+    def __init__(self, base: BaseLocal):
+        self.base = base
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        return self.base.responder(request)
+
+
+# ---- Datos sintéticos ----
+
+APELLIDOS = (
+    "GONZÁLEZ", "RODRÍGUEZ", "GÓMEZ", "FERNÁNDEZ", "LÓPEZ", "DÍAZ", "MARTÍNEZ", "PÉREZ",
+    "GARCÍA", "SÁNCHEZ", "ROMERO", "SOSA", "ÁLVAREZ", "TORRES", "RUIZ", "RAMÍREZ",
+    "FLORES", "BENÍTEZ", "ACOSTA", "MEDINA", "HERRERA", "SUÁREZ", "AGUIRRE", "GIMÉNEZ",
+)
+NOMBRES = (
+    "MARÍA", "JUAN", "ANA", "CARLOS", "LAURA", "JORGE", "SILVIA", "LUIS", "PATRICIA",
+    "DIEGO", "VERÓNICA", "PABLO", "GABRIELA", "MARCELO", "CLAUDIA", "SERGIO",
+)
+
+
+def _hash(contrasenia: str) -> str:
+    # Pocas rondas: sembrar cientos de usuarios no debe tardar minutos
+    return bcrypt.hashpw(contrasenia.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+
+def _respuestas(formulario, azar: random.Random, mejores: bool = True) -> tuple:
+    """Opción elegida por factor: (factor_puntaje, factor_posicion, total)."""
+    puntaje, posicion = {}, {}
+    for factor in formulario.factores:
+        opciones = factor.opciones if mejores else factor.opciones[1:] or factor.opciones
+        opcion = azar.choice(opciones)
+        puntaje[factor.clave] = factor.puntajes[opcion]
+        posicion[factor.clave] = factor.posicion(opcion)
+    return puntaje, posicion, sum(puntaje.values())
+
+
+def sembrar(base: BaseLocal, agentes: int = 2000, agentes_por_dependencia: int = 40,
+            dependencias_por_general: int = 5, agentes_por_evaluador: int = 10,
+            fraccion_evaluada: float = 0.3, semilla: int = 0) -> list:
+    """Llena la base con datos sintéticos reproducibles y devuelve los
+    usuarios creados ({usuario, rol}), todos con CONTRASENIA_SEMBRADA."""
+    azar = random.Random(semilla)
+    with open(RUTA_FORMULARIOS, "r", encoding="utf-8") as f:
+        catalogo = compilar(yaml.safe_load(f))
+    contrasenia = _hash(CONTRASENIA_SEMBRADA)
+    hoy = datetime.now(timezone.utc)
+
+    n_dependencias = max(1, math.ceil(agentes / agentes_por_dependencia))
+    unidades, usuarios, filas_agentes, filas_evaluaciones = [], [], [], []
+    activos, destacados = {}, {}  # por dependencia general
+
+    def usuario(nombre, rol, dependencia, dependencia_general):
+        usuarios.append({
+            "usuario": nombre, "password": contrasenia, "apellido_nombre": nombre.upper(),
+            "rol": rol, "dependencia": dependencia, "dependencia_general": dependencia_general,
+            "activo": True, "cambiar_password": False,
+        })
+
+    for d in range(n_dependencias):
+        g = d // dependencias_por_general
+        dependencia_general = f"DIRECCIÓN GENERAL {g + 1:02d}"
+        dependencia = f"DEPENDENCIA {g + 1:02d}.{d % dependencias_por_general + 1:02d}"
+        unidades.append({
+            "dependencia": dependencia, "dependencia_general": dependencia_general,
+            "unidad_evaluadora": dependencia_general, "unidad_analisis": f"UNIDAD DE ANÁLISIS {g + 1:02d}",
+        })
+        if d % dependencias_por_general == 0:
+            usuario(f"general{g + 1:02d}", {"evaluador_general": True}, dependencia, dependencia_general)
+
+        cantidad = min(agentes_por_dependencia, agentes - d * agentes_por_dependencia)
+        evaluadores = [f"evaluador{d + 1:03d}{chr(97 + e)}" for e in range(max(1, math.ceil(cantidad / agentes_por_evaluador)))]
+        for nombre in evaluadores:
+            usuario(nombre, {"evaluador": True}, dependencia, dependencia_general)
+
+        for i in range(cantidad):
+            n = d * agentes_por_dependencia + i
+            activo = azar.random() > 0.05
+            evaluado = activo and azar.random() < fraccion_evaluada
+            agente = {
+                "cuil": f"20{n:09d}",
+                "apellido_nombre": f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}, {azar.choice(NOMBRES)} ({n})",
+                "ingresante": azar.random() < 0.05,
+                "nivel": azar.choice("ABCDEF"),
+                "grado": azar.randrange(0, 11),
+                "tramo": azar.choice(("GENERAL", "INTERMEDIO", "AVANZADO")),
+                "agrupamiento": azar.choice(("GRAL", "PROF")),
+                "dependencia": dependencia,
+                "dependencia_general": dependencia_general,
+                "ultima_calificacion": azar.choice(("BUENO", "MUY BUENO", "DESTACADO")),
+                "calificaciones_corrimiento": azar.choice(("", "BUENO-BUENO", "DESTACADO-BUENO")),
+                "activo": activo,
+                "motivo_inactivo": None if activo else "LICENCIA",
+                "fecha_inactivo": None if activo else "2024-06-30",
+                "evaluador_2024": evaluadores[i % len(evaluadores)],
+                "evaluado_2024": evaluado,
+            }
+            filas_agentes.append(agente)
+            activos[dependencia_general] = activos.get(dependencia_general, 0) + activo
+            if not evaluado:
+                continue
+
+            tipo = azar.choice(list(catalogo))
+            formulario = catalogo[tipo]
+            puntaje, posicion, total = _respuestas(formulario, azar)
+            calificacion = formulario.clasificar(total)
+            # Respetar el cupo: los datos sembrados no deben nacer excedidos
+            cupo = (3 * activos[dependencia_general] + 5) // 10
+            while calificacion == "DESTACADO" and destacados.get(dependencia_general, 0) >= cupo:
+                puntaje, posicion, total = _respuestas(formulario, azar, mejores=False)
+                calificacion = formulario.clasificar(total)
+            if calificacion == "DESTACADO":
+                destacados[dependencia_general] = destacados.get(dependencia_general, 0) + 1
+
+            unidad = unidades[-1]
+            filas_evaluaciones.append({
+                **{k: agente[k] for k in ("cuil", "apellido_nombre", "nivel", "grado", "tramo", "agrupamiento",
+                                          "dependencia", "dependencia_general", "ultima_calificacion",
+                                          "calificaciones_corrimiento", "activo")},
+                "unidad_evaluadora": unidad["unidad_evaluadora"],
+                "unidad_analisis": unidad["unidad_analisis"],
+                "anio_evaluacion": 2024,
+                "evaluador": agente["evaluador_2024"],
+                "formulario": tipo,
+                "factor_puntaje": puntaje,
+                "factor_posicion": posicion,
+                "puntaje_total": total,
+                "puntaje_maximo": formulario.puntaje_maximo,
+                "puntaje_relativo": round(total / formulario.puntaje_maximo * 10, 3),
+                "calificacion": calificacion,
+                "fecha_notificacion": hoy.date().isoformat(),
+                "fecha_evaluacion": (hoy - timedelta(minutes=azar.randrange(60 * 24 * 60))).isoformat(),
+                "residual": False,
+                "clave_idempotencia": str(uuid.UUID(int=azar.getrandbits(128))),
+            })
+
+    usuario("coordinador", {"coordinador": True}, unidades[0]["dependencia"], unidades[0]["dependencia_general"])
+    usuario("rrhh", {"rrhh": True}, unidades[0]["dependencia"], unidades[0]["dependencia_general"])
+
+    with base.transaccion() as c:
+        base.insertar(c, "unidades_evaluacion", unidades)
+        base.insertar(c, "usuarios", usuarios)
+        base.insertar(c, "agentes", filas_agentes)
+        base.insertar(c, "evaluaciones", filas_evaluaciones)
+        base.insertar(c, "configuracion", [
+            {"id": "formulario_activo", "valor": True, "actualizado_por": "semilla"},
+            {"id": "anulacion_activa", "valor": True, "actualizado_por": "semilla"},
+        ])
+    return [{"usuario": u["usuario"], "rol": u["rol"]} for u in usuarios]
+
+
+# ---- Cliente ----
+
+def crear_cliente(ruta: str = ":memory:", latencia_ms: float = 0, latencia_por_kb_ms: float = 0,
+                  sembrar_si_vacia: bool = True, **escala):
+    """supabase.Client contra una BaseLocal en `ruta`. Si la base está vacía y
+    `sembrar_si_vacia`, la llena con sembrar(**escala). La base queda en
+    `cliente.base_local` (llamadas, leer, ...)."""
+    base = BaseLocal(ruta, latencia_ms / 1000, latencia_por_kb_ms / 1000)
+    if sembrar_si_vacia and base.vacia():
+        sembrar(base, **escala)
+
+    cliente = create_client(URL_LOCAL, CLAVE_LOCAL)
+    sesion = cliente.postgrest.session
+    cliente.postgrest.session = httpx.Client(
+        base_url=sesion.base_url, headers=sesion.headers, transport=TransporteLocal(base)
+    )
+    cliente.base_local = base
+    return cliente
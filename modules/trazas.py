@@ -0,0 +1,288 @@
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Trazas de las llamadas al backend.
+#
+# instalar() envuelve el httpx.Client de PostgREST del cliente de Supabase: cada
+# .execute() (consultas, escrituras y RPC) queda registrada con tabla,
+# operación, filtros, filas, bytes y latencia, dentro del rerun de Streamlit
+# que la hizo y de la vista que se estaba mostrando. Los aciertos de caché de
+# modules/repositorio no llegan al cliente y no aparecen.
+#
+# Los últimos MAXIMO_RERUNS reruns de todas las sesiones se guardan en el
+# proceso para el panel de diagnóstico (Configuración, solo coordinadores).
+# El rerun en curso de cada sesión se busca por el id de sesión, fuera de
+# st.session_state: el cierre por inactividad (auth) vacía session_state a
+# mitad del rerun y las llamadas que siguen no deben perderse.
+# Con TRAZAS_JSONL en secrets, además, cada llamada se agrega como una línea
+# JSON a ese archivo.
+#
+# La misma tabla, operación y columnas filtradas repetida UMBRAL_N_MAS_1 o más
+# veces en un rerun es un patrón N+1: una llamada por fila donde alcanzaría
+# una sola.
+
+MAXIMO_RERUNS = 500
+UMBRAL_N_MAS_1 = 5
+LARGO_MAXIMO_VALOR = 60
+VISTA_INICIAL = "inicio"  # autenticación y perfil, antes de elegir la vista
+VISTAS = ("instructivo", "formularios", "evaluaciones", "rrhh", "capacitacion", "configuracion")
+PARAMETROS_NO_FILTRO = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+_log = logging.getLogger(__name__)
+_lock = threading.Lock()
+_reruns = deque(maxlen=MAXIMO_RERUNS)
+# id de sesión -> rerun en curso; la entrada se va cuando el rerun sale de _reruns
+_actuales = weakref.WeakValueDictionary()
+_archivo = {"ruta": None}
+
+
+@dataclass
+class Llamada:
+    vista: str
+    tabla: str
+    operacion: str  # select, insert, upsert, update, delete o rpc
+    filtros: tuple  # ("columna=operador.valor", ...), con los valores recortados
+    filas: Optional[int]  # None si la respuesta no lo informa
+    bytes: int
+    ms: float
+    estado: int
+
+    def firma(self) -> tuple:
+        return self.tabla, self.operacion, tuple(f.split("=", 1)[0] for f in self.filtros)
+
+
+@dataclass
+class Rerun:
+    id: str
+    sesion: str
+    inicio: datetime
+    vista: str = VISTA_INICIAL
+    llamadas: list = field(default_factory=list)
+    por_firma: Counter = field(default_factory=Counter)  # firma -> llamadas, al registrarlas
+
+    def n_mas_1(self) -> list:
+        """[(firma, cantidad)] de las llamadas repetidas UMBRAL_N_MAS_1 o más veces."""
+        return [(firma, n) for firma, n in Counter(self.por_firma).most_common() if n >= UMBRAL_N_MAS_1]
+
+
+# ---- Registro ----
+
+def iniciar_rerun():
+    """Abre el rerun que recibirá las llamadas. Llamar al comienzo de cada rerun."""
+    ctx = get_script_run_ctx()
+    rerun = Rerun(
+        id=uuid.uuid4().hex[:8],
+        sesion=ctx.session_id[:8] if ctx else "-",
+        inicio=datetime.now(),
+    )
+    with _lock:
+        _reruns.append(rerun)
+        if ctx is not None:
+            _actuales[ctx.session_id] = rerun
+
+
+def vista(nombre: str):
+    """Las llamadas que siguen en este rerun se atribuyen a la vista `nombre`."""
+    rerun = _rerun_actual()
+    if rerun is not None:
+        rerun.vista = nombre
+
+
+def _rerun_actual() -> Optional[Rerun]:
+    # Fuera del hilo de un script (sin contexto de sesión) no hay rerun
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return _actuales.get(ctx.session_id)
+
+
+def _recortar(valor: str) -> str:
+    return valor if len(valor) <= LARGO_MAXIMO_VALOR else valor[:LARGO_MAXIMO_VALOR] + "…"
+
+
+def _operacion(metodo: str, ruta: str, prefer: str) -> str:
+    if "/rpc/" in ruta:
+        return "rpc"
+    if metodo == "POST":
+        return "upsert" if "merge-duplicates" in prefer else "insert"
+    return {"PATCH": "update", "DELETE": "delete"}.get(metodo, "select")
+
+
+def _filas(respuesta) -> Optional[int]:
+    """Filas devueltas: del Content-Range si lo hay (lecturas), si no del cuerpo."""
+    intervalo = respuesta.headers.get("content-range", "").split("/", 1)[0]
+    if "-" in intervalo:
+        desde, hasta = intervalo.split("-", 1)
+        return int(hasta) - int(desde) + 1
+    if intervalo == "*":
+        return 0
+    try:
+        datos = respuesta.json() if respuesta.content else []
+    except ValueError:
+        return None
+    return len(datos) if isinstance(datos, list) else 1
+
+
+def _registrar(respuesta, ms: float):
+    rerun = _rerun_actual()
+    if rerun is None:
+        return
+    peticion = respuesta.request
+    ruta = peticion.url.path
+    llamada = Llamada(
+        vista=rerun.vista,
+        tabla=ruta.rsplit("/", 1)[-1],
+        operacion=_operacion(peticion.method, ruta, peticion.headers.get("prefer", "")),
+        filtros=tuple(
+            f"{k}={_recortar(v)}" for k, v in peticion.url.params.multi_items()
+            if k not in PARAMETROS_NO_FILTRO
+        ),
+        filas=_filas(respuesta),
+        bytes=len(respuesta.content),
+        ms=round(ms, 1),
+        estado=respuesta.status_code,
+    )
+    rerun.llamadas.append(llamada)
+    firma = llamada.firma()
+    rerun.por_firma[firma] += 1
+    repetidas = rerun.por_firma[firma]
+    if repetidas == UMBRAL_N_MAS_1:
+        tabla, operacion, columnas = firma
+        _log.warning("Posible N+1 en %s: %s × %s %s por %s", rerun.vista, repetidas, operacion, tabla, ", ".join(columnas))
+    if _archivo["ruta"]:
+        linea = json.dumps(_fila_jsonl(rerun, llamada), ensure_ascii=False, default=str)
+        with _lock, open(_archivo["ruta"], "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+def instalar(supabase, archivo_jsonl: Optional[str] = None):
+    """Envuelve las llamadas de `supabase` a PostgREST (una vez por cliente)."""
+    _archivo["ruta"] = archivo_jsonl
+    session = supabase.postgrest.session
+    if getattr(session, "_trazada", False):
+        return supabase
+    pedir = session.request
+
+    def request(*args, **kwargs):
+        inicio = time.perf_counter()
+        respuesta = pedir(*args, **kwargs)
+        _registrar(respuesta, (time.perf_counter() - inicio) * 1000)
+        return respuesta
+
+    session.request = request
+    session._trazada = True
+    return supabase
+
+
+# ---- Consulta ----
+
+def reruns(sesion: Optional[str] = None) -> list:
+    """Reruns guardados (los más recientes al final), de todas las sesiones o de una."""
+    with _lock:
+        guardados = list(_reruns)
+    return [r for r in guardados if sesion is None or r.sesion == sesion]
+
+
+def _fila_jsonl(rerun: Rerun, llamada: Llamada) -> dict:
+    return {"rerun": rerun.id, "sesion": rerun.sesion, "inicio": rerun.inicio.isoformat(), **asdict(llamada)}
+
+
+def a_jsonl(lista_reruns: list) -> bytes:
+    """Una línea JSON por llamada."""
+    lineas = (
+        json.dumps(_fila_jsonl(r, llamada), ensure_ascii=False, default=str)
+        for r in lista_reruns for llamada in list(r.llamadas)
+    )
+    return "".join(linea + "\n" for linea in lineas).encode("utf-8")
+
+
+def resumen_por_vista(lista_reruns: list) -> pd.DataFrame:
+    """Por vista: reruns, llamadas por rerun (media y máximo), ms y KiB por rerun."""
+    filas = [
+        {
+            "vista": r.vista,
+            "llamadas": len(llamadas),
+            "ms": sum(l.ms for l in llamadas),
+            "kib": sum(l.bytes for l in llamadas) / 1024,
+            "n_mas_1": bool(r.n_mas_1()),
+        }
+        for r in lista_reruns
+        for llamadas in [list(r.llamadas)]
+    ]
+    if not filas:
+        return pd.DataFrame()
+    df = pd.DataFrame(filas)
+    return df.groupby("vista").agg(
+        reruns=("llamadas", "size"),
+        llamadas_media=("llamadas", "mean"),
+        llamadas_max=("llamadas", "max"),
+        ms_media=("ms", "mean"),
+        ms_max=("ms", "max"),
+        kib_media=("kib", "mean"),
+        reruns_n_mas_1=("n_mas_1", "sum"),
+    ).round(1).sort_values("ms_media", ascending=False)
+
+
+def detalle(rerun: Rerun) -> pd.DataFrame:
+    return pd.DataFrame([
+        {**asdict(llamada), "filtros": ", ".join(llamada.filtros)} for llamada in list(rerun.llamadas)
+    ])
+
+
+# ---- Panel ----
+
+def mostrar_panel():
+    """Panel de diagnóstico de llamadas al backend (para coordinadores)."""
+    st.markdown("<h2 style='font-size:20px;'>🩺 Diagnóstico de llamadas al backend</h2>", unsafe_allow_html=True)
+
+    # El rerun en curso todavía no terminó: se muestran los anteriores
+    actual = _rerun_actual()
+    todos = [r for r in reruns() if r is not actual]
+    if not todos:
+        st.info("Todavía no hay llamadas registradas en este proceso.")
+        return
+
+    st.caption(
+        f"Últimos {len(todos)} reruns de todas las sesiones de este proceso "
+        f"(se guardan hasta {MAXIMO_RERUNS}). Las consultas resueltas desde caché no llaman al backend."
+    )
+    st.dataframe(resumen_por_vista(todos), use_container_width=True)
+
+    con_n_mas_1 = [(r, firma, n) for r in todos for firma, n in r.n_mas_1()]
+    for r, (tabla, operacion, columnas), n in con_n_mas_1[-10:]:
+        st.warning(
+            f"⚠️ Posible N+1 en **{r.vista}** (rerun {r.id}, {r.inicio:%H:%M:%S}): "
+            f"{n} × {operacion} `{tabla}` filtrando por {', '.join(columnas) or '—'}."
+        )
+
+    recientes = list(reversed(todos[-50:]))
+    i = st.selectbox(
+        "Rerun",
+        range(len(recientes)),
+        format_func=lambda i: (
+            f"{recientes[i].inicio:%H:%M:%S} · {recientes[i].vista} · sesión {recientes[i].sesion} · "
+            f"{len(recientes[i].llamadas)} llamada/s, {sum(l.ms for l in recientes[i].llamadas):.0f} ms"
+        ),
+        key="traza_rerun_elegido",
+    )
+    if recientes[i].llamadas:
+        st.dataframe(detalle(recientes[i]), use_container_width=True, hide_index=True)
+
+    st.download_button(
+        "⬇️ Descargar trazas (JSON lines)",
+        data=a_jsonl(todos),
+        file_name=f"trazas_{datetime.now():%Y%m%d_%H%M%S}.jsonl",
+        mime="application/x-ndjson",
+    )
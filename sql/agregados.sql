@@ -0,0 +1,91 @@
+-- Agregados para los tableros de RRHH y Capacitación.
+-- Devuelven solo filas de resumen: el tamaño de la respuesta no depende de la
+-- cantidad de agentes ni de evaluaciones. Se consumen desde modules/agregados.py
+-- con supabase.rpc(...).
+--
+-- Requiere sql/cupo_destacados.sql (regla de redondeo del cupo de DESTACADOS).
+
+-- Indicadores generales del año: total de agentes, evaluados (CUIL distintos con
+-- evaluación no anulada) y cantidad de evaluaciones por calificación.
+create or replace function resumen_avance_evaluacion(p_anio int default 2024)
+returns table (
+    total_agentes bigint,
+    evaluados bigint,
+    destacado bigint,
+    bueno bigint,
+    regular bigint,
+    deficiente bigint
+)
+language sql stable as $$
+    with ev as (
+        select cuil, calificacion
+        from evaluaciones
+        where anio_evaluacion = p_anio
+          and anulada is not true
+          and cuil is not null
+    )
+    select
+        (select count(*) from agentes),
+        count(distinct cuil),
+        count(*) filter (where calificacion = 'DESTACADO'),
+        count(*) filter (where calificacion = 'BUENO'),
+        count(*) filter (where calificacion = 'REGULAR'),
+        count(*) filter (where calificacion = 'DEFICIENTE')
+    from ev;
+$$;
+
+-- Avance por dependencia general: agentes y agentes con evaluación no anulada.
+create or replace function avance_por_dependencia_general(p_anio int default 2024)
+returns table (
+    dependencia_general text,
+    agentes_total bigint,
+    evaluados bigint
+)
+language sql stable as $$
+    select
+        a.dependencia_general,
+        count(*),
+        count(*) filter (where exists (
+            select 1
+            from evaluaciones e
+            where e.cuil = a.cuil
+              and e.anio_evaluacion = p_anio
+              and e.anulada is not true
+        ))
+    from agentes a
+    where a.dependencia_general is not null
+    group by a.dependencia_general;
+$$;
+
+-- Cupo de DESTACADOS por dependencia general: 30% de los agentes, redondeado
+-- al entero más cercano (las mitades hacia arriba), y DESTACADOS no anulados
+-- de agentes identificados (con CUIL).
+create or replace function cupo_destacados_por_dependencia()
+returns table (
+    dependencia_general text,
+    total_agentes bigint,
+    cupo_destacados bigint,
+    evaluados_con_destacado bigint
+)
+language sql stable as $$
+    with ag as (
+        select dependencia_general, count(*) as total_agentes
+        from agentes
+        where dependencia_general is not null
+        group by dependencia_general
+    ),
+    dest as (
+        select dependencia_general, count(cuil) as evaluados_con_destacado
+        from evaluaciones
+        where calificacion = 'DESTACADO'
+          and anulada is not true
+        group by dependencia_general
+    )
+    select
+        ag.dependencia_general,
+        ag.total_agentes,
+        cupo_destacados_de(ag.total_agentes),
+        coalesce(dest.evaluados_con_destacado, 0)
+    from ag
+    left join dest on dest.dependencia_general = ag.dependencia_general;
+$$;
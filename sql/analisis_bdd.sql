@@ -0,0 +1,226 @@
+-- Residuales y Bonificación por Desempeño Destacado (BDD) en la base.
+--
+-- Las tres funciones toman el mismo lock transaccional: la unidad residual es
+-- común a todas las dependencias, así que dos recálculos simultáneos (dos
+-- altas, un alta y una anulación, el análisis completo y un desempate) no
+-- pueden leer las mismas marcas y pisarse al escribir.
+
+-- Desempate hecho a mano en el análisis: la evaluación fue elegida
+-- (bonificacion_elegible) o descartada entre las empatadas en el puntaje de
+-- corte. Los recálculos la respetan mientras dure ese empate.
+alter table evaluaciones add column if not exists bonificacion_manual boolean not null default false;
+
+
+-- Si ya se corrió el análisis completo (marca que guarda
+-- modules/capacitacion_escritura.py en `configuracion`). Desde entonces
+-- registrar_evaluacion y anular_evaluaciones recalculan las marcas de la
+-- dependencia general tocada en su misma transacción.
+create or replace function _analisis_bdd_realizado()
+returns boolean
+language sql stable as $$
+    select coalesce((select c.valor = 'true'::jsonb from configuracion c where c.id = 'analisis_bdd_realizado'), false);
+$$;
+
+
+-- Escritura del análisis completo en una sola transacción.
+-- Recibe todas las evaluaciones analizadas con sus marcas finales y las
+-- dependencias generales incluidas en el análisis. Si algo falla no queda
+-- ninguna fila a medio actualizar. Solo se escriben las filas que cambian.
+--
+-- p_filas: [{"id_evaluacion": "...", "residual": bool, "bonificacion_elegible": bool,
+--            "bonificacion_manual": bool (opcional: si falta se conserva)}, ...]
+create or replace function aplicar_analisis_bdd(p_filas jsonb, p_dependencias text[])
+returns table (
+    filas_actualizadas bigint,
+    bonificaciones_reseteadas bigint
+)
+language plpgsql as $$
+declare
+    v_actualizadas bigint;
+    v_reseteadas bigint;
+begin
+    perform pg_advisory_xact_lock(hashtext('analisis_bdd'));
+
+    create temporary table _analisis_bdd on commit drop as
+    select f.id_evaluacion, f.residual, f.bonificacion_elegible, f.bonificacion_manual
+    from jsonb_to_recordset(p_filas)
+        as f(id_evaluacion text, residual boolean, bonificacion_elegible boolean, bonificacion_manual boolean);
+
+    update evaluaciones e
+       set residual = f.residual,
+           bonificacion_elegible = f.bonificacion_elegible,
+           bonificacion_manual = coalesce(f.bonificacion_manual, e.bonificacion_manual)
+      from _analisis_bdd f
+     where e.id_evaluacion::text = f.id_evaluacion
+       and (e.residual is distinct from f.residual
+            or e.bonificacion_elegible is distinct from f.bonificacion_elegible
+            or e.bonificacion_manual is distinct from coalesce(f.bonificacion_manual, e.bonificacion_manual));
+    get diagnostics v_actualizadas = row_count;
+
+    -- El resto de las evaluaciones de esas dependencias (por ejemplo, las
+    -- anuladas) queda sin bonificación, como en el análisis original.
+    update evaluaciones e
+       set bonificacion_elegible = false,
+           bonificacion_manual = false
+     where e.dependencia_general = any(p_dependencias)
+       and (e.bonificacion_elegible is distinct from false or e.bonificacion_manual)
+       and not exists (select 1 from _analisis_bdd f where f.id_evaluacion = e.id_evaluacion::text);
+    get diagnostics v_reseteadas = row_count;
+
+    return query select v_actualizadas, v_reseteadas;
+end;
+$$;
+
+
+-- Desempate del coordinador: fija bonificacion_elegible de las evaluaciones
+-- empatadas y las marca como decididas a mano, todo en un solo UPDATE.
+--
+-- p_filas: [{"id_evaluacion": "...", "bonificacion_elegible": bool}, ...]
+create or replace function fijar_desempate_bdd(p_filas jsonb)
+returns table (filas_actualizadas bigint)
+language plpgsql as $$
+declare
+    v_actualizadas bigint;
+begin
+    perform pg_advisory_xact_lock(hashtext('analisis_bdd'));
+
+    update evaluaciones e
+       set bonificacion_elegible = f.bonificacion_elegible,
+           bonificacion_manual = true
+      from jsonb_to_recordset(p_filas) as f(id_evaluacion text, bonificacion_elegible boolean)
+     where e.id_evaluacion::text = f.id_evaluacion;
+    get diagnostics v_actualizadas = row_count;
+
+    return query select v_actualizadas;
+end;
+$$;
+
+
+-- Recálculo incremental después de un alta o una anulación: residuales y
+-- BDD de las dependencias generales `p_dependencias` más la unidad residual,
+-- leyendo y escribiendo dentro de la misma transacción. Mismas reglas que
+-- recalcular_grupos() en modules/capacitacion_bdd.py:
+--   - residual: nivel 1, o tramo medio (2-4) / operativo (5-6) con menos de
+--     6 evaluaciones en la dependencia;
+--   - cupo del grupo: 10 % de las evaluaciones válidas (mínimo 1), por
+--     puntaje relativo y, a igual puntaje, elegida a mano, sin marca,
+--     descartada a mano y menor id_evaluacion; una descartada empatada en
+--     el puntaje de corte no ocupa lugar;
+--   - unidad residual: una bonificación cada 5 DESTACADO (mínimo 1).
+-- Las anuladas y las que no tienen formulario de esas dependencias pierden
+-- la bonificación. Solo se escriben las filas que cambian.
+create or replace function actualizar_analisis_bdd(p_dependencias text[])
+returns table (filas_actualizadas bigint)
+language plpgsql as $$
+declare
+    v_actualizadas bigint;
+    v_reseteadas bigint;
+begin
+    perform pg_advisory_xact_lock(hashtext('analisis_bdd'));
+
+    create temporary table _marcas_bdd on commit drop as
+    with validas as (
+        select e.id_evaluacion,
+               e.dependencia_general,
+               coalesce(e.dependencia_general = any(p_dependencias), false) as afectada,
+               coalesce(e.calificacion = 'DESTACADO', false) as destacado,
+               coalesce(e.puntaje_relativo::float8, '-infinity') as puntaje,
+               coalesce(e.residual, false) as residual,
+               coalesce(e.bonificacion_elegible, false) as bonificacion_elegible,
+               e.bonificacion_manual,
+               case when e.formulario::int = 1 then 'jerarquico'
+                    when e.formulario::int in (2, 3, 4) then 'medios'
+                    when e.formulario::int in (5, 6) then 'operativos'
+               end as tramo
+          from evaluaciones e
+         where e.anulada is not true
+           and e.formulario is not null
+           and (e.dependencia_general = any(p_dependencias) or e.residual)
+    ),
+    residuales as (
+        select v.*,
+               case when v.afectada then
+                        coalesce(v.tramo = 'jerarquico'
+                                 or (v.tramo in ('medios', 'operativos')
+                                     and count(*) over (partition by v.dependencia_general, v.tramo) < 6), false)
+                    else v.residual and v.dependencia_general is not null
+               end as residual_nuevo,
+               case when v.bonificacion_manual and v.bonificacion_elegible then 0
+                    when v.bonificacion_manual then 2
+                    else 1
+               end as prioridad
+          from validas v
+    ),
+    elegibles as (
+        select r.*,
+               r.afectada and r.destacado and not r.residual_nuevo as elegible,
+               r.residual_nuevo and r.destacado as elegible_residual,
+               greatest(1, count(*) over (partition by r.dependencia_general) / 10) as cupo
+          from residuales r
+    ),
+    puestos as (
+        select g.*,
+               row_number() over (
+                   partition by g.elegible, g.dependencia_general
+                   order by g.puntaje desc, g.prioridad, g.id_evaluacion
+               ) as puesto,
+               row_number() over (
+                   partition by g.elegible_residual
+                   order by g.puntaje desc, g.id_evaluacion
+               ) as puesto_residual,
+               count(*) filter (where g.elegible) over (partition by g.dependencia_general) as n_elegibles,
+               count(*) filter (where g.elegible_residual) over () as n_residuales
+          from elegibles g
+    ),
+    cortes as (
+        select p.*,
+               max(p.puntaje) filter (where p.elegible and p.puesto = p.cupo)
+                   over (partition by p.dependencia_general) as corte,
+               case when p.n_residuales = 0 then 0 else greatest(1, p.n_residuales / 5) end as cupo_residual
+          from puestos p
+    ),
+    en_el_corte as (
+        select c.*,
+               coalesce(c.elegible and c.n_elegibles > c.cupo and c.puntaje = c.corte, false) as en_corte
+          from cortes c
+    ),
+    empates as (
+        select c.*,
+               c.en_corte and count(*) filter (where c.en_corte) over (partition by c.dependencia_general) > 1 as empate
+          from en_el_corte c
+    )
+    select c.id_evaluacion,
+           c.residual_nuevo as residual,
+           case when c.residual_nuevo then c.elegible_residual and c.puesto_residual <= c.cupo_residual
+                when c.afectada then c.elegible and c.puesto <= c.cupo
+                                     and not (c.empate and c.prioridad = 2)
+                else c.bonificacion_elegible
+           end as bonificacion_elegible,
+           case when c.residual_nuevo then false
+                when c.afectada then c.bonificacion_manual and c.empate
+                else c.bonificacion_manual
+           end as bonificacion_manual
+      from empates c;
+
+    update evaluaciones e
+       set residual = m.residual,
+           bonificacion_elegible = m.bonificacion_elegible,
+           bonificacion_manual = m.bonificacion_manual
+      from _marcas_bdd m
+     where e.id_evaluacion = m.id_evaluacion
+       and (e.residual is distinct from m.residual
+            or e.bonificacion_elegible is distinct from m.bonificacion_elegible
+            or e.bonificacion_manual is distinct from m.bonificacion_manual);
+    get diagnostics v_actualizadas = row_count;
+
+    update evaluaciones e
+       set bonificacion_elegible = false,
+           bonificacion_manual = false
+     where e.dependencia_general = any(p_dependencias)
+       and (e.anulada or e.formulario is null)
+       and (e.bonificacion_elegible or e.bonificacion_manual);
+    get diagnostics v_reseteadas = row_count;
+
+    return query select v_actualizadas + v_reseteadas;
+end;
+$$;
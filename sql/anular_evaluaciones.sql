@@ -0,0 +1,61 @@
+-- Anulación en bloque: marca las evaluaciones como anuladas y deja a sus
+-- agentes pendientes de evaluación, todo en una transacción. Si ya se corrió
+-- el análisis de BDD, la misma transacción recalcula las dependencias
+-- generales de las anuladas (actualizar_analisis_bdd en sql/analisis_bdd.sql).
+--
+-- Devuelve una fila por id recibido con el resultado:
+--   'anulada'      se anuló en esta llamada
+--   'ya_anulada'   ya estaba anulada (no se toca)
+--   'inexistente'  no hay evaluación con ese id
+create or replace function anular_evaluaciones(p_ids text[])
+returns table (
+    id_evaluacion text,
+    cuil text,
+    dependencia_general text,
+    resultado text
+)
+language plpgsql as $$
+declare
+    v_recalcular boolean := _analisis_bdd_realizado();
+begin
+    -- Antes de tocar filas: el recálculo de otra transacción puede estar
+    -- escribiendo estas mismas evaluaciones
+    if v_recalcular then
+        perform pg_advisory_xact_lock(hashtext('analisis_bdd'));
+    end if;
+
+    create temporary table _anuladas on commit drop as
+    with anuladas as (
+        update evaluaciones e
+           set anulada = true
+         where e.id_evaluacion::text = any(p_ids)
+           and e.anulada is not true
+        returning e.id_evaluacion::text as id_evaluacion, e.cuil, e.dependencia_general
+    )
+    select * from anuladas;
+
+    update agentes a
+       set evaluado_2024 = false
+     where a.cuil in (select x.cuil from _anuladas x);
+
+    if v_recalcular then
+        perform actualizar_analisis_bdd(array(
+            select distinct x.dependencia_general from _anuladas x where x.dependencia_general is not null
+        ));
+    end if;
+
+    return query
+        select
+            i.id,
+            coalesce(x.cuil, e.cuil),
+            coalesce(x.dependencia_general, e.dependencia_general),
+            case
+                when x.id_evaluacion is not null then 'anulada'
+                when e.id_evaluacion is not null then 'ya_anulada'
+                else 'inexistente'
+            end
+        from unnest(p_ids) as i(id)
+        left join _anuladas x on x.id_evaluacion = i.id
+        left join evaluaciones e on e.id_evaluacion::text = i.id;
+end;
+$$;
@@ -0,0 +1,114 @@
+-- Cupo de calificaciones DESTACADO por dependencia general, mantenido por
+-- triggers: cada alta, anulación o cambio de un agente o de una evaluación
+-- ajusta los contadores de su dependencia general. Las vistas leen una sola
+-- fila en lugar de recorrer agentes y evaluaciones.
+--
+-- El cupo es el 30 % de los agentes activos redondeado al entero más cercano,
+-- con las mitades hacia arriba. La regla vive solo en cupo_destacados_de().
+--
+-- Solo cuentan los DESTACADO del año en evaluación (_anio_cupo_destacados(),
+-- el anio_evaluacion que envía views/formularios.py), como el cálculo que
+-- reemplaza: los de otros años no ocupan cupo.
+
+create or replace function cupo_destacados_de(p_agentes bigint)
+returns bigint
+language sql immutable as $$
+    -- round-half-up(0.3 * n) en aritmética entera: sin errores de coma flotante
+    select (3 * p_agentes + 5) / 10;
+$$;
+
+create or replace function _anio_cupo_destacados()
+returns int
+language sql immutable as $$
+    select 2024;
+$$;
+
+create table if not exists cupo_destacados (
+    dependencia_general text primary key,
+    agentes_activos bigint not null default 0,
+    destacados bigint not null default 0,
+    cupo bigint generated always as (cupo_destacados_de(agentes_activos)) stored
+);
+
+create or replace function _ajustar_cupo_destacados(
+    p_dependencia_general text, p_agentes bigint, p_destacados bigint
+)
+returns void
+language sql as $$
+    insert into cupo_destacados as c (dependencia_general, agentes_activos, destacados)
+    select p_dependencia_general, p_agentes, p_destacados
+     where p_dependencia_general is not null
+       and (p_agentes <> 0 or p_destacados <> 0)
+    on conflict (dependencia_general) do update
+        set agentes_activos = c.agentes_activos + excluded.agentes_activos,
+            destacados = c.destacados + excluded.destacados;
+$$;
+
+-- ---- Agentes activos ----
+
+create or replace function _cupo_destacados_agentes()
+returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.activo is true then
+        perform _ajustar_cupo_destacados(old.dependencia_general, -1, 0);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and new.activo is true then
+        perform _ajustar_cupo_destacados(new.dependencia_general, 1, 0);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists cupo_destacados_agentes on agentes;
+create trigger cupo_destacados_agentes
+    after insert or delete or update of activo, dependencia_general on agentes
+    for each row execute function _cupo_destacados_agentes();
+
+-- ---- DESTACADOS no anulados ----
+
+create or replace function _cupo_destacados_evaluaciones()
+returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE')
+       and old.calificacion = 'DESTACADO' and old.anulada is not true
+       and old.anio_evaluacion = _anio_cupo_destacados() then
+        perform _ajustar_cupo_destacados(old.dependencia_general, 0, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE')
+       and new.calificacion = 'DESTACADO' and new.anulada is not true
+       and new.anio_evaluacion = _anio_cupo_destacados() then
+        perform _ajustar_cupo_destacados(new.dependencia_general, 0, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists cupo_destacados_evaluaciones on evaluaciones;
+create trigger cupo_destacados_evaluaciones
+    after insert or delete or update of calificacion, anulada, anio_evaluacion, dependencia_general on evaluaciones
+    for each row execute function _cupo_destacados_evaluaciones();
+
+-- ---- Carga inicial (y recálculo, si hiciera falta) ----
+
+update cupo_destacados set agentes_activos = 0, destacados = 0;
+
+insert into cupo_destacados (dependencia_general, agentes_activos, destacados)
+select dependencia_general, sum(agentes), sum(destacados)
+  from (
+        select dependencia_general, count(*) as agentes, 0 as destacados
+          from agentes
+         where activo is true and dependencia_general is not null
+         group by dependencia_general
+        union all
+        select dependencia_general, 0, count(*)
+          from evaluaciones
+         where calificacion = 'DESTACADO' and anulada is not true and dependencia_general is not null
+           and anio_evaluacion = _anio_cupo_destacados()
+         group by dependencia_general
+       ) t
+ group by dependencia_general
+on conflict (dependencia_general) do update
+    set agentes_activos = excluded.agentes_activos,
+        destacados = excluded.destacados;
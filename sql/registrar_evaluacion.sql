@@ -0,0 +1,127 @@
+-- Alta de una evaluación en una sola transacción: busca la unidad de
+-- evaluación de la dependencia del agente, inserta la evaluación y marca al
+-- agente como evaluado. Si algo falla no queda ninguna de las tres cosas.
+--
+-- p_clave_idempotencia identifica el envío del formulario: un segundo envío
+-- con la misma clave (doble clic, reintento) devuelve la evaluación ya creada
+-- en lugar de insertar otra.
+--
+-- Una calificación DESTACADO del año del cupo (_anio_cupo_destacados()) reserva
+-- cupo de su dependencia general en la misma transacción: la fila de
+-- cupo_destacados (sql/cupo_destacados.sql) queda bloqueada hasta el commit,
+-- así que los envíos simultáneos de una misma dependencia general se validan
+-- de a uno y ninguno decide con un contador viejo. Sin cupo, la función falla
+-- con SQLSTATE 'EV001' y no inserta nada.
+--
+-- Si ya se corrió el análisis de BDD, la misma transacción recalcula los
+-- residuales y la BDD de la dependencia general (actualizar_analisis_bdd en
+-- sql/analisis_bdd.sql): el alta y sus marcas se confirman juntas. El lock
+-- del análisis se toma antes que el del cupo, en el mismo orden que
+-- anular_evaluaciones, para que dos envíos no se bloqueen entre sí.
+
+alter table evaluaciones add column if not exists clave_idempotencia uuid;
+create unique index if not exists evaluaciones_clave_idempotencia_key
+    on evaluaciones (clave_idempotencia);
+
+-- p_evaluacion: las columnas de `evaluaciones` que arma views/formularios.py,
+-- sin las de la unidad (dependencia_general, unidad_evaluadora, unidad_analisis).
+create or replace function registrar_evaluacion(p_evaluacion jsonb, p_clave_idempotencia uuid)
+returns table (
+    id_evaluacion text,
+    dependencia_general text,
+    duplicada boolean
+)
+language plpgsql as $$
+declare
+    v_datos jsonb;
+    v_unidad unidades_evaluacion%rowtype;
+    v_id text;
+    v_dependencia_general text;
+    v_cupo cupo_destacados%rowtype;
+    v_destacado boolean := p_evaluacion->>'calificacion' = 'DESTACADO'
+                           and (p_evaluacion->>'anio_evaluacion')::int = _anio_cupo_destacados();
+    v_recalcular boolean := _analisis_bdd_realizado();
+begin
+    if v_recalcular then
+        perform pg_advisory_xact_lock(hashtext('analisis_bdd'));
+    end if;
+
+    select * into v_unidad
+      from unidades_evaluacion u
+     where u.dependencia = p_evaluacion->>'dependencia'
+     limit 1;
+
+    if v_destacado and v_unidad.dependencia_general is not null then
+        -- Antes de buscar la clave: un reintento que esperó este lock ve la
+        -- evaluación ya creada y no la cuenta contra el cupo
+        select * into v_cupo
+          from cupo_destacados c
+         where c.dependencia_general = v_unidad.dependencia_general
+           for update;
+    end if;
+
+    select e.id_evaluacion::text, e.dependencia_general
+      into v_id, v_dependencia_general
+      from evaluaciones e
+     where e.clave_idempotencia = p_clave_idempotencia;
+    if found then
+        return query select v_id, v_dependencia_general, true;
+        return;
+    end if;
+
+    if v_destacado and v_unidad.dependencia_general is not null
+       and coalesce(v_cupo.destacados, 0) >= coalesce(v_cupo.cupo, 0) then
+        raise exception using
+            errcode = 'EV001',
+            message = format(
+                'No quedan calificaciones DESTACADO en %s: %s asignada/s de un máximo de %s.',
+                v_unidad.dependencia_general, coalesce(v_cupo.destacados, 0), coalesce(v_cupo.cupo, 0)
+            );
+    end if;
+
+    v_datos := p_evaluacion || jsonb_build_object(
+        'dependencia_general', v_unidad.dependencia_general,
+        'unidad_evaluadora', v_unidad.unidad_evaluadora,
+        'unidad_analisis', v_unidad.unidad_analisis,
+        'clave_idempotencia', p_clave_idempotencia
+    );
+
+    insert into evaluaciones (
+        cuil, apellido_nombre, nivel, grado, tramo, agrupamiento, dependencia,
+        dependencia_general, unidad_evaluadora, unidad_analisis, anio_evaluacion,
+        evaluador, formulario, factor_puntaje, factor_posicion, puntaje_total,
+        ultima_calificacion, calificaciones_corrimiento, puntaje_maximo,
+        puntaje_relativo, calificacion, fecha_notificacion, residual, activo,
+        motivo_inactivo, fecha_inactivo, clave_idempotencia
+    )
+    select
+        r.cuil, r.apellido_nombre, r.nivel, r.grado, r.tramo, r.agrupamiento, r.dependencia,
+        r.dependencia_general, r.unidad_evaluadora, r.unidad_analisis, r.anio_evaluacion,
+        r.evaluador, r.formulario, r.factor_puntaje, r.factor_posicion, r.puntaje_total,
+        r.ultima_calificacion, r.calificaciones_corrimiento, r.puntaje_maximo,
+        r.puntaje_relativo, r.calificacion, r.fecha_notificacion, r.residual, r.activo,
+        r.motivo_inactivo, r.fecha_inactivo, r.clave_idempotencia
+    from jsonb_populate_record(null::evaluaciones, v_datos) r
+    on conflict (clave_idempotencia) do nothing
+    returning evaluaciones.id_evaluacion::text into v_id;
+
+    if v_id is null then
+        -- Otro envío con la misma clave ganó la carrera
+        return query
+            select e.id_evaluacion::text, e.dependencia_general, true
+              from evaluaciones e
+             where e.clave_idempotencia = p_clave_idempotencia;
+        return;
+    end if;
+
+    update agentes
+       set evaluado_2024 = true
+     where cuil = p_evaluacion->>'cuil';
+
+    if v_recalcular and v_unidad.dependencia_general is not null then
+        perform actualizar_analisis_bdd(array[v_unidad.dependencia_general]);
+    end if;
+
+    return query select v_id, v_unidad.dependencia_general, false;
+end;
+$$;
@@ -0,0 +1,25 @@
+-- Valores distintos (no nulos) de una columna de `agentes`, ordenados, para
+-- las opciones de los filtros. El DISTINCT se resuelve en la base: la
+-- respuesta tiene una fila por valor, no una por agente. Se consume desde
+-- modules/repositorio_agentes.py.
+
+create or replace function valores_distintos_agentes(p_columna text)
+returns table (valor text)
+language plpgsql stable as $$
+begin
+    if not exists (
+        select 1
+          from information_schema.columns c
+         where c.table_schema = current_schema()
+           and c.table_name = 'agentes'
+           and c.column_name = p_columna
+    ) then
+        raise exception 'agentes no tiene la columna %', p_columna;
+    end if;
+
+    return query execute format(
+        'select distinct %1$I::text from agentes where %1$I is not null order by 1',
+        p_columna
+    );
+end;
+$$;
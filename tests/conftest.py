@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Las pruebas importan modules/ y benchmarks/ desde la raíz del repositorio
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+# ---- PostgreSQL ----
+#
+# Las funciones de sql/*.sql se prueban contra un PostgreSQL real: el de
+# PRUEBAS_POSTGRES_DSN o, si no está, uno temporal de pgserver (solo para
+# desarrollo, no es dependencia de la aplicación). Sin ninguno de los dos, las
+# pruebas que lo usan se saltean.
+
+# cupo_destacados crea la tabla y los triggers que usan las demás
+ARCHIVOS_SQL = (
+    "cupo_destacados.sql", "registrar_evaluacion.sql", "anular_evaluaciones.sql",
+    "analisis_bdd.sql", "agregados.sql", "valores_distintos.sql",
+)
+# Columnas que agregan las migraciones de sql/ (con su tipo) o que en
+# Supabase tienen otro tipo o defecto que en el backend local
+COLUMNAS_DE_MIGRACIONES = {"clave_idempotencia", "bonificacion_manual"}
+DEFINICIONES_POSTGRES = {
+    ("evaluaciones", "id_evaluacion"): "uuid primary key default gen_random_uuid()",
+    ("evaluaciones", "fecha_evaluacion"): "text default now()::text",
+    ("evaluaciones", "anulada"): "boolean default false",
+    ("evaluaciones", "bonificacion_elegible"): "boolean default false",
+}
+TIPOS_POSTGRES = {"text": "text", "integer": "integer", "real": "double precision", "boolean": "boolean", "jsonb": "jsonb"}
+
+
+def _ddl_postgres() -> str:
+    from modules.supabase_local import CLAVE_PRIMARIA, ESQUEMA
+
+    sentencias = []
+    for tabla, columnas in ESQUEMA.items():
+        if tabla == "cupo_destacados":
+            continue
+        definiciones = []
+        for columna, tipo in columnas.items():
+            if columna in COLUMNAS_DE_MIGRACIONES:
+                continue
+            definicion = DEFINICIONES_POSTGRES.get((tabla, columna), TIPOS_POSTGRES[tipo])
+            if columna == CLAVE_PRIMARIA[tabla] and "primary key" not in definicion:
+                definicion += " primary key"
+            definiciones.append(f"{columna} {definicion}")
+        sentencias.append(f"create table {tabla} ({', '.join(definiciones)});")
+    return "\n".join(sentencias)
+
+
+@pytest.fixture(scope="session")
+def dsn_postgres():
+    dsn = os.environ.get("PRUEBAS_POSTGRES_DSN")
+    if dsn:
+        yield dsn
+        return
+    pgserver = pytest.importorskip("pgserver", reason="sin PRUEBAS_POSTGRES_DSN ni pgserver")
+    servidor = pgserver.get_server(tempfile.mkdtemp(), cleanup_mode="stop")
+    yield servidor.get_uri()
+    servidor.cleanup()
+
+
+@pytest.fixture
+def postgres(dsn_postgres):
+    """Conexión (autocommit) a un esquema nuevo con las tablas de la aplicación
+    y las funciones de sql/. El esquema se borra al terminar."""
+    psycopg2 = pytest.importorskip("psycopg2")
+    conexion = psycopg2.connect(dsn_postgres)
+    conexion.autocommit = True
+    esquema = f"prueba_{uuid.uuid4().hex[:12]}"
+    with conexion.cursor() as c:
+        c.execute(f"create schema {esquema}; set search_path to {esquema}, public;")
+        c.execute(_ddl_postgres())
+        for archivo in ARCHIVOS_SQL:
+            c.execute((RAIZ / "sql" / archivo).read_text(encoding="utf-8"))
+    yield conexion
+    with conexion.cursor() as c:
+        c.execute(f"drop schema {esquema} cascade")
+    conexion.close()
+
+
+def insertar_postgres(conexion, tabla: str, filas: list):
+    """INSERT de `filas` (dicts con las mismas claves) en una sola sentencia."""
+    from psycopg2.extras import Json, execute_values
+
+    if not filas:
+        return
+    columnas = list(filas[0])
+    valores = [[Json(v) if isinstance(v, (dict, list)) else v for v in (f[c] for c in columnas)] for f in filas]
+    with conexion.cursor() as c:
+        execute_values(c, f"insert into {tabla} ({', '.join(columnas)}) values %s", valores)
+
+
+def leer_postgres(conexion, sql: str, parametros=()) -> list:
+    with conexion.cursor() as c:
+        c.execute(sql, parametros)
+        columnas = [d[0] for d in c.description]
+        return [dict(zip(columnas, fila)) for fila in c.fetchall()]
@@ -0,0 +1,148 @@
+import math
+import uuid
+
+import pandas as pd
+import pytest
+
+from conftest import insertar_postgres, leer_postgres
+from modules import agregados, repositorio, supabase_local
+
+# Los agregados de sql/agregados.sql (en PostgreSQL y en el backend local, vía
+# modules/agregados) contra la agregación en pandas que hacían antes
+# views/rrhh.py y modules/capacitacion_destacados.py, sobre los mismos datos.
+
+
+# ---- Agregación anterior (views/rrhh.py y capacitacion_destacados.py) ----
+
+def _rrhh_anterior(agentes: list, evaluaciones: list) -> tuple:
+    df_agentes = pd.DataFrame(agentes)
+    df_eval = pd.DataFrame([e for e in evaluaciones if e["anio_evaluacion"] == 2024])
+    df_eval = df_eval[df_eval["anulada"] != True]
+    df_eval = df_eval[df_eval["cuil"].notna()]
+
+    conteo = df_eval["calificacion"].value_counts().to_dict()
+    general = {
+        "total_agentes": len(df_agentes),
+        "evaluados": df_eval["cuil"].nunique(),
+        "destacado": conteo.get("DESTACADO", 0),
+        "bueno": conteo.get("BUENO", 0),
+        "regular": conteo.get("REGULAR", 0),
+        "deficiente": conteo.get("DEFICIENTE", 0),
+    }
+
+    df_agentes["evaluado"] = df_agentes["cuil"].isin(df_eval["cuil"])
+    resumen = df_agentes.groupby("dependencia_general").agg(
+        agentes_total=("cuil", "count"),
+        evaluados=("evaluado", "sum")
+    ).reset_index()
+    return general, resumen
+
+
+def _cupo_anterior(agentes: list, evaluaciones: list) -> pd.DataFrame:
+    df_agentes = pd.DataFrame(agentes)
+    df_evals = pd.DataFrame(evaluaciones)
+    df_eval_validas = df_evals[
+        (df_evals["calificacion"] == "DESTACADO") & (df_evals["anulada"] != True)
+    ]
+
+    resumen = df_agentes.groupby("dependencia_general").agg(
+        total_agentes=("cuil", "count")
+    ).reset_index()
+    resumen["cupo_destacados"] = resumen["total_agentes"].apply(lambda x: math.floor(x * 0.3) if (x * 0.3) - math.floor(x * 0.3) < 0.5 else math.floor(x * 0.3) + 1)
+    evaluados_destacados = df_eval_validas.groupby("dependencia_general").agg(
+        evaluados_con_destacado=("cuil", "count")
+    ).reset_index()
+
+    resumen = pd.merge(resumen, evaluados_destacados, on="dependencia_general", how="left")
+    resumen["evaluados_con_destacado"] = resumen["evaluados_con_destacado"].fillna(0).astype(int)
+    return resumen
+
+
+# ---- Datos ----
+
+def _casos_borde(evaluacion: dict) -> tuple:
+    """Agentes y evaluaciones que la agregación debe descartar o contar aparte."""
+    agentes = [
+        {"cuil": "27000000001", "apellido_nombre": "SIN DEPENDENCIA", "dependencia_general": None, "activo": True},
+        {"cuil": "27000000002", "apellido_nombre": "DG PROPIA", "dependencia_general": "DG SIN EVALUACIONES", "activo": True},
+    ]
+    base = {k: evaluacion[k] for k in ("dependencia", "dependencia_general", "formulario", "puntaje_total")}
+    evaluaciones = [
+        {**base, "cuil": evaluacion["cuil"], "calificacion": "DESTACADO", "anio_evaluacion": 2023},
+        {**base, "cuil": evaluacion["cuil"], "calificacion": "BUENO", "anio_evaluacion": 2024},  # segunda del mismo agente
+        {**base, "cuil": None, "calificacion": "DESTACADO", "anio_evaluacion": 2024},
+        {**base, "cuil": None, "calificacion": "REGULAR", "anio_evaluacion": 2024},
+        {**base, "cuil": "20999999999", "calificacion": "DEFICIENTE", "anio_evaluacion": 2024},  # agente dado de baja
+        {**base, "cuil": "27000000001", "calificacion": "DESTACADO", "anio_evaluacion": 2024, "anulada": True},
+        {**base, "cuil": "27000000001", "calificacion": "BUENO", "anio_evaluacion": 2024},
+        {**base, "cuil": "27000000002", "calificacion": "DESTACADO", "anio_evaluacion": 2024,
+         "dependencia_general": "DG SIN AGENTES"},
+    ]
+    return agentes, [{**e, "id_evaluacion": str(uuid.UUID(int=i + 1))} for i, e in enumerate(evaluaciones)]
+
+
+@pytest.fixture
+def cliente():
+    cliente = supabase_local.crear_cliente(agentes=615, semilla=5)
+    base = cliente.base_local
+    primera = base.decodificar("evaluaciones", base.leer("select * from evaluaciones order by clave_idempotencia limit 1"))[0]
+    agentes, evaluaciones = _casos_borde(primera)
+    with base.transaccion() as c:
+        base.insertar(c, "agentes", agentes)
+        base.insertar(c, "evaluaciones", evaluaciones)
+    # Algunas anuladas del año
+    base.rpc("anular_evaluaciones", {"p_ids": [
+        f["id_evaluacion"] for f in base.leer("select id_evaluacion from evaluaciones order by clave_idempotencia limit 20 offset 10")
+    ]})
+    repositorio.iniciar_ejecucion()
+    repositorio.invalidar(*agregados.TAGS_AGREGADOS)
+    return cliente
+
+
+def _tablas(base) -> tuple:
+    agentes = base.decodificar("agentes", base.leer("select cuil, apellido_nombre, activo, dependencia_general from agentes"))
+    evaluaciones = base.decodificar("evaluaciones", base.leer(
+        "select cuil, anulada, anio_evaluacion, calificacion, dependencia_general from evaluaciones"
+    ))
+    return agentes, evaluaciones
+
+
+def _comparar(general: dict, por_dependencia: list, cupo: list, agentes: list, evaluaciones: list):
+    general_anterior, por_dependencia_anterior = _rrhh_anterior(agentes, evaluaciones)
+    cupo_anterior = _cupo_anterior(agentes, evaluaciones)
+
+    assert {k: int(v) for k, v in general.items()} == {k: int(v) for k, v in general_anterior.items()}
+    columnas = ["dependencia_general", "agentes_total", "evaluados"]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(por_dependencia, columns=columnas).sort_values("dependencia_general").reset_index(drop=True),
+        por_dependencia_anterior[columnas].sort_values("dependencia_general").reset_index(drop=True),
+        check_dtype=False,
+    )
+    columnas = ["dependencia_general", "total_agentes", "cupo_destacados", "evaluados_con_destacado"]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(cupo, columns=columnas).sort_values("dependencia_general").reset_index(drop=True),
+        cupo_anterior[columnas].sort_values("dependencia_general").reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_backend_local_igual_a_la_agregacion_anterior(cliente):
+    _comparar(
+        agregados.resumen_avance(cliente, 2024),
+        agregados.avance_por_dependencia_general(cliente, 2024),
+        agregados.cupo_destacados(cliente),
+        *_tablas(cliente.base_local),
+    )
+
+
+def test_postgres_igual_a_la_agregacion_anterior(cliente, postgres):
+    base = cliente.base_local
+    for tabla in ("agentes", "evaluaciones"):
+        insertar_postgres(postgres, tabla, base.decodificar(tabla, base.leer(f"select * from {tabla}")))
+
+    _comparar(
+        leer_postgres(postgres, "select * from resumen_avance_evaluacion(2024)")[0],
+        leer_postgres(postgres, "select * from avance_por_dependencia_general(2024)"),
+        leer_postgres(postgres, "select * from cupo_destacados_por_dependencia()"),
+        *_tablas(base),
+    )
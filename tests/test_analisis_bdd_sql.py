@@ -0,0 +1,145 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bdd import generar_evaluaciones
+from conftest import insertar_postgres, leer_postgres
+from modules.capacitacion_bdd import calcular_bdd
+from modules.supabase_local import BaseLocal
+
+Json = pytest.importorskip("psycopg2.extras").Json
+
+# Las funciones de sql/analisis_bdd.sql contra su referencia en Python (la
+# del backend local, que usa capacitacion_bdd.recalcular_grupos), sobre las
+# mismas evaluaciones: mismas marcas finales en las dos bases.
+
+MARCAS = ("residual", "bonificacion_elegible", "bonificacion_manual")
+
+
+def _evaluaciones(filas: int, semilla: int) -> list:
+    """Evaluaciones con marcas guardadas de un análisis anterior, desempates
+    a mano (vigentes y viejos) y cambios posteriores: anuladas, sin
+    formulario y residuales sin dependencia general."""
+    rng = np.random.default_rng(semilla)
+    df = generar_evaluaciones(filas, semilla)
+    # Dependencias de tamaños muy distintos: tramos chicos (residuales) y grandes
+    pesos = 1 / np.arange(1, 61)
+    df["dependencia_general"] = df["dependencia_general"].where(
+        df["dependencia_general"].isna(), rng.choice([f"DG {i:02d}" for i in range(60)], filas, p=pesos / pesos.sum())
+    )
+    df["id_evaluacion"] = [str(uuid.UUID(int=int(i))) for i in rng.integers(0, 2**63, filas)]
+    df[["residual", "bonificacion_elegible"]] = calcular_bdd(df).marcas
+    df["bonificacion_manual"] = False
+
+    empatadas = calcular_bdd(df).empates.index
+    decididas = rng.choice(empatadas, len(empatadas) // 2, replace=False)
+    df.loc[decididas, "bonificacion_manual"] = True
+    df.loc[decididas, "bonificacion_elegible"] = rng.random(len(decididas)) < 0.4
+    df.loc[rng.random(filas) < 0.02, "bonificacion_manual"] = True  # marcas que ya no están en un empate
+
+    df.loc[rng.random(filas) < 0.03, "anulada"] = True
+    df["formulario"] = df["nivel"].astype(object)
+    df.loc[rng.random(filas) < 0.01, "formulario"] = None
+    df.loc[df["dependencia_general"].isna() & (rng.random(filas) < 0.5), "residual"] = True
+    # Altas con DESTACADO posteriores al análisis
+    nuevas = rng.random(filas) < 0.03
+    df.loc[nuevas, ["calificacion", "residual", "bonificacion_elegible"]] = ["DESTACADO", False, False]
+
+    df = df.drop(columns="nivel").astype(object).where(df.drop(columns="nivel").notna(), None)
+    return [
+        {k: (v.item() if hasattr(v, "item") else v) for k, v in fila.items()}
+        for fila in df.to_dict("records")
+    ]
+
+
+def _cargar(postgres, filas: list) -> BaseLocal:
+    insertar_postgres(postgres, "evaluaciones", filas)
+    local = BaseLocal()
+    with local.transaccion() as c:
+        local.insertar(c, "evaluaciones", filas)
+    return local
+
+
+def _marcas_postgres(postgres) -> pd.DataFrame:
+    filas = leer_postgres(postgres, f"select id_evaluacion::text, {', '.join(MARCAS)} from evaluaciones")
+    return pd.DataFrame(filas).set_index("id_evaluacion").sort_index()[list(MARCAS)].fillna(False).astype(bool)
+
+
+def _marcas_local(local: BaseLocal) -> pd.DataFrame:
+    filas = local.decodificar("evaluaciones", local.leer(f"select id_evaluacion, {', '.join(MARCAS)} from evaluaciones"))
+    return pd.DataFrame(filas).set_index("id_evaluacion").sort_index()[list(MARCAS)].fillna(False).astype(bool)
+
+
+def _rpc_postgres(postgres, funcion: str, *argumentos) -> list:
+    marcadores = ", ".join(["%s"] * len(argumentos))
+    return leer_postgres(postgres, f"select * from {funcion}({marcadores})", argumentos)
+
+
+@pytest.mark.parametrize("semilla", range(4))
+def test_actualizar_igual_a_recalcular_grupos(postgres, semilla):
+    filas = _evaluaciones(2500, semilla)
+    local = _cargar(postgres, filas)
+    dependencias = sorted({f["dependencia_general"] for f in filas if f["dependencia_general"]})
+    afectadas = list(np.random.default_rng(semilla).choice(dependencias, 30, replace=False))
+
+    en_postgres = _rpc_postgres(postgres, "actualizar_analisis_bdd", afectadas)
+    en_local = local.rpc("actualizar_analisis_bdd", {"p_dependencias": afectadas})
+
+    assert en_postgres[0]["filas_actualizadas"] > 0
+    assert en_postgres[0]["filas_actualizadas"] == en_local[0]["filas_actualizadas"]
+    pd.testing.assert_frame_equal(_marcas_postgres(postgres), _marcas_local(local))
+
+    # Sin cambios en el medio, repetirlo no escribe nada
+    assert _rpc_postgres(postgres, "actualizar_analisis_bdd", afectadas)[0]["filas_actualizadas"] == 0
+
+
+def test_desempate_se_conserva_al_recalcular(postgres):
+    """El coordinador elige al último de tres empatados (cupo 1); un alta
+    posterior en la dependencia no le quita la bonificación."""
+    ids = [str(uuid.UUID(int=i + 1)) for i in range(13)]
+    filas = [
+        {"id_evaluacion": ids[i], "dependencia_general": "DG A", "formulario": 4,
+         "calificacion": "DESTACADO" if i < 3 else "BUENO", "puntaje_relativo": 9.5 if i < 3 else 7.0,
+         "anulada": False, "residual": False, "bonificacion_elegible": i == 0}
+        for i in range(12)
+    ]
+    local = _cargar(postgres, filas)
+    decision = [{"id_evaluacion": ids[0], "bonificacion_elegible": False},
+                {"id_evaluacion": ids[1], "bonificacion_elegible": False},
+                {"id_evaluacion": ids[2], "bonificacion_elegible": True}]
+
+    assert _rpc_postgres(postgres, "fijar_desempate_bdd", Json(decision))[0]["filas_actualizadas"] == 3
+    local.rpc("fijar_desempate_bdd", {"p_filas": decision})
+    alta = {**filas[-1], "id_evaluacion": ids[12], "bonificacion_elegible": False}
+    insertar_postgres(postgres, "evaluaciones", [alta])
+    with local.transaccion() as c:
+        local.insertar(c, "evaluaciones", [alta])
+
+    _rpc_postgres(postgres, "actualizar_analisis_bdd", ["DG A"])
+    local.rpc("actualizar_analisis_bdd", {"p_dependencias": ["DG A"]})
+
+    marcas = _marcas_postgres(postgres)
+    assert marcas.loc[ids[:3], "bonificacion_elegible"].tolist() == [False, False, True]
+    assert marcas.loc[ids[:3], "bonificacion_manual"].all()
+    pd.testing.assert_frame_equal(marcas, _marcas_local(local))
+
+
+def test_aplicar_conserva_la_marca_manual_si_no_viene(postgres):
+    filas = [{"id_evaluacion": str(uuid.UUID(int=1)), "dependencia_general": "DG A", "formulario": 4,
+              "calificacion": "DESTACADO", "puntaje_relativo": 9.0, "anulada": False, "residual": False,
+              "bonificacion_elegible": True, "bonificacion_manual": True},
+             {"id_evaluacion": str(uuid.UUID(int=2)), "dependencia_general": "DG A", "formulario": 4,
+              "calificacion": "DESTACADO", "puntaje_relativo": 9.0, "anulada": True, "residual": False,
+              "bonificacion_elegible": True, "bonificacion_manual": True}]
+    local = _cargar(postgres, filas)
+    enviadas = [{"id_evaluacion": filas[0]["id_evaluacion"], "residual": False, "bonificacion_elegible": True}]
+
+    en_postgres = _rpc_postgres(postgres, "aplicar_analisis_bdd", Json(enviadas), ["DG A"])
+    en_local = local.rpc("aplicar_analisis_bdd", {"p_filas": enviadas, "p_dependencias": ["DG A"]})
+
+    assert en_postgres == en_local == [{"filas_actualizadas": 0, "bonificaciones_reseteadas": 1}]
+    marcas = _marcas_postgres(postgres)
+    assert marcas["bonificacion_manual"].tolist() == [True, False]
+    pd.testing.assert_frame_equal(marcas, _marcas_local(local))
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bdd import generar_evaluaciones, referencia, verificar_incremental
+from modules.capacitacion_bdd import GRUPO_RESIDUAL, calcular_bdd, recalcular_grupos
+
+# El motor vectorizado contra el recorrido por dependencia al que reemplazó
+# (benchmarks/bdd.py: referencia), sobre evaluaciones sintéticas con semilla.
+# Los puntajes van redondeados a un decimal, así que hay empates en el corte.
+
+
+@pytest.mark.parametrize("filas", [300, 3000])
+@pytest.mark.parametrize("semilla", range(5))
+def test_igual_al_recorrido(filas, semilla):
+    df = generar_evaluaciones(filas, semilla)
+    assert df["dependencia_general"].isna().any()
+    assert (df["nivel"] == 1).any()
+
+    marcas = calcular_bdd(df).marcas
+
+    pd.testing.assert_frame_equal(marcas, referencia(df))
+    assert marcas.dtypes.eq(bool).all()
+
+
+def test_indice_desordenado():
+    """Las marcas salen alineadas con el índice de entrada y los empates se
+    resuelven por id_evaluacion, no por la posición de la fila."""
+    df = generar_evaluaciones(2000, 7)
+    esperado = referencia(df)
+
+    mezclado = df.sample(frac=1, random_state=3)
+    mezclado.index = mezclado.index.map(lambda i: f"fila-{i}")
+    marcas = calcular_bdd(mezclado).marcas
+
+    assert list(marcas.index) == list(mezclado.index)
+    marcas.index = marcas.index.str.removeprefix("fila-").astype(int)
+    pd.testing.assert_frame_equal(marcas.sort_index(), esperado)
+
+
+def _grupo(dependencia, puntajes, nivel=4, calificacion="DESTACADO", desde=0):
+    return pd.DataFrame({
+        "id_evaluacion": np.arange(desde, desde + len(puntajes)),
+        "dependencia_general": dependencia,
+        "nivel": nivel,
+        "calificacion": calificacion,
+        "puntaje_relativo": puntajes,
+        "anulada": False,
+    })
+
+
+def test_empate_en_el_corte():
+    # 12 evaluaciones válidas: cupo 1; dos DESTACADO empatados arriba
+    df = pd.concat([
+        _grupo("DG A", [9.5, 9.5, 8.0]),
+        _grupo("DG A", [7.0] * 9, calificacion="BUENO", desde=3),
+    ], ignore_index=True)
+
+    resultado = calcular_bdd(df)
+
+    assert resultado.marcas["bonificacion_elegible"].tolist() == [True] + [False] * 11
+    assert resultado.empates["id_evaluacion"].tolist() == [0, 1]
+    assert set(resultado.empates["grupo"]) == {"DG A"}
+    cupos = resultado.cupos.set_index("dependencia_general").loc["DG A"]
+    assert (cupos["total_evaluados"], cupos["cupo_bdd"], cupos["bonificados"]) == (12, 1, 1)
+
+
+def test_sin_empate_si_alcanza_el_cupo():
+    # 20 evaluaciones (cupo 2) y solo dos DESTACADO, empatados
+    df = pd.concat([
+        _grupo("DG A", [9.5, 9.5]),
+        _grupo("DG A", [7.0] * 18, calificacion="BUENO", desde=2),
+    ], ignore_index=True)
+    resultado = calcular_bdd(df)
+    assert resultado.marcas["bonificacion_elegible"].sum() == 2
+    assert resultado.empates.empty
+
+
+def test_residuales_y_unidad_residual():
+    df = pd.concat([
+        _grupo("DG A", [9.0, 8.0], nivel=1),  # nivel 1: siempre residual
+        _grupo("DG B", [9.9, 9.8, 9.7, 9.6, 9.5], nivel=5, desde=2),  # tramo operativo con menos de 6
+        _grupo("DG C", [9.0] * 6, nivel=3, desde=7),  # tramo medio completo
+    ], ignore_index=True)
+
+    resultado = calcular_bdd(df)
+    residual = resultado.marcas["residual"]
+
+    assert residual.tolist() == [True] * 7 + [False] * 6
+    # 7 DESTACADO residuales: una bonificación, al mayor puntaje
+    assert resultado.residual == {"elegibles": 7, "cupo": 1, "bonificados": 1}
+    assert resultado.marcas["bonificacion_elegible"][residual].tolist() == [False, False, True] + [False] * 4
+    # Empate de los seis de DG C (cupo 1)
+    assert resultado.empates["grupo"].eq("DG C").sum() == 6
+    assert not resultado.empates["grupo"].eq(GRUPO_RESIDUAL).any()
+
+
+def test_sin_dependencia_general():
+    df = pd.concat([
+        _grupo(None, [10.0, 10.0], nivel=1),
+        _grupo("DG A", [9.0] + [5.0] * 9, nivel=4, desde=2),
+    ], ignore_index=True)
+
+    marcas = calcular_bdd(df).marcas
+
+    assert not marcas.loc[:1, "residual"].any()
+    assert not marcas.loc[:1, "bonificacion_elegible"].any()
+    assert marcas["bonificacion_elegible"].tolist() == [False, False, True] + [False] * 9
+
+
+def test_anuladas_no_cuentan():
+    df = _grupo("DG A", [9.0, 8.0] + [5.0] * 9)
+    df.loc[0, "anulada"] = True
+    marcas = calcular_bdd(df).marcas
+    # 10 válidas: cupo 1, para la mejor no anulada
+    assert marcas["bonificacion_elegible"].tolist() == [False, True] + [False] * 9
+
+
+def test_recalculo_incremental_igual_al_completo():
+    iguales, _, _ = verificar_incremental(2000, operaciones=25)
+    assert iguales
+
+
+def test_recalculo_incremental_conserva_bool():
+    df = generar_evaluaciones(1500, 2).assign(residual=False, bonificacion_elegible=False)
+    df[["residual", "bonificacion_elegible"]] = calcular_bdd(df).marcas
+    dependencia = df["dependencia_general"].dropna().iloc[0]
+    leidas = df[(df["dependencia_general"] == dependencia) | df["residual"]]
+
+    cambios = recalcular_grupos(leidas.assign(calificacion="DESTACADO"), [dependencia])
+
+    assert not cambios.empty
+    assert cambios[["residual", "bonificacion_elegible"]].dtypes.eq(bool).all()
+
+
+def _empate_decidido(elegida, descartada):
+    """DG A con cupo 1 y tres DESTACADO empatados en 9.5; el coordinador eligió
+    `elegida` y descartó `descartada` (ids)."""
+    df = pd.concat([
+        _grupo("DG A", [9.5, 9.5, 9.5]),
+        _grupo("DG A", [7.0] * 9, calificacion="BUENO", desde=3),
+    ], ignore_index=True)
+    df["bonificacion_elegible"] = df["id_evaluacion"].isin(elegida)
+    df["bonificacion_manual"] = df["id_evaluacion"].isin(list(elegida) + list(descartada))
+    return df
+
+
+def test_desempate_manual_se_conserva():
+    df = _empate_decidido(elegida=[2], descartada=[0, 1])
+
+    marcas = calcular_bdd(df).marcas
+
+    assert marcas["bonificacion_elegible"].tolist() == [False, False, True] + [False] * 9
+    assert marcas["bonificacion_manual"].tolist() == [True] * 3 + [False] * 9
+
+
+def test_desempate_manual_sin_elegida_deja_el_cupo_libre():
+    df = _empate_decidido(elegida=[], descartada=[0, 1, 2])
+    assert not calcular_bdd(df).marcas["bonificacion_elegible"].any()
+
+
+def test_desempate_manual_parcial():
+    # Solo se descartó la primera: el lugar va a la siguiente por id
+    df = _empate_decidido(elegida=[], descartada=[0])
+    assert calcular_bdd(df).marcas["bonificacion_elegible"].tolist() == [False, True] + [False] * 10
+
+
+def test_desempate_manual_caduca_si_se_mueve_el_corte():
+    df = _empate_decidido(elegida=[2], descartada=[0, 1])
+    df.loc[3, ["calificacion", "puntaje_relativo"]] = ["DESTACADO", 9.9]
+
+    marcas = calcular_bdd(df).marcas
+
+    assert marcas["bonificacion_elegible"].tolist() == [False, False, False, True] + [False] * 8
+    assert not marcas["bonificacion_manual"].any()
+
+
+def test_desempate_manual_no_supera_a_un_puntaje_mayor():
+    # La descartada con un puntaje por encima del corte gana igual
+    df = _empate_decidido(elegida=[], descartada=[0])
+    df.loc[0, "puntaje_relativo"] = 9.9
+    marcas = calcular_bdd(df).marcas
+    assert marcas["bonificacion_elegible"].tolist() == [True] + [False] * 11
+    assert not marcas["bonificacion_manual"].any()
+
+
+def test_recalculo_incremental_respeta_desempate_manual():
+    df = _empate_decidido(elegida=[2], descartada=[0, 1]).assign(residual=False)
+    alta = _grupo("DG A", [6.0], calificacion="BUENO", desde=12).assign(
+        residual=False, bonificacion_elegible=False, bonificacion_manual=False
+    )
+
+    cambios = recalcular_grupos(pd.concat([df, alta], ignore_index=True), ["DG A"])
+
+    assert cambios.empty
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from modules import factores_matriz, repositorio, supabase_local
+from modules.catalogo_formularios import RUTA_FORMULARIOS, compilar
+
+
+@pytest.fixture(scope="module")
+def catalogo():
+    with open(RUTA_FORMULARIOS, encoding="utf-8") as f:
+        return compilar(yaml.safe_load(f))
+
+
+def test_sin_evaluaciones_las_matrices_quedan_vacias(catalogo):
+    matrices = factores_matriz.construir(pd.DataFrame([]), catalogo)
+
+    assert sorted(matrices) == sorted(int(t) for t in catalogo)
+    for tipo, matriz in matrices.items():
+        assert len(matriz) == 0
+        assert matriz.puntajes.shape == (0, len(catalogo[tipo].factores))
+    assert factores_matriz.promedio_por_dependencia(matrices[1]).empty
+
+
+def test_cargar_lee_solo_las_columnas_de_las_matrices(catalogo):
+    cliente = supabase_local.crear_cliente()
+    repositorio.iniciar_ejecucion()
+    repositorio.invalidar("evaluaciones")
+    pedidos = []
+    session = cliente.postgrest.session
+    pedir = session.request
+
+    def request(*args, **kwargs):
+        respuesta = pedir(*args, **kwargs)
+        pedidos.append(respuesta.request.url.params.get("select"))
+        return respuesta
+
+    session.request = request
+    matrices = factores_matriz.cargar(cliente, catalogo)
+
+    assert pedidos and set(pedidos) == {factores_matriz.COLUMNAS}
+    validas = [f for f in cliente.base_local.decodificar(
+        "evaluaciones", cliente.base_local.leer("select anulada, formulario from evaluaciones")
+    ) if not f["anulada"] and f["formulario"] is not None]
+    assert sum(len(m) for m in matrices.values()) == len(validas)
+
+
+# ---- Contra pandas (groupby / crosstab / Series.corr) ----
+
+@pytest.fixture(scope="module")
+def evaluaciones() -> pd.DataFrame:
+    """Evaluaciones sembradas con factores sin valor, filas sin dependencia
+    general y calificaciones que no están en el formulario."""
+    base = supabase_local.crear_cliente(agentes=600, semilla=7).base_local
+    df = pd.DataFrame(base.decodificar("evaluaciones", base.leer(
+        f"select {factores_matriz.COLUMNAS} from evaluaciones order by id_evaluacion"
+    )))
+    rng = np.random.default_rng(7)
+    for columna in ("factor_puntaje", "factor_posicion"):
+        df[columna] = [
+            {k: v for k, v in valores.items() if rng.random() > 0.1} if isinstance(valores, dict) else valores
+            for valores in df[columna]
+        ]
+    df["dependencia_general"] = df["dependencia_general"].where(rng.random(len(df)) > 0.1, None)
+    df.loc[rng.random(len(df)) < 0.02, "calificacion"] = "OTRA"
+    return df
+
+
+def _referencia(df: pd.DataFrame, catalogo, tipo: int, valores: str) -> tuple:
+    """(valores por factor, dependencia general, calificación ordinal) de las
+    evaluaciones no anuladas del formulario `tipo`, con NaN donde falta."""
+    filas = df[(df["anulada"] != True) & df["formulario"].notna()]
+    filas = filas[filas["formulario"].astype(int) == tipo]
+    claves = [f.clave for f in catalogo[tipo].factores]
+    columna = "factor_puntaje" if valores == "puntajes" else "factor_posicion"
+    datos = pd.DataFrame(
+        [[(v or {}).get(k) for k in claves] for v in filas[columna]], columns=claves, index=filas.index, dtype=float
+    )
+    orden = [n for n, _, _ in sorted(catalogo[tipo].clasificaciones, key=lambda r: r[2])]
+    calificacion = filas["calificacion"].str.upper().map({n: i for i, n in enumerate(orden)}).astype(float)
+    return datos, filas["dependencia_general"], calificacion
+
+
+def _tipos(matrices: dict) -> list:
+    return [tipo for tipo, matriz in matrices.items() if len(matriz) >= 20]
+
+
+@pytest.mark.parametrize("valores", ["puntajes", "posiciones"])
+def test_promedio_igual_a_groupby(catalogo, evaluaciones, valores):
+    matrices = factores_matriz.construir(evaluaciones, catalogo)
+    assert _tipos(matrices)
+
+    for tipo in _tipos(matrices):
+        datos, dependencia, _ = _referencia(evaluaciones, catalogo, tipo, valores)
+        esperado = datos.groupby(dependencia).mean()
+
+        obtenido = factores_matriz.promedio_por_dependencia(matrices[tipo], valores)
+
+        assert obtenido.index.notna().all()
+        pd.testing.assert_frame_equal(obtenido.sort_index(), esperado.sort_index(), check_names=False)
+
+
+@pytest.mark.parametrize("valores", ["puntajes", "posiciones"])
+def test_distribucion_igual_a_crosstab(catalogo, evaluaciones, valores):
+    matrices = factores_matriz.construir(evaluaciones, catalogo)
+
+    for tipo in _tipos(matrices):
+        datos, dependencia, _ = _referencia(evaluaciones, catalogo, tipo, valores)
+        for clave in datos.columns:
+            esperado = pd.crosstab(dependencia, datos[clave])
+            esperado.columns = esperado.columns.astype(int)
+
+            obtenido = factores_matriz.distribucion_por_dependencia(matrices[tipo], clave, valores)
+
+            pd.testing.assert_frame_equal(
+                obtenido.sort_index(), esperado.sort_index(), check_names=False, check_dtype=False
+            )
+
+
+@pytest.mark.parametrize("valores", ["puntajes", "posiciones"])
+def test_correlacion_igual_a_series_corr(catalogo, evaluaciones, valores):
+    matrices = factores_matriz.construir(evaluaciones, catalogo)
+
+    for tipo in _tipos(matrices):
+        datos, _, calificacion = _referencia(evaluaciones, catalogo, tipo, valores)
+        esperado = pd.Series({clave: datos[clave].corr(calificacion) for clave in datos.columns}, name="correlacion")
+
+        obtenido = factores_matriz.correlacion_con_calificacion(matrices[tipo], valores)
+
+        pd.testing.assert_series_equal(obtenido, esperado)
@@ -0,0 +1,76 @@
+import io
+import os
+import time
+import zipfile
+
+import pandas as pd
+import pytest
+
+from modules import informes_lote, supabase_local
+from modules.capacitacion_utils import informe_direccion_docx
+
+# Trabajos de informes en segundo plano con el pool de procesos real: progreso,
+# contenido del ZIP, informes que fallan y recuperación de un pool roto.
+
+
+def _esperar(id_trabajo: str, segundos: float = 120) -> informes_lote.Trabajo:
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        trabajo = informes_lote.consultar(id_trabajo)
+        if trabajo.estado == informes_lote.TERMINADO:
+            return trabajo
+        assert 0 <= trabajo.progreso < 1
+        time.sleep(0.1)
+    pytest.fail(f"el trabajo {id_trabajo} no terminó en {segundos} s")
+
+
+@pytest.fixture(scope="module")
+def evaluaciones() -> pd.DataFrame:
+    base = supabase_local.crear_cliente(agentes=500, semilla=2).base_local
+    filas = base.decodificar("evaluaciones", base.leer(
+        "select * from evaluaciones where anulada is not 1 and formulario is not null and dependencia_general is not null"
+    ))
+    return pd.DataFrame(filas)
+
+
+def test_trabajo_con_un_informe_que_falla(evaluaciones):
+    dependencias = sorted(evaluaciones["dependencia_general"].unique())[:3]
+    df = evaluaciones[evaluaciones["dependencia_general"].isin(dependencias)].copy()
+    # Un formulario que no es un número hace fallar el informe de esa dependencia
+    df["formulario"] = df["formulario"].astype(object)
+    df.loc[df["dependencia_general"] == dependencias[1], "formulario"] = "sin número"
+
+    trabajo = _esperar(informes_lote.iniciar(df))
+
+    assert (trabajo.completados, trabajo.total, trabajo.progreso) == (3, 3, 1.0)
+    assert list(trabajo.errores) == [dependencias[1]]
+    with zipfile.ZipFile(io.BytesIO(trabajo.zip)) as zf:
+        assert sorted(zf.namelist()) == sorted(
+            [informes_lote._archivo(dependencias[0]), informes_lote._archivo(dependencias[2]), "ERRORES.txt"]
+        )
+        assert zf.read("ERRORES.txt").decode().startswith(f"{dependencias[1]}: ValueError")
+        grupo = df[df["dependencia_general"] == dependencias[0]]
+        # Mismo informe que el botón de una sola dependencia (salvo metadatos de fecha del DOCX)
+        docx = zipfile.ZipFile(io.BytesIO(zf.read(informes_lote._archivo(dependencias[0]))))
+        esperado = zipfile.ZipFile(io.BytesIO(informe_direccion_docx(grupo, dependencias[0])))
+        assert docx.read("word/document.xml") == esperado.read("word/document.xml")
+
+
+def test_sin_dependencias_termina_vacio():
+    trabajo = informes_lote.consultar(informes_lote.iniciar(pd.DataFrame({"dependencia_general": []})))
+
+    assert trabajo.estado == informes_lote.TERMINADO and trabajo.progreso == 1.0
+    assert zipfile.ZipFile(io.BytesIO(trabajo.zip)).namelist() == []
+
+
+def test_se_recupera_de_un_pool_roto(evaluaciones):
+    roto = informes_lote._pool()
+    with pytest.raises(informes_lote.BrokenProcessPool):
+        roto.submit(os._exit, 1).result()  # un proceso del pool muere
+
+    dependencia = evaluaciones["dependencia_general"].iloc[0]
+    trabajo = _esperar(informes_lote.iniciar(evaluaciones[evaluaciones["dependencia_general"] == dependencia]))
+
+    assert informes_lote._pool() is not roto
+    assert not trabajo.errores
+    assert zipfile.ZipFile(io.BytesIO(trabajo.zip)).namelist() == [informes_lote._archivo(dependencia)]
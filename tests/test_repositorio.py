@@ -0,0 +1,123 @@
+import uuid
+
+import pytest
+
+from modules import repositorio, repositorio_evaluaciones, supabase_local
+
+# Capa de acceso a datos contra el backend local (supabase_local): mismas
+# consultas de postgrest-py que en producción, sin red.
+
+
+@pytest.fixture
+def cliente():
+    cliente = supabase_local.crear_cliente(sembrar_si_vacia=False)
+    repositorio.iniciar_ejecucion()
+    repositorio.invalidar(repositorio_evaluaciones.TABLA)
+    return cliente
+
+
+def _evaluaciones(cliente, cantidad: int):
+    base = cliente.base_local
+    with base.transaccion() as c:
+        base.insertar(c, "evaluaciones", [
+            {"id_evaluacion": str(uuid.UUID(int=i + 1)), "dependencia_general": f"DG {i % 3}", "formulario": 4}
+            for i in range(cantidad)
+        ])
+
+
+def test_listar_pasa_el_tope_de_filas_por_respuesta(cliente):
+    _evaluaciones(cliente, 2 * repositorio.FILAS_POR_PEDIDO + 500)
+    llamadas = cliente.base_local.llamadas
+
+    filas = repositorio_evaluaciones.listar(cliente, "id_evaluacion")
+
+    assert len({f["id_evaluacion"] for f in filas}) == len(filas) == 2500
+    assert cliente.base_local.llamadas - llamadas == 3
+    # La segunda lectura sale de la caché
+    assert repositorio_evaluaciones.listar(cliente, "id_evaluacion") is filas
+    assert cliente.base_local.llamadas - llamadas == 3
+
+
+def test_listar_con_filtros_y_multiplo_exacto(cliente):
+    _evaluaciones(cliente, 3 * repositorio.FILAS_POR_PEDIDO)
+
+    filas = repositorio_evaluaciones.listar(cliente, "id_evaluacion, dependencia_general", dependencia_general="DG 0")
+
+    assert len(filas) == repositorio.FILAS_POR_PEDIDO
+    assert {f["dependencia_general"] for f in filas} == {"DG 0"}
+
+
+def _listado(cliente, cantidad: int):
+    base = cliente.base_local
+    with base.transaccion() as c:
+        base.insertar(c, "evaluaciones", [
+            {"id_evaluacion": str(uuid.UUID(int=i + 1)), "dependencia": "D 1", "formulario": 4,
+             "apellido_nombre": f"AGENTE {i % 40:02d}", "fecha_evaluacion": None if i % 7 else "2025-01-01",
+             "calificacion": "DESTACADO" if i % 10 == 0 else "BUENO", "anulada": i % 11 == 0}
+            for i in range(cantidad)
+        ])
+
+
+def test_pagina_de_unidad_va_directo_a_la_pagina(cliente):
+    _listado(cliente, 230)
+    todas = [f["id_evaluacion"] for f in repositorio_evaluaciones.de_unidad(cliente, dependencia="D 1", anulada=False)]
+    llamadas = cliente.base_local.llamadas
+
+    pagina = repositorio_evaluaciones.pagina_de_unidad(cliente, 4, 20, dependencia="D 1", anulada=False)
+
+    # Una sola llamada, sin recorrer las anteriores, aunque haya fechas nulas
+    assert cliente.base_local.llamadas - llamadas == 1
+    assert [f["id_evaluacion"] for f in pagina] == todas[80:100]
+    assert repositorio_evaluaciones.contar_de_unidad(cliente, dependencia="D 1", anulada=False) == len(todas)
+    ultima = repositorio_evaluaciones.pagina_de_unidad(cliente, len(todas) // 20, 20, dependencia="D 1", anulada=False)
+    assert [f["id_evaluacion"] for f in ultima] == todas[len(todas) // 20 * 20:]
+
+
+def test_de_unidad_filtra_por_calificacion(cliente):
+    _listado(cliente, 230)
+
+    filas = repositorio_evaluaciones.de_unidad(
+        cliente, repositorio_evaluaciones.COLUMNAS_RESUMEN, dependencia="D 1", anulada=False, calificacion="DESTACADO"
+    )
+
+    assert len(filas) == sum(1 for i in range(230) if i % 10 == 0 and i % 11)
+    assert {f["calificacion"] for f in filas} == {"DESTACADO"}
+
+
+# ---- Caché compartida ----
+
+def _consultar(clave, tags=("t",), ttl=60, cargar=None):
+    # Sin memo del rerun, para ver solo la caché compartida
+    repositorio.iniciar_ejecucion()
+    return repositorio.consultar(clave, tags, cargar or (lambda: clave), ttl)
+
+
+def test_cache_descarta_la_menos_usada(cliente, monkeypatch):
+    monkeypatch.setattr(repositorio, "MAXIMO_ENTRADAS_COMPARTIDA", 3)
+    for clave in ("a", "b", "c"):
+        _consultar(clave)
+    _consultar("a")  # "b" queda como la menos usada
+    _consultar("d")
+
+    assert set(repositorio._cache_compartida) == {"a", "c", "d"}
+    assert repositorio._indice_tags["t"] == {"a", "c", "d"}
+
+
+def test_cache_purga_las_vencidas_al_guardar(cliente):
+    repositorio.invalidar("t", "u")
+    _consultar("vencida", tags=("u",), ttl=-1)
+    _consultar("otra")
+
+    assert "vencida" not in repositorio._cache_compartida
+    assert "u" not in repositorio._indice_tags
+
+
+def test_carga_en_curso_al_invalidar_no_se_guarda(cliente):
+    def cargar():
+        repositorio.invalidar("t")  # una escritura mientras se leía
+        return "vieja"
+
+    assert _consultar("x", cargar=cargar) == "vieja"
+    assert "x" not in repositorio._cache_compartida
+    assert _consultar("x", cargar=lambda: "nueva") == "nueva"
+    assert _consultar("x", cargar=lambda: "otra") == "nueva"
@@ -0,0 +1,315 @@
+import re
+import threading
+import uuid
+
+import pytest
+
+from conftest import RAIZ, insertar_postgres, leer_postgres
+from modules import supabase_local
+from modules.supabase_local import RPCS, BaseLocal, ErrorLocal, sembrar
+
+Json = pytest.importorskip("psycopg2.extras").Json
+psycopg2 = pytest.importorskip("psycopg2")
+
+# Las funciones de sql/*.sql contra su réplica en Python del backend local
+# (supabase_local.RPCS), sobre los mismos datos sembrados: mismas respuestas,
+# mismos errores y mismo estado final de las tablas en las dos bases. Las de
+# sql/analisis_bdd.sql se comparan en test_analisis_bdd_sql.py.
+
+# Funciones de sql/ que no se llaman como RPC (las de triggers empiezan con _)
+FUNCIONES_INTERNAS = {"cupo_destacados_de"}
+TABLAS_SEMBRADAS = ("unidades_evaluacion", "agentes", "evaluaciones")
+
+
+def _funciones_sql() -> set:
+    nombres = set()
+    for archivo in (RAIZ / "sql").glob("*.sql"):
+        nombres |= set(re.findall(r"create or replace function (\w+)", archivo.read_text(encoding="utf-8")))
+    return {n for n in nombres if not n.startswith("_")} - FUNCIONES_INTERNAS
+
+
+def test_cada_funcion_de_sql_tiene_su_rpc_local():
+    assert _funciones_sql() == set(RPCS)
+
+
+@pytest.fixture
+def bases(postgres):
+    """(conexión a PostgreSQL, BaseLocal) con los mismos datos sembrados."""
+    local = BaseLocal()
+    # 415: la última dependencia general tiene 15 agentes, con el cupo en una mitad (4,5)
+    sembrar(local, agentes=415, semilla=3)
+    for tabla in TABLAS_SEMBRADAS:
+        insertar_postgres(postgres, tabla, local.decodificar(tabla, local.leer(f"select * from {tabla}")))
+    return postgres, local
+
+
+def _rpc_postgres(postgres, funcion: str, parametros: dict) -> list:
+    argumentos = ", ".join(f"{nombre} => %s" for nombre in parametros)
+    valores = [Json(v) if isinstance(v, dict) else v for v in parametros.values()]
+    return leer_postgres(postgres, f"select * from {funcion}({argumentos})", valores)
+
+
+def _tabla(postgres, local: BaseLocal, tabla: str, columnas: str, clave: str) -> tuple:
+    """Filas de `tabla` en las dos bases, ordenadas por `clave`."""
+    en_postgres = leer_postgres(postgres, f"select {columnas} from {tabla} order by {clave}")
+    en_local = local.decodificar(tabla, local.leer(f"select {columnas} from {tabla} order by {clave}"))
+    return en_postgres, en_local
+
+
+def _ordenadas(filas: list) -> list:
+    return sorted(filas, key=lambda f: sorted((k, str(v)) for k, v in f.items()))
+
+
+def test_cupo_mantenido_por_triggers(bases):
+    postgres, local = bases
+
+    en_postgres, en_local = _tabla(
+        postgres, local, "cupo_destacados", "dependencia_general, agentes_activos, destacados, cupo",
+        "dependencia_general"
+    )
+
+    assert en_postgres == en_local
+    assert any(f["destacados"] for f in en_local)
+
+
+def test_cupo_cuenta_solo_el_anio_en_evaluacion(bases):
+    postgres, local = bases
+    dependencia = local.leer("select dependencia_general from cupo_destacados order by dependencia_general limit 1")[0]
+    columnas = "dependencia_general, destacados"
+
+    def destacados() -> dict:
+        en_postgres, en_local = _tabla(postgres, local, "cupo_destacados", columnas, "dependencia_general")
+        assert en_postgres == en_local
+        return {f["dependencia_general"]: f["destacados"] for f in en_local}
+
+    antes = destacados()
+    anterior = {"id_evaluacion": str(uuid.UUID(int=1)), "dependencia_general": dependencia["dependencia_general"],
+                "calificacion": "DESTACADO", "anio_evaluacion": supabase_local.ANIO_CUPO_DESTACADOS - 1}
+    insertar_postgres(postgres, "evaluaciones", [anterior])
+    with local.transaccion() as c:
+        local.insertar(c, "evaluaciones", [anterior])
+    assert destacados() == antes
+
+    # La carga inicial de sql/cupo_destacados.sql llega a los mismos contadores
+    with postgres.cursor() as c:
+        c.execute((RAIZ / "sql" / "cupo_destacados.sql").read_text(encoding="utf-8"))
+    assert destacados() == antes
+
+    sql = "update evaluaciones set anio_evaluacion = {} where id_evaluacion = '{}'".format(
+        supabase_local.ANIO_CUPO_DESTACADOS, anterior["id_evaluacion"]
+    )
+    with postgres.cursor() as c:
+        c.execute(sql)
+    with local.transaccion() as c:
+        c.execute(sql)
+    assert destacados() == {**antes, dependencia["dependencia_general"]: antes[dependencia["dependencia_general"]] + 1}
+
+
+@pytest.mark.parametrize("funcion", [
+    "resumen_avance_evaluacion", "avance_por_dependencia_general", "cupo_destacados_por_dependencia",
+])
+def test_agregados(bases, funcion):
+    postgres, local = bases
+
+    assert _ordenadas(_rpc_postgres(postgres, funcion, {})) == _ordenadas(local.rpc(funcion, {}))
+
+
+@pytest.mark.parametrize("columna", ["nivel", "grado", "activo", "dependencia_general", "motivo_inactivo"])
+def test_valores_distintos(bases, columna):
+    postgres, local = bases
+    parametros = {"p_columna": columna}
+
+    assert _rpc_postgres(postgres, "valores_distintos_agentes", parametros) == local.rpc("valores_distintos_agentes", parametros)
+
+
+def test_valores_distintos_columna_inexistente(bases):
+    postgres, local = bases
+
+    with pytest.raises(psycopg2.Error):
+        _rpc_postgres(postgres, "valores_distintos_agentes", {"p_columna": "no_existe"})
+    with pytest.raises(ErrorLocal):
+        local.rpc("valores_distintos_agentes", {"p_columna": "no_existe"})
+
+
+def test_anular_evaluaciones(bases):
+    postgres, local = bases
+    ids = [f["id_evaluacion"] for f in local.leer("select id_evaluacion from evaluaciones order by id_evaluacion limit 6")]
+    inexistente = str(uuid.UUID(int=0))
+    local.rpc("anular_evaluaciones", {"p_ids": ids[:2]})
+    _rpc_postgres(postgres, "anular_evaluaciones", {"p_ids": ids[:2]})
+    pedido = {"p_ids": ids[1:] + [inexistente]}
+
+    en_postgres = _rpc_postgres(postgres, "anular_evaluaciones", pedido)
+    en_local = local.rpc("anular_evaluaciones", pedido)
+
+    assert _ordenadas(en_postgres) == _ordenadas(en_local)
+    assert [f["resultado"] for f in en_local] == ["ya_anulada"] + ["anulada"] * 4 + ["inexistente"]
+    for tabla, columnas, clave in [
+        ("evaluaciones", "id_evaluacion, anulada", "id_evaluacion"),
+        ("agentes", "cuil, evaluado_2024", "cuil"),
+        ("cupo_destacados", "dependencia_general, destacados", "dependencia_general"),
+    ]:
+        en_postgres, en_local = _tabla(postgres, local, tabla, columnas, clave)
+        assert en_postgres == en_local, tabla
+
+
+def _evaluacion(agente: dict, calificacion: str) -> dict:
+    return {
+        "cuil": agente["cuil"], "apellido_nombre": agente["apellido_nombre"], "nivel": agente["nivel"],
+        "grado": agente["grado"], "dependencia": agente["dependencia"], "anio_evaluacion": 2024,
+        "evaluador": agente["evaluador_2024"], "formulario": 5, "factor_puntaje": {"Factor 1": 4},
+        "factor_posicion": {"Factor 1": 1}, "puntaje_total": 32 if calificacion == "DESTACADO" else 20,
+        "puntaje_maximo": 32, "puntaje_relativo": 10.0, "calificacion": calificacion,
+        "fecha_notificacion": "2024-12-01", "residual": False, "activo": True,
+    }
+
+
+def _registrar(postgres, local: BaseLocal, parametros: dict) -> tuple:
+    """(resultado en PostgreSQL, resultado local) sin id_evaluacion (lo genera
+    cada base), o el código de error."""
+    try:
+        en_postgres = _rpc_postgres(postgres, "registrar_evaluacion", parametros)
+        en_postgres = [{k: v for k, v in f.items() if k != "id_evaluacion"} for f in en_postgres]
+    except psycopg2.Error as e:
+        en_postgres = e.pgcode
+    try:
+        en_local = [{k: v for k, v in f.items() if k != "id_evaluacion"} for f in local.rpc("registrar_evaluacion", parametros)]
+    except ErrorLocal as e:
+        en_local = e.code
+    return en_postgres, en_local
+
+
+def test_registrar_evaluacion_hasta_agotar_el_cupo(bases):
+    postgres, local = bases
+    cupo = local.leer("select * from cupo_destacados order by cupo - destacados limit 1")[0]
+    pendientes = local.decodificar("agentes", local.leer(
+        "select * from agentes where dependencia_general = ? and evaluado_2024 is not 1 order by cuil",
+        (cupo["dependencia_general"],),
+    ))
+    disponibles = cupo["cupo"] - cupo["destacados"]
+    assert len(pendientes) > disponibles + 2
+
+    claves = [str(uuid.UUID(int=i + 1)) for i in range(disponibles + 2)]
+    resultados = [
+        _registrar(postgres, local, {"p_evaluacion": _evaluacion(agente, "DESTACADO"), "p_clave_idempotencia": clave})
+        for agente, clave in zip(pendientes, claves)
+    ]
+    # Un reintento con una clave ya usada y un alta que no consume cupo
+    resultados.append(_registrar(postgres, local, {
+        "p_evaluacion": _evaluacion(pendientes[0], "DESTACADO"), "p_clave_idempotencia": claves[0],
+    }))
+    resultados.append(_registrar(postgres, local, {
+        "p_evaluacion": _evaluacion(pendientes[-1], "BUENO"), "p_clave_idempotencia": str(uuid.uuid4()),
+    }))
+
+    for en_postgres, en_local in resultados:
+        assert en_postgres == en_local
+    assert [r for r, _ in resultados[disponibles:disponibles + 2]] == ["EV001", "EV001"]
+    assert resultados[-2][1][0]["duplicada"] and not resultados[-1][1][0]["duplicada"]
+
+    for tabla, columnas, clave in [
+        ("evaluaciones", "clave_idempotencia, cuil, dependencia_general, unidad_evaluadora, unidad_analisis, "
+                         "calificacion, anulada, bonificacion_elegible", "clave_idempotencia"),
+        ("agentes", "cuil, evaluado_2024", "cuil"),
+        ("cupo_destacados", "dependencia_general, destacados, cupo", "dependencia_general"),
+    ]:
+        en_postgres, en_local = _tabla(postgres, local, tabla, columnas, clave)
+        assert en_postgres == en_local, tabla
+
+
+def test_envios_simultaneos_no_superan_el_cupo(bases, dsn_postgres):
+    """N conexiones envían a la vez un DESTACADO en la misma dependencia
+    general: el FOR UPDATE sobre cupo_destacados las valida de a una."""
+    postgres, local = bases
+    cupo = local.leer("select * from cupo_destacados order by cupo - destacados limit 1")[0]
+    pendientes = local.decodificar("agentes", local.leer(
+        "select * from agentes where dependencia_general = ? and evaluado_2024 is not 1 order by cuil",
+        (cupo["dependencia_general"],),
+    ))
+    disponibles = cupo["cupo"] - cupo["destacados"]
+    envios = min(len(pendientes), disponibles + 8)
+    assert envios > disponibles
+
+    esquema = leer_postgres(postgres, "select current_schema() as esquema")[0]["esquema"]
+    conexiones = []
+    for _ in range(envios):
+        conexion = psycopg2.connect(dsn_postgres)
+        conexion.autocommit = True
+        with conexion.cursor() as c:
+            c.execute(f"set search_path to {esquema}, public")
+        conexiones.append(conexion)
+    barrera = threading.Barrier(envios)
+    resultados = [None] * envios
+
+    def enviar(i: int):
+        barrera.wait()
+        try:
+            _rpc_postgres(conexiones[i], "registrar_evaluacion", {
+                "p_evaluacion": _evaluacion(pendientes[i], "DESTACADO"),
+                "p_clave_idempotencia": str(uuid.UUID(int=i + 1)),
+            })
+            resultados[i] = "aceptada"
+        except psycopg2.Error as e:
+            resultados[i] = e.pgcode
+
+    hilos = [threading.Thread(target=enviar, args=(i,)) for i in range(envios)]
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        for conexion in conexiones:
+            conexion.close()
+
+    assert resultados.count("aceptada") == disponibles
+    assert resultados.count("EV001") == envios - disponibles
+    final = leer_postgres(postgres, "select destacados, cupo from cupo_destacados where dependencia_general = %s",
+                          [cupo["dependencia_general"]])[0]
+    assert final["destacados"] == final["cupo"] == cupo["cupo"]
+
+
+def test_alta_y_anulacion_recalculan_bdd_en_la_misma_transaccion(bases):
+    postgres, local = bases
+    marca = {"id": "analisis_bdd_realizado", "valor": True, "actualizado_por": "prueba"}
+    insertar_postgres(postgres, "configuracion", [{**marca, "valor": Json(True)}])
+    with local.transaccion() as c:
+        local.insertar(c, "configuracion", [marca])
+    agente = local.decodificar("agentes", local.leer(
+        "select * from agentes where evaluado_2024 is not 1 and dependencia_general is not null order by cuil limit 1"
+    ))[0]
+    dependencia = [agente["dependencia_general"]]
+    alta = {"p_evaluacion": _evaluacion(agente, "BUENO"), "p_clave_idempotencia": str(uuid.UUID(int=1))}
+
+    for duplicada in (False, True):  # el reintento no vuelve a insertar
+        en_postgres, en_local = _registrar(postgres, local, alta)
+        assert en_postgres == en_local == [{"dependencia_general": dependencia[0], "duplicada": duplicada}]
+    id_alta = local.leer("select id_evaluacion from evaluaciones where clave_idempotencia = ?",
+                         (alta["p_clave_idempotencia"],))[0]["id_evaluacion"]
+    ids = [id_alta] + [f["id_evaluacion"] for f in local.leer(
+        "select id_evaluacion from evaluaciones where dependencia_general = ? and calificacion = 'DESTACADO' "
+        "and anulada is not 1 order by id_evaluacion limit 2", tuple(dependencia)
+    )]
+    ids_postgres = [f["id_evaluacion"] for f in leer_postgres(
+        postgres, "select id_evaluacion::text from evaluaciones where clave_idempotencia = %s",
+        [alta["p_clave_idempotencia"]]
+    )] + ids[1:]
+    _rpc_postgres(postgres, "anular_evaluaciones", {"p_ids": ids_postgres})
+    local.rpc("anular_evaluaciones", {"p_ids": ids})
+
+    # Las marcas ya quedaron al día: recalcular de nuevo no cambia nada
+    assert _rpc_postgres(postgres, "actualizar_analisis_bdd", {"p_dependencias": dependencia}) == \
+        local.rpc("actualizar_analisis_bdd", {"p_dependencias": dependencia}) == [{"filas_actualizadas": 0}]
+    en_postgres, en_local = _tabla(
+        postgres, local, "evaluaciones",
+        "clave_idempotencia, residual, bonificacion_elegible, bonificacion_manual", "clave_idempotencia"
+    )
+    assert en_postgres == en_local
+
+
+def test_semilla_no_depende_del_directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    cliente = supabase_local.crear_cliente(agentes=50)
+
+    assert cliente.base_local.leer("select count(*) as n from evaluaciones")[0]["n"] > 0
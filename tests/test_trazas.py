@@ -0,0 +1,32 @@
+from streamlit.testing.v1 import AppTest
+
+from modules import trazas
+
+# Trazas de llamadas dentro de un rerun real de Streamlit (AppTest), contra el
+# backend local.
+
+
+def _app():
+    import streamlit as st
+    from modules import supabase_local, trazas
+
+    cliente = trazas.instalar(supabase_local.crear_cliente(sembrar_si_vacia=False))
+    trazas.iniciar_rerun()
+    trazas.vista("formularios")
+    cliente.table("configuracion").select("valor").eq("id", "formulario_activo").execute()
+    st.session_state.clear()  # como el cierre de sesión por inactividad de auth
+    for i in range(trazas.UMBRAL_N_MAS_1 + 1):
+        cliente.table("agentes").select("cuil").eq("cuil", str(i)).execute()
+
+
+def test_llamadas_despues_de_vaciar_session_state_y_n_mas_1():
+    AppTest.from_function(_app).run()
+
+    rerun = trazas.reruns()[-1]
+    assert rerun.vista == "formularios"
+    assert [(l.tabla, l.filtros) for l in rerun.llamadas[:2]] == [
+        ("configuracion", ("id=eq.formulario_activo",)), ("agentes", ("cuil=eq.0",)),
+    ]
+    assert len(rerun.llamadas) == trazas.UMBRAL_N_MAS_1 + 2
+    assert rerun.n_mas_1() == [(("agentes", "select", ("cuil",)), trazas.UMBRAL_N_MAS_1 + 1)]
+    assert trazas.resumen_por_vista([rerun]).loc["formularios", "reruns_n_mas_1"] == 1
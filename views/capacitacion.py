@@ -1,18 +1,20 @@
 import streamlit as st
 import pandas as pd
 from streamlit_option_menu import option_menu
+from modules import repositorio_agentes, repositorio_evaluaciones, repositorio_unidades
 
 from modules.capacitacion_listados import mostrar_listado_general
 from modules.capacitacion_analisis import mostrar_analisis
 from modules.capacitacion_destacados import mostrar_destacados
+from modules.capacitacion_factores import mostrar_factores
 
 def mostrar(supabase):
     st.markdown("<h1 style='font-size:26px;'>📊 Análisis y Gestión de Evaluaciones</h1>", unsafe_allow_html=True)
 
     # --- Carga inicial de datos
-    evals = supabase.table("evaluaciones").select("*").execute().data or []
-    agentes = supabase.table("agentes").select("cuil, apellido_nombre, activo, dependencia_general").execute().data or []
-    unids = supabase.table("unidades_evaluacion").select("*").execute().data or []
+    evals = repositorio_evaluaciones.listar(supabase)
+    agentes = repositorio_agentes.listar(supabase, "cuil, apellido_nombre, activo, dependencia_general")
+    unids = repositorio_unidades.todas(supabase)
 
     if not evals or not unids:
         st.warning("⚠️ No hay datos suficientes para mostrar esta vista.")
@@ -23,7 +25,7 @@ def mostrar(supabase):
     # --- Menú de navegación (tabs estilo botones)
     seleccion = option_menu(
         menu_title=None,
-        options=["📋 LISTADOS", "📊 ANÁLISIS", "🌟 DESTACADOS"],
+        options=["📋 LISTADOS", "📊 ANÁLISIS", "🌟 DESTACADOS", "🧩 FACTORES"],
  #       icons=["bar-chart-line", "clipboard-check"],
         orientation="horizontal",
         default_index=0,
@@ -64,4 +66,7 @@ def mostrar(supabase):
         mostrar_analisis(df_evals, agentes, supabase)
 
     elif seleccion == "🌟 DESTACADOS":
-        mostrar_destacados(df_evals, agentes)
+        mostrar_destacados(supabase)
+
+    elif seleccion == "🧩 FACTORES":
+        mostrar_factores(supabase)
@@ -3,30 +3,20 @@ from datetime import datetime
 import pandas as pd
 import secrets
 import bcrypt
+from modules import auth, sesion, trazas
+from modules import repositorio, repositorio_agentes, repositorio_configuracion
 
+@repositorio.consulta_cacheada(ttl=60)
 def cargar_configuracion(supabase):
-    datos = supabase.table("configuracion").select("*").execute().data
-    return cachear_configuracion(datos)
-
-@st.cache_data(ttl=60)
-def cachear_configuracion(datos):
-    return datos
+    return supabase.table("configuracion").select("*")
 
+@repositorio.consulta_cacheada(ttl=60)
 def cargar_agentes(supabase):
-    datos = supabase.table("agentes").select("cuil, apellido_nombre, dependencia, evaluador_2024").execute().data
-    return cachear_agentes(datos)
-
-@st.cache_data(ttl=60)
-def cachear_agentes(datos):
-    return datos
+    return supabase.table("agentes").select("cuil, apellido_nombre, dependencia, evaluador_2024")
 
+@repositorio.consulta_cacheada(ttl=60)
 def cargar_usuarios(supabase):
-    datos = supabase.table("usuarios").select("usuario, apellido_nombre, dependencia, dependencia_general, activo").execute().data
-    return cachear_usuarios(datos)
-
-@st.cache_data(ttl=60)
-def cachear_usuarios(datos):
-    return datos
+    return supabase.table("usuarios").select("usuario, apellido_nombre, dependencia, dependencia_general, activo")
 
 def mostrar(supabase):
     st.markdown("<h1 style='font-size:26px;'>⚙️ Configuración del Sistema</h1>", unsafe_allow_html=True)
@@ -60,16 +50,11 @@ def mostrar(supabase):
     )
 
     if st.button("💾 Guardar cambios", type="primary"):
-        usuario = st.session_state.get("usuario", "desconocido")
+        usuario = sesion.perfil_actual().usuario
         for i, row in edit_config.iterrows():
             id_config = df_config.loc[i, "ID"]
             nuevo_valor = row["Activo"]
-            supabase.table("configuracion").upsert({
-                "id": id_config,
-                "valor": nuevo_valor,
-                "actualizado_por": usuario
-            }).execute()
-        st.cache_data.clear()
+            repositorio_configuracion.guardar(supabase, id_config, nuevo_valor, usuario)
         st.success("✅ Configuración actualizada correctamente.")
         st.rerun()
 
@@ -120,12 +105,9 @@ def mostrar(supabase):
             if st.button("🔁 Actualizar asignación", type="primary"):
                 nuevo_usuario = opciones_evaluador[nombre_evaluador]
                 dependencia_gral = mapa_usuarios[nuevo_usuario]["dependencia_general"]
-                supabase.table("agentes").update({
-                    "dependencia": nueva_dependencia,
-                    "dependencia_general": dependencia_gral,
-                    "evaluador_2024": nuevo_usuario
-                }).eq("cuil", agente["cuil"]).execute()
-                st.cache_data.clear()
+                repositorio_agentes.actualizar_asignacion(
+                    supabase, agente["cuil"], nueva_dependencia, dependencia_gral, nuevo_usuario
+                )
                 st.success("✅ Datos actualizados correctamente.")
                 st.rerun()
 
@@ -161,7 +143,9 @@ def mostrar(supabase):
                     "password": hashed,
                     "cambiar_password": True
                 }).eq("usuario", nuevo_usuario).execute()
-                st.cache_data.clear()
+                repositorio.invalidar("usuarios")
+                auth.invalidar_directorio_usuarios()
+                sesion.invalidar_perfil(nuevo_usuario)
 
                 st.success(f"""
                 ✅ Contraseña generada correctamente:
@@ -169,3 +153,8 @@ def mostrar(supabase):
                 - **Usuario**: `{nuevo_usuario}`  
                 - **Contraseña temporal**: `{nueva_password}`
                 """)
+
+    st.divider()
+
+    # --- DIAGNÓSTICO (la vista solo es accesible para coordinadores) ---
+    trazas.mostrar_panel()
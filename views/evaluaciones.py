@@ -1,37 +1,69 @@
 import streamlit as st
 import pandas as pd
 from pytz import timezone
-import time
 
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.oxml import OxmlElement
-
-from docx.oxml.ns import qn
-import tempfile
-from docx.shared import Cm 
 from streamlit_option_menu import option_menu
 import plotly.graph_objects as go
 from plotly.colors import qualitative
+from modules import informes_docx, sesion
+from modules import repositorio_agentes, repositorio_configuracion, repositorio_cupos, repositorio_evaluaciones, repositorio_unidades
+from modules.catalogo_formularios import MAPA_NIVEL_EVALUACION, MAXIMO_PUNTAJE_FORMULARIO
+
+
+REGISTROS_POR_PAGINA = 8
+HORA_ARG = timezone('America/Argentina/Buenos_Aires')
 
-MAPA_NIVEL_EVALUACION = {
-    "1": "Jerárquico (1)",
-    "2": "Medio (2)",
-    "3": "Medio (3)",
-    "4": "Medio (4)",
-    "5": "Operativo (5)",
-    "6": "Operativo (6)"
-}
 
-MAXIMO_PUNTAJE_FORMULARIO = {
-    "1": 56,
-    "2": 48,
-    "3": 48,
-    "4": 40,
-    "5": 32,
-    "6": 24
-}
+def _formatear_listado(df):
+    """Agrega Fecha_formateada, Nivel Eval, Puntaje/Máximo y calif_puntaje a un listado de evaluaciones."""
+    df["anulada"] = df["anulada"].fillna(False).astype(bool)
+    if not df["fecha_evaluacion"].isna().all():
+        df["Fecha_formateada"] = (
+            pd.to_datetime(df["fecha_evaluacion"], utc=True).dt.tz_convert(HORA_ARG).dt.strftime('%d/%m/%Y %H:%M')
+        )
+    else:
+        df["Fecha_formateada"] = ""
+    df["Nivel Eval"] = df["formulario"].astype(str).map(MAPA_NIVEL_EVALUACION)
+    df["Puntaje/Máximo"] = [
+        f"{p}/{MAXIMO_PUNTAJE_FORMULARIO.get(str(f), '-')}" for p, f in zip(df["puntaje_total"], df["formulario"])
+    ]
+    df["calif_puntaje"] = [
+        f"{c} ({p})" if pd.notna(c) and pd.notna(p) else "" for c, p in zip(df["calificacion"], df["puntaje_total"])
+    ]
+    return df
+
+
+def _pagina_servidor(supabase, clave: str, total: int, **unidad):
+    """Selector de página y filas de esa página, pedidas al servidor por rango."""
+    total_paginas = max(1, (total - 1) // REGISTROS_POR_PAGINA + 1)
+    paginas = list(range(1, total_paginas + 1))
+    if st.session_state.get(clave) not in paginas:
+        st.session_state[clave] = 1
+
+    pagina_actual = st.selectbox(
+        "Seleccionar página:",
+        options=paginas,
+        index=paginas.index(st.session_state[clave]),
+        key=f"{clave}_select"
+    )
+    st.session_state[clave] = pagina_actual
 
+    filas = repositorio_evaluaciones.pagina_de_unidad(
+        supabase, pagina_actual - 1, REGISTROS_POR_PAGINA, **unidad
+    )
+    return _formatear_listado(pd.DataFrame(
+        filas, columns=[c.strip() for c in repositorio_evaluaciones.COLUMNAS_LISTADO.split(",")]
+    ))
+
+
+def _resumen_no_anuladas(supabase, unidad: dict) -> pd.DataFrame:
+    """cuil, formulario, calificación y puntaje de las evaluaciones no anuladas de la unidad."""
+    return pd.DataFrame(
+        repositorio_evaluaciones.de_unidad(
+            supabase, repositorio_evaluaciones.COLUMNAS_RESUMEN, anulada=False, **unidad
+        ),
+        columns=[c.strip() for c in repositorio_evaluaciones.COLUMNAS_RESUMEN.split(",")],
+    )
 
 
 # ---- Vista: Evaluaciones ----
@@ -39,13 +71,11 @@ def mostrar(supabase):
     #st.header("📋 Evaluaciones realizadas")
     st.markdown("<h2 style='font-size:26px;'>📋 Evaluaciones realizadas</h2>", unsafe_allow_html=True)
     
-    # Función para verificar rol activo
-    def tiene_rol(*roles):
-        return any(st.session_state.get("rol", {}).get(r, False) for r in roles)
-
-    # Rol y dependencias desde sesión
-    dependencia_usuario = st.session_state.get("dependencia", "")
-    dependencia_general = st.session_state.get("dependencia_general", "")
+    # Rol y dependencias desde el perfil de la sesión
+    perfil = sesion.perfil_actual()
+    tiene_rol = perfil.tiene_rol
+    dependencia_usuario = perfil.dependencia
+    dependencia_general = perfil.dependencia_general
 
     # Construir opciones de filtro de dependencia
     opciones_dependencia = []
@@ -58,12 +88,9 @@ def mostrar(supabase):
 
     dependencias_subordinadas = []
     if tiene_rol("coordinador", "evaluador_general") and dependencia_general:
-        resultado = supabase.table("unidades_evaluacion")\
-            .select("dependencia")\
-            .eq("dependencia_general", dependencia_general)\
-            .neq("dependencia", dependencia_usuario)\
-            .execute()
-        dependencias_subordinadas = sorted({d["dependencia"] for d in resultado.data})
+        dependencias_subordinadas = repositorio_unidades.dependencias_de_general(
+            supabase, dependencia_general, excluir=dependencia_usuario
+        )
         opciones_dependencia += [
             d for d in dependencias_subordinadas
             if d != dependencia_usuario and "UNIDAD RESIDUAL" not in d.upper()
@@ -71,16 +98,22 @@ def mostrar(supabase):
 
     dependencia_seleccionada = st.selectbox("📂 Dependencia a visualizar:", opciones_dependencia)
 
-    # Filtrar agentes por dependencia seleccionada
+    # Filtrar agentes por dependencia seleccionada. Las evaluaciones se filtran
+    # en el servidor por la unidad guardada en cada una (la del agente al darla
+    # de alta), como el cupo de DESTACADO y el análisis BDD: un agente
+    # reasignado después de evaluado sigue figurando en la unidad que lo evaluó.
     if dependencia_seleccionada and "(todas)" in dependencia_seleccionada:
         dependencia_filtro = dependencia_general
-        agentes = supabase.table("agentes").select("cuil, evaluado_2024").eq("dependencia_general", dependencia_filtro).execute().data
+        agentes = repositorio_agentes.por_dependencia_general(supabase, dependencia_filtro)
+        unidad = {"dependencia_general": dependencia_filtro}
     elif dependencia_seleccionada and "(individual)" in dependencia_seleccionada:
         dependencia_filtro = dependencia_usuario
-        agentes = supabase.table("agentes").select("cuil, evaluado_2024").eq("dependencia", dependencia_filtro).execute().data
+        agentes = repositorio_agentes.por_dependencia(supabase, dependencia_filtro)
+        unidad = {"dependencia": dependencia_filtro}
     elif dependencia_seleccionada:
         dependencia_filtro = dependencia_seleccionada
-        agentes = supabase.table("agentes").select("cuil, evaluado_2024").eq("dependencia", dependencia_filtro).execute().data
+        agentes = repositorio_agentes.por_dependencia(supabase, dependencia_filtro)
+        unidad = {"dependencia": dependencia_filtro}
     else:
         st.warning("⚠️ Seleccione una dependencia válida para continuar.")
         return
@@ -92,47 +125,7 @@ def mostrar(supabase):
 
   #  st.markdown("# ")
     
-    # Obtener evaluaciones filtradas
-    evaluaciones = supabase.table("evaluaciones").select("*").in_("cuil", cuils_asignados).execute().data
-    df_eval = pd.DataFrame(evaluaciones)
-    
-    if df_eval.empty:
-        df_eval = pd.DataFrame(columns=[
-            "formulario", "calificacion", "anulada", "fecha_evaluacion", "apellido_nombre",
-            "puntaje_total", "evaluador", "id_evaluacion", "cuil"
-        ])
-    
-    if "anulada" not in df_eval.columns:
-        df_eval["anulada"] = False
-    else:
-        df_eval["anulada"] = df_eval["anulada"].fillna(False).astype(bool)
-    
-    if "fecha_evaluacion" in df_eval.columns and not df_eval["fecha_evaluacion"].isna().all():
-        hora_arg = timezone('America/Argentina/Buenos_Aires')
-        df_eval["Fecha"] = pd.to_datetime(df_eval["fecha_evaluacion"], utc=True).dt.tz_convert(hora_arg)
-        df_eval["Fecha_formateada"] = df_eval["Fecha"].dt.strftime('%d/%m/%Y %H:%M')
-    else:
-        df_eval["Fecha_formateada"] = ""
-    
-    df_eval["Estado"] = df_eval["anulada"].apply(lambda x: "Anulada" if x else "Registrada")
-    df_no_anuladas = df_eval[df_eval["anulada"] == False].copy()
-
-    if "calif_puntaje" not in df_no_anuladas.columns:
-        df_no_anuladas["calif_puntaje"] = df_no_anuladas.apply(
-            lambda row: f"{row['calificacion']} ({row['puntaje_total']})"
-            if pd.notna(row.get("calificacion")) and pd.notna(row.get("puntaje_total"))
-            else "",
-            axis=1
-        )
-    
-    # Unir con datos de agentes si no están ya
-    agentes_completos = supabase.table("agentes").select("*").in_("cuil", cuils_asignados).execute().data
-    df_agentes = pd.DataFrame(agentes_completos)
-    
-    if not df_agentes.empty:
-        df_no_anuladas = df_no_anuladas.merge(df_agentes[[
-            "cuil", "agrupamiento", "nivel", "ingresante", "apellido_nombre"
-        ]], on="cuil", how="left", suffixes=("", "_agente"))
+    df_agentes = pd.DataFrame(agentes)
 
 
     
@@ -182,6 +175,7 @@ def mostrar(supabase):
     )
     
     if seleccion == "📊 INDICADORES":
+        df_no_anuladas = _resumen_no_anuladas(supabase, unidad)
         st.divider()
         st.markdown("<h2 style='font-size:20px;'>📊 Indicadores</h2>", unsafe_allow_html=True)
         cols = st.columns(3)
@@ -221,72 +215,28 @@ def mostrar(supabase):
             cantidad = df_no_anuladas["formulario"].isin(formularios).sum()
             cols[i].metric(titulo, cantidad)
     
-        columnas_necesarias = [
-            "cuil", "apellido_nombre", "calificacion", "puntaje_total", "formulario",
-            "nivel", "agrupamiento", "ingresante"
-        ]
-        for col in columnas_necesarias:
-            if col not in df_no_anuladas.columns:
-                df_no_anuladas[col] = ""
-    
     elif seleccion == "✅ EVALUACIONES":
+        # Los listados se piden de a una página; el total sale de count=exact
+        total_no_anuladas = repositorio_evaluaciones.contar_de_unidad(supabase, anulada=False, **unidad)
+        df_no_anuladas = _resumen_no_anuladas(supabase, unidad)
 
    
   
     
         st.markdown("<br><br>", unsafe_allow_html=True)  # Espacio más grande
     
-        # Asegurar columnas necesarias antes de usar la tabla
-        for col in ["apellido_nombre", "formulario", "calif_puntaje", "evaluador", "Fecha_formateada"]:
-            if col not in df_no_anuladas.columns:
-                df_no_anuladas[col] = ""
-        
         # ---- TABLA DE EVALUACIONES REGISTRADAS ----
         st.markdown("<h2 style='font-size:20px;'>✅ Evaluaciones registradas:</h2>", unsafe_allow_html=True)
         
-        if df_no_anuladas.empty:
+        if not total_no_anuladas:
             st.info("ℹ️ No hay evaluaciones registradas.")
         else:
-            # Crear copia para visualización sin afectar el original
-            df_visual = df_no_anuladas.copy()
-            
-            # Agregar columnas visuales
-            df_visual["Nivel Eval"] = df_visual["formulario"].astype(str).map(MAPA_NIVEL_EVALUACION)
-            df_visual["Puntaje/Máximo"] = df_visual.apply(
-                lambda row: f"{row['puntaje_total']}/{MAXIMO_PUNTAJE_FORMULARIO.get(str(row['formulario']), '-')}",
-                axis=1
+            df_visual = _pagina_servidor(
+                supabase, "pagina_evaluadas", total_no_anuladas, anulada=False, **unidad
             )
-            
-            # Ordenar para visualización
-            df_visual = df_visual.sort_values(by=["apellido_nombre", "Fecha_formateada"])
-            
-            # Paginación
-            registros_por_pagina = 8
-            total_registros = len(df_visual)
-            total_paginas = max(1, (total_registros - 1) // registros_por_pagina + 1)
-            paginas = list(range(1, total_paginas + 1))
-            
-            if (
-                "pagina_evaluadas" not in st.session_state
-                or st.session_state["pagina_evaluadas"] not in paginas
-            ):
-                st.session_state["pagina_evaluadas"] = 1
-            
-            pagina_actual = st.selectbox(
-                "Seleccionar página:",
-                options=paginas,
-                index=paginas.index(st.session_state["pagina_evaluadas"]),
-                key="pagina_evaluadas_select"
-            )
-            
-            st.session_state["pagina_evaluadas"] = pagina_actual
-            
-            # Mostrar tabla formateada con paginación
-            inicio = (pagina_actual - 1) * registros_por_pagina
-            fin = inicio + registros_por_pagina
-            
+
             st.dataframe(
-                df_visual.iloc[inicio:fin][[
+                df_visual[[
                     "apellido_nombre", "Nivel Eval", "calificacion",
                     "Puntaje/Máximo", "evaluador", "Fecha_formateada"
                 ]].rename(columns={
@@ -300,156 +250,6 @@ def mostrar(supabase):
                 use_container_width=True,
                 hide_index=True
             )
-        def set_cell_style(cell, bold=True, bg_color=None, font_color="000000"):
-            para = cell.paragraphs[0]
-            run = para.runs[0] if para.runs else para.add_run(" ")
-            run.text = run.text if run.text.strip() else " "
-            run.font.name = "Calibri"
-            run.font.size = Pt(10)
-            run.font.bold = bold
-            run.font.color.rgb = RGBColor.from_string(font_color.upper())
-        
-            tc = cell._tc
-            tcPr = tc.get_or_add_tcPr()
-            if bg_color:
-                shd = OxmlElement("w:shd")
-                shd.set(qn("w:fill"), bg_color)
-                tcPr.append(shd)
-        
-            para.alignment = 1  # Centrado
-        
-        
-        def generar_informe_docx(df_base, df_eval, dependencia_nombre):
-            doc = Document()
-        
-            # Márgenes 2 cm
-            section = doc.sections[0]
-            section.top_margin = Cm(2)
-            section.bottom_margin = Cm(2)
-            section.left_margin = Cm(2)
-            section.right_margin = Cm(2)
-        
-            # Fuente general
-            doc.styles["Normal"].font.name = "Calibri"
-            doc.styles["Normal"].font.size = Pt(10)
-        
-            # Títulos con estilo
-            def titulo(texto):
-                p = doc.add_paragraph()
-                run = p.add_run(texto)
-                run.font.name = "Calibri"
-                run.font.size = Pt(10)
-                run.font.bold = True
-                run.font.color.rgb = RGBColor.from_string("104f8e")
-        
-            # Encabezado
-            header = section.header
-            p_header = header.paragraphs[0]
-            p_header.clear()
-            run = p_header.add_run(
-                f"INSTITUTO NACIONAL DE ESTADISTICA Y CENSOS\n"
-                f"DIRECCIÓN DE CAPACITACIÓN Y CARRERA DE PERSONAL\n"
-                f"EVALUACIÓN DE DESEMPEÑO 2024\n"
-                f"UNIDAD DE ANÁLISIS: {dependencia_nombre}"
-            )
-            run.font.name = "Calibri"
-            run.font.size = Pt(10)
-            run.font.bold = True
-            run.font.color.rgb = RGBColor.from_string("104f8e")
-            p_header.alignment = 1
-            p_header.paragraph_format.line_spacing = Pt(12)
-    
-    
-            
-            # AGRUPAMIENTO
-            doc.add_paragraph()
-    
-            titulo("PERSONAL TOTAL POR TIPO DE AGRUPAMIENTO")
-            gral = len(df_base[df_base["agrupamiento"] == "GRAL"])
-            prof = len(df_base[df_base["agrupamiento"] == "PROF"])
-            tabla_agrup = doc.add_table(rows=2, cols=2)
-            tabla_agrup.style = 'Table Grid'
-            for i, h in enumerate(["GENERAL", "PROFESIONAL"]):
-                tabla_agrup.cell(0, i).text = h
-                set_cell_style(tabla_agrup.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-                tabla_agrup.cell(1, i).text = str([gral, prof][i])
-                set_cell_style(tabla_agrup.cell(1, i), bold=False)
-        
-            doc.add_paragraph()
-        
-            # ESCALAFÓN
-            titulo("PERSONAL TOTAL POR TIPO DE NIVEL ESCALAFONARIO")
-            niveles = ["A", "B", "C", "D", "E"]
-            conteo_niveles = df_base["nivel"].value_counts()
-            tabla_nivel = doc.add_table(rows=2, cols=5)
-            tabla_nivel.style = 'Table Grid'
-            for i, nivel in enumerate(niveles):
-                tabla_nivel.cell(0, i).text = nivel
-                set_cell_style(tabla_nivel.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-                tabla_nivel.cell(1, i).text = str(conteo_niveles.get(nivel, 0))
-                set_cell_style(tabla_nivel.cell(1, i), bold=False)
-        
-            doc.add_paragraph()
-        
-            # EVALUADO / INGRESANTE
-            titulo("PERSONAL PARA EVALUAR/EVALUADO")
-            df_evaluable = df_base[df_base["ingresante"].isin([True, False])]
-            no_ingresantes = len(df_evaluable[df_evaluable["ingresante"] == False])
-            ingresantes = len(df_evaluable[df_evaluable["ingresante"] == True])
-            total_evaluable = no_ingresantes + ingresantes
-            evaluados = df_eval["calificacion"].apply(lambda x: x != "").sum()
-        
-            tabla_eval = doc.add_table(rows=2, cols=4)
-            tabla_eval.style = 'Table Grid'
-            eval_headers = [
-                "PERMANENTES NO INGRESANTE",
-                "PERMANENTES INGRESANTES",
-                "TOTAL A EVALUAR",
-                "TOTAL EVALUADO"
-            ]
-            for i, h in enumerate(eval_headers):
-                tabla_eval.cell(0, i).text = h
-                set_cell_style(tabla_eval.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-                tabla_eval.cell(1, i).text = str([no_ingresantes, ingresantes, total_evaluable, evaluados][i])
-                set_cell_style(tabla_eval.cell(1, i), bold=False)
-        
-            doc.add_paragraph()
-        
-            # FUNCION AUXILIAR: Listados por formulario
-            def agregar_tabla_por_formulario(titulo_texto, formularios):
-                titulo(titulo_texto)
-                subset = df_eval[df_eval["formulario"].astype(str).isin(formularios)].sort_values("apellido_nombre")
-        
-                tabla = doc.add_table(rows=1, cols=3)
-                tabla.style = 'Table Grid'
-                headers = ["APELLIDOS Y NOMBRES", "CALIFICACIÓN", "PUNTAJE"]
-                for i, col in enumerate(headers):
-                    tabla.cell(0, i).text = col
-                    set_cell_style(tabla.cell(0, i), bg_color="104f8e", font_color="FFFFFF")
-        
-                if subset.empty:
-                    doc.add_paragraph("No hay evaluaciones registradas en este nivel.")
-                    return
-        
-                for _, row in subset.iterrows():
-                    r = tabla.add_row().cells
-                    r[0].text = row.get("apellido_nombre", "")
-                    r[1].text = row.get("calificacion", "")
-                    puntaje = row.get("puntaje_total", "")
-                    try:
-                        puntaje_float = float(puntaje)
-                        puntaje = int(puntaje_float) if puntaje_float.is_integer() else puntaje_float
-                    except:
-                        pass
-                    r[2].text = str(puntaje)
-        
-            agregar_tabla_por_formulario("EVALUACIONES - NIVEL JERÁRQUICO (FORMULARIO 1)", ["1"])
-            doc.add_paragraph()
-            agregar_tabla_por_formulario("EVALUACIONES - NIVELES MEDIO (FORMULARIOS 2, 3 y 4)", ["2", "3", "4"])
-            doc.add_paragraph()
-            agregar_tabla_por_formulario("EVALUACIONES - NIVELES OPERATIVOS (FORMULARIOS 5 Y 6)", ["5", "6"])
-        
-            return doc
     
         
        
@@ -469,7 +269,7 @@ def mostrar(supabase):
         
         if df_informe.empty:
             st.warning("⚠️ No hay agentes registrados en esta unidad.")
-        elif df_no_anuladas.empty:
+        elif not total_no_anuladas:
             st.info("ℹ️ No hay evaluaciones registradas para generar el informe.")
         else:
             for col in ["formulario", "calificacion", "puntaje_total", "apellido_nombre"]:
@@ -479,58 +279,40 @@ def mostrar(supabase):
 
 
             
-            with st.spinner("✏️ Generando documento..."):
-                doc = generar_informe_docx(df_informe, df_evaluados, dependencia_filtro)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                    doc.save(tmp.name)
-                    tmp_path = tmp.name
-        
-            with open(tmp_path, "rb") as file:
-                st.download_button(
-                    label="📥 Descargar Informe",
-                    data=file,
-                    file_name=f"informe_{dependencia_filtro.replace(' ', '_')}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                 #   use_container_width=True,
-                    type="primary"
-                )        
+            informes_docx.boton_informe(
+                "unidad", dependencia_filtro, (df_informe, df_evaluados),
+                lambda: informes_docx.informe_unidad_docx(df_informe, df_evaluados, dependencia_filtro),
+                etiqueta="Informe",
+                archivo=f"informe_{dependencia_filtro.replace(' ', '_')}.docx",
+                key=f"unidad_{dependencia_filtro}",
+            )        
             
 
 
         # Mostrar tabla solo para evaluador_general con destacados y si hay al menos 4 agentes activos
-        if tiene_rol("evaluador_general") and not df_no_anuladas.empty:
+        if tiene_rol("evaluador_general") and total_no_anuladas:
             dependencia_actual = df_agentes["dependencia_general"].dropna().unique()
             dependencia_actual = dependencia_actual[0] if len(dependencia_actual) > 0 else ""
         
             if dependencia_actual:
                 try:
-                    # Obtener total de agentes activos en esa dependencia_general
-                    agentes_dependencia = supabase.table("agentes")\
-                        .select("cuil, activo")\
-                        .eq("dependencia_general", dependencia_actual)\
-                        .execute().data
-        
-                    
-                    total_activos = sum(1 for a in agentes_dependencia if a.get("activo") == True)
+                    # Contador mantenido en la base: una sola fila por dependencia general
+                    cupo = repositorio_cupos.de_dependencia_general(supabase, dependencia_actual)
                     
-                    if total_activos > 3:  # Mostrar solo si hay más de 3
-                        import math
-                        cupo_exacto = total_activos * 0.3
-                        max_destacados = math.floor(cupo_exacto) if (cupo_exacto - math.floor(cupo_exacto)) <= 0.5 else math.floor(cupo_exacto) + 1
+                    if cupo["agentes_activos"] > 3:  # Mostrar solo si hay más de 3
+                        max_destacados = cupo["cupo"]
+                        usados = cupo["destacados"]
                     
-                        df_destacados = df_no_anuladas[df_no_anuladas["calificacion"] == "DESTACADO"].copy()
-                        usados = len(df_destacados)
+                        df_destacados = _formatear_listado(pd.DataFrame(
+                            repositorio_evaluaciones.de_unidad(
+                                supabase, anulada=False, calificacion="DESTACADO", **unidad
+                            ),
+                            columns=[c.strip() for c in repositorio_evaluaciones.COLUMNAS_LISTADO.split(",")],
+                        ))
                     
                         st.markdown("---")
                         st.markdown(f"<h2 style='font-size:20px;'>🌟 Evaluaciones con calificación DESTACADO ({usados} / {max_destacados})</h2>", unsafe_allow_html=True)
-        
-                        df_destacados["Nivel Eval"] = df_destacados["formulario"].astype(str).map(MAPA_NIVEL_EVALUACION)
-                        df_destacados["Puntaje/Máximo"] = df_destacados.apply(
-                            lambda row: f"{row['puntaje_total']}/{MAXIMO_PUNTAJE_FORMULARIO.get(str(row['formulario']), '-')}",
-                            axis=1
-                        )
-        
-                        df_destacados = df_destacados.sort_values(by=["apellido_nombre", "Fecha_formateada"])
+
         
                         st.dataframe(
                             df_destacados[[
@@ -554,61 +336,37 @@ def mostrar(supabase):
 
      
         # Obtener configuración global
-        config_items = supabase.table("configuracion").select("*").execute().data
-        config_map = {item["id"]: item for item in config_items}
-        anulacion_activa = config_map.get("anulacion_activa", {}).get("valor", True)
+        anulacion_activa = repositorio_configuracion.valor(supabase, "anulacion_activa", True)
         
     
+        # Resultado de la última anulación
+        mensaje_anulacion = st.session_state.pop("mensaje_anulacion", None)
+        if mensaje_anulacion:
+            cantidad, no_anuladas = mensaje_anulacion
+            st.success(f"✅ {cantidad} evaluaciones anuladas.")
+            if no_anuladas:
+                st.warning("⚠️ No se anularon: " + "; ".join(no_anuladas))
+
         # Mostrar bloque de anulaciones solo si está habilitado
-        if anulacion_activa and not df_no_anuladas.empty:
+        if anulacion_activa and total_no_anuladas:
             st.markdown("---")
             st.markdown("<h2 style='font-size:20px;'>🔄 Evaluaciones que pueden anularse:</h2>", unsafe_allow_html=True)
             
-            # Columnas auxiliares
-            df_no_anuladas["Seleccionar"] = False
-            df_no_anuladas["Nivel Eval"] = df_no_anuladas["formulario"].astype(str).map(MAPA_NIVEL_EVALUACION)
-            df_no_anuladas["Puntaje/Max"] = df_no_anuladas.apply(
-                lambda row: f"{row['puntaje_total']}/{MAXIMO_PUNTAJE_FORMULARIO.get(str(row['formulario']), '-')}",
-                axis=1
+            df_anulables = _pagina_servidor(
+                supabase, "pagina_anulables", total_no_anuladas, anulada=False, **unidad
             )
-            
-            # Ordenar
-            df_no_anuladas = df_no_anuladas.sort_values(by=["apellido_nombre", "Fecha_formateada"])
-            
-            # --- Paginación con selectbox (versión segura) ---
-            registros_por_pagina = 8
-            total_registros = len(df_no_anuladas)
-            total_paginas = max(1, (total_registros - 1) // registros_por_pagina + 1)
-            paginas = list(range(1, total_paginas + 1))
-            
-            if (
-                "pagina_anulables" not in st.session_state
-                or st.session_state["pagina_anulables"] not in paginas
-            ):
-                st.session_state["pagina_anulables"] = 1
-            
-            pagina_actual = st.selectbox(
-                "Seleccionar página:",
-                options=paginas,
-                index=paginas.index(st.session_state["pagina_anulables"]),
-                key="pagina_anulables_select"
-            )
-            
-            st.session_state["pagina_anulables"] = pagina_actual
-            
-            inicio = (pagina_actual - 1) * registros_por_pagina
-            fin = inicio + registros_por_pagina
-            
+            df_anulables["Seleccionar"] = False
+
             # Subset paginado
-            df_pagina = df_no_anuladas.iloc[inicio:fin][[
+            df_pagina = df_anulables[[
                 "Seleccionar", "apellido_nombre", "Nivel Eval",
-                "calificacion", "Puntaje/Max", "evaluador", "id_evaluacion"
+                "calificacion", "Puntaje/Máximo", "evaluador", "id_evaluacion"
             ]].rename(columns={
                 "Seleccionar": "Seleccionar",
                 "apellido_nombre": "Apellido/s y Nombre/s",
                 "Nivel Eval": "Nivel Evaluación",
                 "calificacion": "Calificación",
-                "Puntaje/Max": "Puntaje/Máximo",
+                "Puntaje/Máximo": "Puntaje/Máximo",
                 "evaluador": "Evaluador",
                 "id_evaluacion": "id_evaluacion"
             })
@@ -649,14 +407,14 @@ def mostrar(supabase):
                 if not ids_seleccionados:
                     st.warning("⚠️ No hay evaluaciones seleccionadas para anular.")
                 else:
-                    for id_eval in ids_seleccionados:
-                        eval_sel = df_no_anuladas[df_no_anuladas["id_evaluacion"] == id_eval].iloc[0]
-                        supabase.table("evaluaciones").update({"anulada": True})\
-                            .eq("id_evaluacion", id_eval).execute()
-                        supabase.table("agentes").update({"evaluado_2024": False})\
-                            .eq("cuil", str(eval_sel["cuil"]).strip()).execute()
-                    st.success(f"✅ {len(ids_seleccionados)} evaluaciones anuladas.")
-                    time.sleep(2)
+                    resultados = repositorio_evaluaciones.anular(supabase, ids_seleccionados)
+                    anuladas = [r for r in resultados if r["resultado"] == "anulada"]
+
+                    # Resultado por evaluación, visible después del rerun
+                    st.session_state["mensaje_anulacion"] = (len(anuladas), [
+                        f"{r['id_evaluacion']}: {r['resultado'].replace('_', ' ')}"
+                        for r in resultados if r["resultado"] != "anulada"
+                    ])
                     st.rerun()
   #      elif not anulacion_activa:
   #          st.info("🔒 La anulación de evaluaciones está cerrada.")
@@ -664,57 +422,17 @@ def mostrar(supabase):
         pass
 
     
-        df_anuladas = df_eval[df_eval["anulada"] == True].copy()
+        total_anuladas = repositorio_evaluaciones.contar_de_unidad(supabase, anulada=True, **unidad)
 
-        
-        if not df_anuladas.empty:
+        if total_anuladas:
             st.markdown("---")
-
-        
-        if not df_anuladas.empty:
             st.markdown("<h2 style='font-size:20px;'>❌ Evaluaciones anuladas:</h2>", unsafe_allow_html=True)
-        
-            # Crear copia visual
-            df_visual_anuladas = df_anuladas.copy()
-            df_visual_anuladas["Nivel Eval"] = df_visual_anuladas["formulario"].astype(str).map(MAPA_NIVEL_EVALUACION)
-            df_visual_anuladas["Puntaje/Máximo"] = df_visual_anuladas.apply(
-                lambda row: f"{row['puntaje_total']}/{MAXIMO_PUNTAJE_FORMULARIO.get(str(row['formulario']), '-')}",
-                axis=1
-            )
-        
-            # Ordenar
-            df_visual_anuladas = df_visual_anuladas.sort_values(by=["apellido_nombre", "Fecha_formateada"])
-        
-            # Configurar paginación
-            registros_por_pagina = 8
-            total_registros = len(df_visual_anuladas)
-            total_paginas = max(1, (total_registros - 1) // registros_por_pagina + 1)  # Siempre al menos 1 página
-            paginas = list(range(1, total_paginas + 1))
-            
-            # Inicializar página en session_state si no existe o es inválida
-            if (
-                "pagina_anuladas" not in st.session_state
-                or st.session_state["pagina_anuladas"] not in paginas
-            ):
-                st.session_state["pagina_anuladas"] = 1
-            
-            # Selector de página con index seguro
-            pagina_actual = st.selectbox(
-                "Seleccionar página:",
-                options=paginas,
-                index=paginas.index(st.session_state["pagina_anuladas"]),
-                key="pagina_anuladas_select"
+
+            df_visual_anuladas = _pagina_servidor(
+                supabase, "pagina_anuladas", total_anuladas, anulada=True, **unidad
             )
-            
-            # Actualizar session_state
-            st.session_state["pagina_anuladas"] = pagina_actual
-            
-            # Subset paginado
-            inicio = (pagina_actual - 1) * registros_por_pagina
-            fin = inicio + registros_por_pagina
 
-        
-            subset = df_visual_anuladas.iloc[inicio:fin][[
+            subset = df_visual_anuladas[[
                 "apellido_nombre", "Nivel Eval", "calificacion",
                 "Puntaje/Máximo", "evaluador", "Fecha_formateada"
             ]].rename(columns={
@@ -740,113 +458,16 @@ def mostrar(supabase):
         st.markdown(f"<h2 style='font-size:20px;'>👥 Total de agentes evaluables: <strong>{cantidad_agentes}</strong></h2>", unsafe_allow_html=True)
 
 
-        def set_cell_style(cell, bold=True, bg_color=None, font_color="000000"):
-            para = cell.paragraphs[0]
-            run = para.runs[0] if para.runs else para.add_run(" ")
-            run.text = run.text if run.text.strip() else " "
-            run.font.name = "Calibri"
-            run.font.size = Pt(10)
-            run.font.bold = bold
-            run.font.color.rgb = RGBColor.from_string(font_color.upper())
-
-            tc = cell._tc
-            tcPr = tc.get_or_add_tcPr()
-            if bg_color:
-                shd = OxmlElement("w:shd")
-                shd.set(qn("w:fill"), bg_color)
-                tcPr.append(shd)
-
-            para.alignment = 1  # Centrado
-
-
-
-        def generar_informe_agentes_docx(df_agentes, dependencia_nombre):
-            doc = Document()
-
-            # Márgenes
-            section = doc.sections[0]
-            section.top_margin = Cm(2)
-            section.bottom_margin = Cm(2)
-            section.left_margin = Cm(2)
-            section.right_margin = Cm(2)
-
-            # Fuente general
-            doc.styles["Normal"].font.name = "Calibri"
-            doc.styles["Normal"].font.size = Pt(10)
-
-            # Encabezado
-            header = section.header
-            p_header = header.paragraphs[0]
-            p_header.clear()
-            run = p_header.add_run(
-                f"INSTITUTO NACIONAL DE ESTADISTICA Y CENSOS\n"
-                f"DIRECCIÓN DE CAPACITACIÓN Y CARRERA DE PERSONAL\n"
-                f"LISTADO DE AGENTES PARA EVALUACIÓN DE DESEMPEÑO 2024\n"
-                f"UNIDAD DE ANÁLISIS: {dependencia_nombre}"
-            )
-            run.font.name = "Calibri"
-            run.font.size = Pt(10)
-            run.font.bold = True
-            run.font.color.rgb = RGBColor.from_string("104f8e")
-            p_header.alignment = 1
-            p_header.paragraph_format.line_spacing = Pt(12)
-
-            doc.add_paragraph()
-
-            # Título
-            p_title = doc.add_paragraph()
-            run = p_title.add_run("LISTADO DE AGENTES")
-            run.bold = True
-            run.font.size = Pt(10)
-            run.font.color.rgb = RGBColor.from_string("104f8e")
-            p_title.alignment = 1
-
-            doc.add_paragraph()
-
-            # Tabla
-            columnas = ["APELLIDO Y NOMBRE", "NIVEL/GRADO", "AGRUPAMIENTO", "TRAMO", "INGRESANTE"]
-            tabla = doc.add_table(rows=1, cols=len(columnas))
-            tabla.style = 'Table Grid'
-
-            for i, col in enumerate(columnas):
-                celda = tabla.cell(0, i)
-                celda.text = col
-                set_cell_style(celda, bg_color="104f8e", font_color="FFFFFF")
-
-            # Filtrado y orden
-            df_agentes_ordenado = df_agentes.sort_values("apellido_nombre")
-
-            for _, row in df_agentes_ordenado.iterrows():
-                fila = tabla.add_row().cells
-                fila[0].text = row.get("apellido_nombre", "")
-                fila[1].text = f"{row.get('nivel', '')}-{row.get('grado', '')}"
-                agrupamiento = row.get("agrupamiento", "")
-                fila[2].text = "Profesional" if agrupamiento == "PROF" else "General" if agrupamiento == "GRAL" else ""
-                fila[3].text = row.get("tramo", "")
-                fila[4].text = "Sí" if row.get("ingresante") is True else ""
-
-                for celda in fila:
-                    set_cell_style(celda, bold=False)
-
-            return doc
 
         # 🔽 Botón de descarga
         if not df_agentes.empty:
-            with st.spinner("✏️ Generando documento..."):
-                doc = generar_informe_agentes_docx(df_agentes, dependencia_filtro)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                    doc.save(tmp.name)
-                    tmp_path = tmp.name
-
-            with open(tmp_path, "rb") as file:
-                st.download_button(
-                    label="📥 Descargar Informe de Agentes",
-                    data=file,
-                    file_name=f"agentes_{dependencia_filtro.replace(' ', '_')}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-       #             use_container_width=True,
-                    type="primary"
-                )
+            informes_docx.boton_informe(
+                "agentes", dependencia_filtro, (df_agentes,),
+                lambda: informes_docx.informe_agentes_docx(df_agentes, dependencia_filtro),
+                etiqueta="Informe de Agentes",
+                archivo=f"agentes_{dependencia_filtro.replace(' ', '_')}.docx",
+                key=f"agentes_{dependencia_filtro}",
+            )
 
 
 
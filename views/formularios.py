@@ -1,55 +1,34 @@
 import streamlit as st
 import pandas as pd
-import yaml
 from datetime import date
-import time
-
-MAPA_NIVEL_EVALUACION = {
-    "1": "Jerárquico (1)",
-    "2": "Medio (2)",
-    "3": "Medio (3)",
-    "4": "Medio (4)",
-    "5": "Operativo (5)",
-    "6": "Operativo (6)"
-}
-
-MAXIMO_PUNTAJE_FORMULARIO = {
-    "1": 56,
-    "2": 48,
-    "3": 48,
-    "4": 40,
-    "5": 32,
-    "6": 24
-}
-
-
-
-def cargar_formularios():
-    with open("formularios.yaml", "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
-    return config["formularios"], config["clasificaciones"]
-
-
-def mostrar(supabase, formularios, clasificaciones):
+import uuid
+import httpx
+from postgrest.exceptions import APIError
+from modules import sesion
+from modules.catalogo_formularios import cargar_catalogo
+from modules import repositorio_agentes, repositorio_configuracion, repositorio_cupos, repositorio_evaluaciones
+
+def mostrar(supabase, catalogo=None):
     st.markdown("<h1 style='font-size:26px;'>✍🏻 Evaluación de Desempeño 2024</h1>", unsafe_allow_html=True)
     st.markdown("<h2 style='font-size:24px;'>📄 Formulario de Evaluación</h1>", unsafe_allow_html=True)
+    catalogo = catalogo or cargar_catalogo()
+
+    # Confirmación del envío anterior (se muestra después del rerun)
+    mensaje_envio = st.session_state.pop("mensaje_envio", None)
+    if mensaje_envio:
+        st.success(mensaje_envio)
 
     # 🔒 Verificar si el formulario está habilitado
-    conf = supabase.table("configuracion").select("valor").eq("id", "formulario_activo").execute().data
-    formulario_activo = conf[0]["valor"] if conf else True
+    formulario_activo = repositorio_configuracion.valor(supabase, "formulario_activo", True)
 
     if not formulario_activo:
         st.warning("🚫 PERIODO DE EVALUACIÓN CERRADO")
         return
 
-    usuario_actual = st.session_state.get("usuario")
+    perfil = sesion.perfil_actual()
+    usuario_actual = perfil.usuario
 
-    agentes_data = supabase.table("agentes")\
-        .select("cuil, apellido_nombre, ingresante, nivel, grado, tramo, agrupamiento, dependencia, dependencia_general, ultima_calificacion, calificaciones_corrimiento, activo, motivo_inactivo, fecha_inactivo")\
-        .eq("evaluador_2024", usuario_actual)\
-        .eq("evaluado_2024", False)\
-        .order("apellido_nombre")\
-        .execute().data
+    agentes_data = repositorio_agentes.pendientes_de_evaluador(supabase, usuario_actual)
 
     # Verificar si hay agentes para evaluar
     if not agentes_data:
@@ -69,36 +48,16 @@ def mostrar(supabase, formularios, clasificaciones):
     if seleccion_agente == "":
         st.info(f"👥 Tiene {len(agentes_data)} agente/s pendiente/s para evaluar.")
     
-        if st.session_state.get("rol", {}).get("evaluador_general"):
+        if perfil.tiene_rol("evaluador_general"):
             dependencia_general_actual = agentes_data[0].get("dependencia_general")
     
             if dependencia_general_actual:
                 try:
-                    # Obtener total de agentes activos en esa dependencia_general
-                    agentes_dependencia = supabase.table("agentes")\
-                        .select("cuil, activo")\
-                        .eq("dependencia_general", dependencia_general_actual)\
-                        .execute().data
-    
-                    total_agentes = sum(1 for a in agentes_dependencia if a.get("activo") == True)
+                    # Contador mantenido en la base: una sola fila por dependencia general
+                    cupo = repositorio_cupos.de_dependencia_general(supabase, dependencia_general_actual)
                    
-                    if total_agentes >= 3:
-                        import math
-                        cupo_exacto = total_agentes * 0.3
-                        max_destacados = math.floor(cupo_exacto) if (cupo_exacto - math.floor(cupo_exacto)) < 0.5 else math.floor(cupo_exacto) + 1
-                        
-                        # Obtener cantidad de DESTACADOS ya asignados en esa dependencia_general
-                        destacados_actuales = supabase.table("evaluaciones")\
-                            .select("id_evaluacion, calificacion, anulada, dependencia_general")\
-                            .eq("anio_evaluacion", 2024)\
-                            .eq("calificacion", "DESTACADO")\
-                            .eq("dependencia_general", dependencia_general_actual)\
-                            .execute().data
-    
-                        usados = sum(1 for e in destacados_actuales if not e.get("anulada", False))
-                        disponibles = max(0, max_destacados - usados)
-    
-                        st.info(f"🏅 Dispone de {disponibles} calificación/es DESTACADO de un máximo de {max_destacados} para el total de su Dirección Nacional/General.")
+                    if cupo["agentes_activos"] >= 3:
+                        st.info(f"🏅 Dispone de {cupo['disponibles']} calificación/es DESTACADO de un máximo de {cupo['cupo']} para el total de su Dirección Nacional/General.")
                 except Exception as e:
                     st.warning(f"⚠️ Error al calcular cupo de destacados: {e}")
     
@@ -157,12 +116,21 @@ def mostrar(supabase, formularios, clasificaciones):
     tipo = st.selectbox(
         #"📄 Seleccione el tipo de formulario",
         "",
-        options=[""] + list(formularios.keys()),
+        options=[""] + list(catalogo.keys()),
         key="select_tipo",
-        format_func=lambda x: "– Seleccione formulario –" if x == "" else f"Formulario {x} – {formularios[x]['titulo']}"
+        format_func=lambda x: "– Seleccione formulario –" if x == "" else f"Formulario {x} – {catalogo[x].titulo}"
     )
     if tipo == "":
         return
+    formulario = catalogo[tipo]
+
+    # La clave de envío y la previsualización valen para un agente y un
+    # formulario: si cambia alguno, se descartan (la clave de otro agente
+    # haría pasar este envío por un reintento del anterior)
+    if st.session_state.get("envio_de") != (cuil, tipo):
+        st.session_state["envio_de"] = (cuil, tipo)
+        st.session_state.pop("clave_envio", None)
+        st.session_state.previsualizado = False
 
     if 'previsualizado' not in st.session_state:
         st.session_state.previsualizado = False
@@ -175,23 +143,20 @@ def mostrar(supabase, formularios, clasificaciones):
         puntajes = []
         respuestas_completas = True
 
-        for i, bloque in enumerate(formularios[tipo]['factores']):
-            st.subheader(bloque['factor'])
-            st.write(bloque['descripcion'])
-            opciones = [texto for texto, _ in bloque['opciones']]
+        for i, factor in enumerate(formulario.factores):
+            st.subheader(factor.factor)
+            st.write(factor.descripcion)
             seleccion = st.radio(
                 label="Seleccione una opción",
-                options=opciones,
+                options=factor.opciones,
                 key=f"factor_{i}",
                 index=None
             )
             if seleccion is not None:
-                puntaje = dict(bloque['opciones'])[seleccion]
+                puntaje = factor.puntajes[seleccion]
                 puntajes.append(puntaje)
-                clave = bloque['factor'].split(' ')[0].strip()
-                factor_puntaje[f"Factor {clave}"] = puntaje
-                posicion = opciones.index(seleccion) + 1
-                factor_posicion[f"Factor {clave}"] = posicion
+                factor_puntaje[factor.clave] = puntaje
+                factor_posicion[factor.clave] = factor.posicion(seleccion)
             else:
                 respuestas_completas = False
 
@@ -201,6 +166,8 @@ def mostrar(supabase, formularios, clasificaciones):
         if respuestas_completas:
             st.session_state.update({
                 "previsualizado": True,
+                # Identifica este envío: un doble clic no crea dos evaluaciones
+                "clave_envio": st.session_state.get("clave_envio") or str(uuid.uuid4()),
                 "puntajes": puntajes,
                 "respuestas_completas": True,
                 "factor_puntaje": factor_puntaje,
@@ -212,20 +179,25 @@ def mostrar(supabase, formularios, clasificaciones):
 
     if st.session_state.get("previsualizado") and st.session_state.get("respuestas_completas"):
         total = sum(st.session_state.puntajes)
-        rango = clasificaciones.get(tipo, [])
-        clasificacion = next((nombre for nombre, maxv, minv in rango if minv <= total <= maxv), "Sin clasificación")
+        clasificacion = formulario.clasificar(total)
 
         st.markdown("---")
     #    st.markdown(f"### 📊 Puntaje: {total}")
     #    st.markdown(f"### 📌 Calificación: **{clasificacion}**")
     #    st.markdown("---")
         
-        puntaje_maximo = sum([max(v for _, v in bloque["opciones"]) for bloque in formularios[tipo]["factores"]])
+        puntaje_maximo = formulario.puntaje_maximo
 
      #    st.markdown(f"### 🔢 Puntaje: **{total}** de {puntaje_maximo} puntos posibles")
         st.markdown(f"#### 🔢 Puntaje: **{total}** (**de {puntaje_maximo} puntos posibles**)")
         st.markdown(f"#### 🏅 Calificación: **{clasificacion}**")
 
+        # Aviso anticipado; el cupo se reserva (o se rechaza) recién al enviar
+        if clasificacion == "DESTACADO" and agente.get("dependencia_general"):
+            cupo = repositorio_cupos.de_dependencia_general(supabase, agente["dependencia_general"])
+            if cupo["disponibles"] == 0:
+                st.warning(f"⚠️ Su Dirección Nacional/General ya asignó {cupo['destacados']} de {cupo['cupo']} calificación/es DESTACADO: el envío será rechazado.")
+
 
         
         st.markdown("---")
@@ -240,55 +212,54 @@ def mostrar(supabase, formularios, clasificaciones):
                 help="Confirma el envío de la evaluación."  # Texto de ayuda
             ):        
                 tipo_formulario = tipo
-                evaluador = st.session_state.get("usuario", "desconocido")
+                evaluador = perfil.usuario
              #   puntaje_maximo = max(puntajes) * len(puntajes) if puntajes else None
-                puntaje_maximo = sum([max(v for _, v in bloque["opciones"]) for bloque in formularios[tipo]["factores"]])
                 puntaje_relativo = round((total / puntaje_maximo) * 10, 3) if puntaje_maximo else None
 
-                unidad_info = supabase.table("unidades_evaluacion")\
-                    .select("unidad_evaluadora, unidad_analisis, dependencia_general")\
-                    .eq("dependencia", agente.get("dependencia"))\
-                    .maybe_single().execute().data
-
-                supabase.table("evaluaciones").insert({
-                    "cuil": cuil,
-                    "apellido_nombre": apellido_nombre,
-                    "nivel": agente.get("nivel"),
-                    "grado": agente.get("grado"),
-                    "tramo": agente.get("tramo"),
-                    "agrupamiento": agente.get("agrupamiento"),
-                    "dependencia": agente.get("dependencia"),
-                    "dependencia_general": unidad_info.get("dependencia_general") if unidad_info else None,
-                    "unidad_evaluadora": unidad_info.get("unidad_evaluadora") if unidad_info else None,
-                    "unidad_analisis": unidad_info.get("unidad_analisis") if unidad_info else None,
-                    "anio_evaluacion": 2024,
-                    "evaluador": evaluador,
-                    "formulario": tipo_formulario,
-                    "factor_puntaje": st.session_state["factor_puntaje"],
-                    "factor_posicion": st.session_state["factor_posicion"],
-                    "puntaje_total": total,
-                    "ultima_calificacion": agente.get("ultima_calificacion"),
-                    "calificaciones_corrimiento": agente.get("calificaciones_corrimiento"),
-                    "puntaje_maximo": puntaje_maximo,
-                    "puntaje_relativo": puntaje_relativo,
-                    "calificacion": clasificacion,
-                    "fecha_notificacion": date.today().isoformat(),
-                    "residual": False,
-                    "activo": agente.get("activo"),
-                    "motivo_inactivo": agente.get("motivo_inactivo"),
-                    "fecha_inactivo": agente.get("fecha_inactivo"),
-                }).execute()
-
-                supabase.table("agentes").update({"evaluado_2024": True}).eq("cuil", cuil).execute()
-
-                st.success(f"📤 Evaluación de {apellido_nombre} enviada correctamente")
-                time.sleep(2)
-
-                for key in list(st.session_state.keys()):
-                    if key.startswith("factor_") or key in ["select_tipo", "previsualizado", "confirmado", "puntajes", "respuestas_completas", "last_tipo"]:
-                        del st.session_state[key]
-
-                st.rerun()
+                try:
+                    resultado = repositorio_evaluaciones.registrar(supabase, {
+                        "cuil": cuil,
+                        "apellido_nombre": apellido_nombre,
+                        "nivel": agente.get("nivel"),
+                        "grado": agente.get("grado"),
+                        "tramo": agente.get("tramo"),
+                        "agrupamiento": agente.get("agrupamiento"),
+                        "dependencia": agente.get("dependencia"),
+                        "anio_evaluacion": 2024,
+                        "evaluador": evaluador,
+                        "formulario": tipo_formulario,
+                        "factor_puntaje": st.session_state["factor_puntaje"],
+                        "factor_posicion": st.session_state["factor_posicion"],
+                        "puntaje_total": total,
+                        "ultima_calificacion": agente.get("ultima_calificacion"),
+                        "calificaciones_corrimiento": agente.get("calificaciones_corrimiento"),
+                        "puntaje_maximo": puntaje_maximo,
+                        "puntaje_relativo": puntaje_relativo,
+                        "calificacion": clasificacion,
+                        "fecha_notificacion": date.today().isoformat(),
+                        "residual": False,
+                        "activo": agente.get("activo"),
+                        "motivo_inactivo": agente.get("motivo_inactivo"),
+                        "fecha_inactivo": agente.get("fecha_inactivo"),
+                    }, st.session_state["clave_envio"])
+                except repositorio_evaluaciones.CupoDestacadosAgotado as e:
+                    st.error(f"🚫 {e} La evaluación no se registró.")
+                except (APIError, httpx.HTTPError) as e:
+                    # Se conserva la clave de envío: reintentar no duplica la evaluación
+                    st.error(
+                        f"❌ No se pudo confirmar el envío ({getattr(e, 'message', None) or e}). "
+                        "Vuelva a intentarlo: si la evaluación ya se había registrado, no se duplicará."
+                    )
+                else:
+                    # Residuales y BDD de la dependencia ya se recalcularon en
+                    # la misma transacción del alta (sql/registrar_evaluacion.sql)
+                    st.session_state["mensaje_envio"] = f"📤 Evaluación de {apellido_nombre} enviada correctamente"
+
+                    for key in list(st.session_state.keys()):
+                        if key.startswith("factor_") or key in ["select_tipo", "previsualizado", "confirmado", "puntajes", "respuestas_completas", "last_tipo", "clave_envio", "envio_de"]:
+                            del st.session_state[key]
+
+                    st.rerun()
 
         with col2:
             if st.button(
@@ -307,7 +278,7 @@ def mostrar(supabase, formularios, clasificaciones):
             ):
                 
                 st.markdown("** Clasificación según puntaje:**")
-                for nombre, maxv, minv in clasificaciones[tipo]:
+                for nombre, maxv, minv in formulario.clasificaciones:
                     st.markdown(f"- **{nombre}**: entre {minv} y {maxv} puntos")
 
     st.session_state["last_tipo"] = tipo
@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
-from io import BytesIO
+from modules import exportacion, repositorio_agentes
+
+COLUMNAS_GRILLA = "apellido_nombre, dependencia, nivel"
+ORDENES_AGENTES = {"apellido_nombre": "Apellido y nombre", "dependencia": "Dependencia", "nivel": "Nivel"}
+TAMANIOS_PAGINA = [25, 50, 100]
 
 def mostrar(supabase):
     st.title("📝 Instructivo")
@@ -21,27 +25,53 @@ def mostrar(supabase):
     with col1:
         nivel_filter = st.selectbox(
             "🎯 Filtrar por Nivel:",
-            ["Todos"] + list(set([item.get('nivel', 'Sin nivel') for item in supabase.table("agentes").select("nivel").execute().data if item.get('nivel')])),
+            ["Todos"] + repositorio_agentes.valores_distintos(supabase, "nivel"),
             key="nivel_filter_aggrid"
         )
     
     with col2:
         dependencia_filter = st.selectbox(
             "🏢 Filtrar por Dependencia:",
-            ["Todas"] + list(set([item.get('dependencia', 'Sin dependencia') for item in supabase.table("agentes").select("dependencia").execute().data if item.get('dependencia')])),
+            ["Todas"] + repositorio_agentes.valores_distintos(supabase, "dependencia"),
             key="dependencia_filter_aggrid"
         )
     
     # --- Obtener registros con filtros aplicados ---
-    query = supabase.table("agentes").select("apellido_nombre, dependencia, nivel")
-    
+    filtros = {}
     if nivel_filter != "Todos":
-        query = query.eq("nivel", nivel_filter)
+        filtros["nivel"] = nivel_filter
     if dependencia_filter != "Todas":
-        query = query.eq("dependencia", dependencia_filter)
+        filtros["dependencia"] = dependencia_filter
     
-    data = query.execute().data
-    df = pd.DataFrame(data)
+    with col3:
+        tamanio = st.selectbox("📄 Filas:", TAMANIOS_PAGINA, key="tamanio_pagina_aggrid")
+
+    col_busqueda, col_orden, col_sentido = st.columns([2, 2, 1])
+    with col_busqueda:
+        busqueda = st.text_input("🔎 Buscar por nombre:", key="busqueda_aggrid").strip()
+    with col_orden:
+        orden = st.selectbox(
+            "↕️ Ordenar por:", list(ORDENES_AGENTES), format_func=ORDENES_AGENTES.get, key="orden_aggrid"
+        )
+    with col_sentido:
+        descendente = st.toggle("Descendente", key="descendente_aggrid")
+
+    # --- Solo la página visible: filtros, búsqueda, orden y rango se resuelven en el servidor ---
+    total = repositorio_agentes.contar(supabase, busqueda, **filtros)
+    paginas = max(1, -(-total // tamanio))
+
+    # Un cambio de filtros, búsqueda, orden o tamaño vuelve a la primera página
+    consulta = (nivel_filter, dependencia_filter, busqueda, orden, descendente, tamanio)
+    if st.session_state.get("consulta_aggrid") != consulta:
+        st.session_state["consulta_aggrid"] = consulta
+        st.session_state["pagina_aggrid"] = 1
+    st.session_state["pagina_aggrid"] = min(st.session_state.get("pagina_aggrid", 1), paginas)
+
+    data = repositorio_agentes.pagina(
+        supabase, COLUMNAS_GRILLA, st.session_state["pagina_aggrid"] - 1, tamanio,
+        orden=orden, descendente=descendente, busqueda=busqueda, **filtros
+    )
+    df = pd.DataFrame(data, columns=[c.strip() for c in COLUMNAS_GRILLA.split(",")])
     
     if not df.empty:
         # Configuración CSS para multilínea
@@ -68,7 +98,6 @@ def mostrar(supabase):
             cellStyle={"text-align": "left"}
         )
         
-        gb.configure_pagination(paginationAutoPageSize=True)
         gb.configure_side_bar()
         gb.configure_selection('multiple', use_checkbox=True)
         
@@ -83,19 +112,23 @@ def mostrar(supabase):
             enable_enterprise_modules=True
         )
 
-        # Exportar a Excel (con verificación de openpyxl)
-        try:
-            buffer = BytesIO()
-            df.to_excel(buffer, index=False, engine='openpyxl')  # Especifica el motor
-            
-            st.download_button(
-                "📥 Descargar Excel",
-                data=buffer.getvalue(),
-                file_name="agentes.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        except ImportError:
-            st.warning("Para exportar a Excel, instala openpyxl: pip install openpyxl")
+        desde = (st.session_state["pagina_aggrid"] - 1) * tamanio
+        col_info, col_pagina = st.columns([3, 1])
+        col_info.caption(f"Mostrando {desde + 1}–{desde + len(df)} de {total} agentes")
+        col_pagina.number_input(
+            f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key="pagina_aggrid"
+        )
+
+        # Exportar todos los agentes filtrados (no solo la página): se leen recién al pedirlo
+        formato = exportacion.selector_formato(key="formato_agentes")
+        if st.session_state.get("exportar_aggrid") == consulta:
+            df_exportar = pd.DataFrame(repositorio_agentes.todas_las_paginas(
+                supabase, COLUMNAS_GRILLA, orden=orden, descendente=descendente, busqueda=busqueda, **filtros
+            ))
+            exportacion.boton_descarga("📥 Descargar", df_exportar, "agentes", formato, hoja="Agentes")
+        elif st.button(f"📥 Preparar descarga de {total} agentes"):
+            st.session_state["exportar_aggrid"] = consulta
+            st.rerun()
         
         # Mostrar selección
         if grid_response['selected_rows']: